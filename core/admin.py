@@ -1,12 +1,42 @@
 #core/admin.py
-from django.contrib import admin
-from .models import Category, Supplier, Product, Customer, Order, OrderItem
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from .models import (Category, Supplier, Product, Customer, Order, OrderItem, ArchivedOrder, DailySalesRollup,
+                     BulkEditLog)
+from .forms import BulkProductEditForm
+from .bulk import PRODUCT_OPERATIONS, update_products, update_order_status
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name','sku','category','supplier','price','stock','updated_at')
     list_filter = ('category','supplier')
     search_fields = ('name','sku','description')
+    actions = ['bulk_edit']
+    def bulk_edit(self, request, queryset):
+        # Página intermedia con el formulario; al confirmar se aplica por lotes (core.bulk)
+        form = BulkProductEditForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            operation, value = form.operation_args()
+            try:
+                count, batches = update_products(queryset, operation, value, user=request.user)
+            except ValueError as exc:
+                self.message_user(request, str(exc), messages.ERROR)
+            else:
+                self.message_user(request, f"{PRODUCT_OPERATIONS[operation]}: {count} productos actualizados "
+                                           f"en {batches} lotes.")
+            return None
+        return TemplateResponse(request, 'admin/core/product/bulk_edit.html', {
+            **self.admin_site.each_context(request),
+            'title': "Edición masiva de productos",
+            'opts': self.model._meta,
+            'form': form,
+            'count': queryset.count(),
+            'select_across': request.POST.get('select_across') == '1',
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+    bulk_edit.short_description = "Edición masiva (precio, categoría, proveedor, stock)"
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -24,11 +54,53 @@ class OrderItemInline(admin.TabularInline):
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id','customer','status','total','created_at')
     inlines = [OrderItemInline]
-    actions = ['mark_completed']
+    actions = ['mark_completed', 'mark_canceled']
+    def save_formset(self, request, form, formset, change):
+        # unit_price es de solo lectura: las líneas nuevas toman el precio actual del producto
+        for item in formset.save(commit=False):
+            if item.unit_price is None:
+                item.unit_price = item.product.price
+            item.save()
+        for item in formset.deleted_objects:
+            item.delete()
+        formset.save_m2m()
     def mark_completed(self, request, queryset):
-        queryset.update(status='C')
+        # No es un queryset.update() directo: las ventas tienen que llegar a DailySalesRollup
+        count, _ = update_order_status(queryset, 'C', user=request.user)
+        self.message_user(request, f"{count} pedidos marcados como completados.")
     mark_completed.short_description = "Marcar pedidos como completados"
+    def mark_canceled(self, request, queryset):
+        count, _ = update_order_status(queryset, 'X', user=request.user)
+        self.message_user(request, f"{count} pedidos cancelados.")
+    mark_canceled.short_description = "Cancelar pedidos"
 
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
     list_display = ('user','phone')
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ('date','category','supplier','units','revenue')
+    list_filter = ('category','supplier')
+    date_hierarchy = 'date'
+    list_select_related = ('category','supplier')
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+@admin.register(BulkEditLog)
+class BulkEditLogAdmin(admin.ModelAdmin):
+    list_display = ('created_at','user','target','operation','params','batch','count','first_id','last_id')
+    list_filter = ('target','operation')
+    search_fields = ('run',)
+    list_select_related = ('user',)
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ('id','customer','status','total','created_at','archived_at')
+    list_filter = ('status',)
+    date_hierarchy = 'created_at'
+    list_select_related = ('customer__user',)
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
@@ -0,0 +1,76 @@
+"""
+Archivo de pedidos: los completados o cancelados más viejos que cierta edad
+salen de core_order / core_orderitem y pasan a ArchivedOrder, una fila por
+pedido con sus líneas en JSON. Así la tabla caliente y sus índices quedan
+chicos aunque el historial crezca; las vistas leen el archivo solo cuando se
+pide (listado con ?archivados=1 o detalle de un pedido que ya no está en core_order).
+
+Se mueve por bloques de ids, cada uno en su propia transacción: INSERT de los
+archivados y borrado de los pedidos con QuerySet.delete(), que arrastra las
+líneas. Mientras dura ese borrado `archiving` está activo y las señales de
+Order/OrderItem (core/signals.py) no restan las ventas de DailySalesRollup ni
+recalculan Order.total: un pedido archivado sigue contando en los reportes.
+Si se borra el cliente, sus pedidos archivados quedan sin cliente (SET_NULL)
+por la misma razón.
+"""
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.utils import timezone
+
+from .bulk import pk_chunks
+from .models import ArchivedOrder, Order, OrderItem
+
+ARCHIVE_CHUNK = 1000
+ARCHIVE_STATUSES = ('C', 'X')
+
+# Activo durante el borrado de archive_orders (ver el docstring del módulo)
+archiving = ContextVar('core_archiving', default=False)
+
+
+def archivable_orders(days):
+    """Pedidos completados o cancelados creados hace más de `days` días."""
+    before = timezone.now() - timedelta(days=days)
+    return Order.objects.filter(status__in=ARCHIVE_STATUSES, created_at__lt=before)
+
+
+def _archived(orders, items):
+    lines = {}
+    for order_id, product_id, name, quantity, unit_price, category_id, supplier_id in items:
+        lines.setdefault(order_id, []).append([product_id, name, quantity, str(unit_price), category_id, supplier_id])
+    return [ArchivedOrder(id=o['id'], customer_id=o['customer_id'], status=o['status'], total=o['total'],
+                          created_at=o['created_at'], items=lines.get(o['id'], []))
+            for o in orders]
+
+
+def archive_orders(queryset, chunk_size=ARCHIVE_CHUNK, progress=None):
+    """
+    Archiva los pedidos del queryset que estén completados o cancelados.
+    progress(lote, pedidos del lote) se llama después de cada lote. Devuelve (pedidos archivados, lotes).
+    """
+    queryset = queryset.filter(status__in=ARCHIVE_STATUSES)
+    using = router.db_for_write(Order)
+    archived, batch = 0, 0
+    for ids in pk_chunks(queryset, chunk_size):
+        with transaction.atomic(using=using):
+            # Se relee con lock: el pedido pudo cambiar de estado desde que se armó el bloque
+            orders = list(queryset.filter(pk__in=ids).select_for_update()
+                          .values('id', 'customer_id', 'status', 'total', 'created_at'))
+            if not orders:
+                continue
+            ids = [o['id'] for o in orders]
+            items = (OrderItem.objects.filter(order_id__in=ids).order_by('pk')
+                     .values_list('order_id', 'product_id', 'product__name', 'quantity', 'unit_price',
+                                  'product__category_id', 'product__supplier_id'))
+            ArchivedOrder.objects.bulk_create(_archived(orders, items))
+            token = archiving.set(True)
+            try:
+                Order.objects.filter(pk__in=ids).delete()
+            finally:
+                archiving.reset(token)
+        batch += 1
+        archived += len(ids)
+        if progress:
+            progress(batch, len(ids))
+    return archived, batch
@@ -0,0 +1,128 @@
+"""
+Variantes asíncronas (ASGI) de las vistas de lectura del catálogo.
+
+Usan el ORM async (acount, aget, iteración async) y la autenticación async
+(request.auser()), así una petición no ocupa un hilo del pool mientras espera
+a la base de datos. Devuelven el mismo HTML/JSON que sus pares síncronas, con
+el mismo GET condicional (core/conditional.py). Las páginas son TemplateResponse,
+igual que en las vistas síncronas, para que PerformanceMiddleware mida el render.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.cache.utils import make_template_fragment_key
+from django.core.paginator import Paginator, InvalidPage
+from django.http import Http404, JsonResponse
+from django.template.response import TemplateResponse
+from django.views.decorators.cache import cache_control
+
+from . import cache as catalog_cache
+from .conditional import product_condition, product_set_condition, PRIVATE_CACHE
+from .facets import product_facets
+from .filters import product_filters, filter_products
+from .models import Category, Product
+from .pagination import akeyset_page
+from .search import get_search_backend
+from .serializers import ProductFastSerializer
+from .views import ProductListView, ProductPageCache, CachedPageList, api_productos_params, api_productos_queryset, api_next_url
+
+
+async def _resolve_user(request):
+    # El template accede a request.user en forma síncrona: se resuelve antes de renderizar.
+    request.user = await request.auser()
+
+
+async def _taxonomy_context(request, fragments):
+    """
+    Fija la versión de los fragmentos del menú y, solo si alguno no está en
+    caché, carga las categorías con el ORM async antes de devolver la respuesta.
+    `fragments` son pares (nombre del fragmento, valores vary_on además de la versión).
+    """
+    version = await catalog_cache.ataxonomy_generation()
+    keys = [make_template_fragment_key(name, [version, *vary_on]) for name, vary_on in fragments]
+    context = {'taxonomy_version': version}
+    if len(await catalog_cache.fragment_cache().aget_many(keys)) < len(keys):
+        context['menu_categories'] = [c async for c in Category.objects.order_by('name').only('id', 'name')]
+    return context
+
+
+NAVBAR_FRAGMENTS = [('navbar_categories', [])]
+
+
+async def _product_page(request, page_size):
+    """Página del listado con la misma caché que ProductListView (ProductPageCache)."""
+    page_cache = ProductPageCache(request.GET)
+    cached = await page_cache.aget()
+    if cached is None:
+        qs = filter_products(Product.objects.select_related('category', 'supplier'),
+                             product_filters(request.GET)).order_by('-updated_at')
+        count = await qs.acount()
+        number = Paginator(CachedPageList(count, 0, []), page_size).validate_number(page_cache.params['page'])
+        offset = (number - 1) * page_size
+        cached = (count, offset, [p async for p in qs[offset:offset + page_size]])
+        await page_cache.aset(cached)
+    paginator = Paginator(CachedPageList(*cached), page_size)
+    return paginator, paginator.page(cached[1] // page_size + 1)
+
+
+@login_required
+@cache_control(**PRIVATE_CACHE)
+@product_set_condition(['page'])
+async def product_list_async(request):
+    await _resolve_user(request)
+    try:
+        paginator, page = await _product_page(request, ProductListView.paginate_by)
+    except InvalidPage as exc:
+        raise Http404(str(exc))
+    # Conteos cacheados o de ProductFacetCount en el caso común; la agregación con filtros es síncrona
+    facets = await sync_to_async(product_facets)(product_filters(request.GET))
+    taxonomy = await _taxonomy_context(request, NAVBAR_FRAGMENTS)
+    return TemplateResponse(request, ProductListView.template_name, {
+        'facets': facets,
+        'paginator': paginator,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+        'products': page.object_list,
+        'object_list': page.object_list,
+        **taxonomy,
+    })
+
+
+@login_required
+@cache_control(**PRIVATE_CACHE)
+@product_condition()
+async def product_detail_async(request, pk):
+    await _resolve_user(request)
+    try:
+        product = await Product.objects.aget(pk=pk)
+    except Product.DoesNotExist:
+        raise Http404("Producto inexistente.")
+    taxonomy = await _taxonomy_context(request, NAVBAR_FRAGMENTS)
+    return TemplateResponse(request, 'core/product_detail.html', {'product': product, 'object': product, **taxonomy})
+
+
+@login_required
+async def search_async(request):
+    await _resolve_user(request)
+    q = request.GET.get('q', '').strip()
+    products = []
+    if q:
+        products = await get_search_backend().asearch(q, limit=20)
+    taxonomy = await _taxonomy_context(request, NAVBAR_FRAGMENTS)
+    return TemplateResponse(request, 'core/search_results.html', {'products': products, 'query': q, **taxonomy})
+
+
+@login_required
+@cache_control(**PRIVATE_CACHE)
+@product_set_condition(['cursor', 'limit', 'fields'], html=False)
+async def api_productos_async(request):
+    """Mismo contrato y misma salida JSON que api_productos."""
+    json_params = {'separators': (',', ':'), 'ensure_ascii': False}   # igual que JSONRenderer de DRF
+    try:
+        fields, limit = api_productos_params(request.GET)
+        page, next_cursor = await akeyset_page(api_productos_queryset(request.GET, fields),
+                                               request.GET.get('cursor'), limit)
+    except ValueError as exc:
+        return JsonResponse({'detail': str(exc)}, status=400, json_dumps_params=json_params)
+    data = ProductFastSerializer(page, fields=fields).data
+    return JsonResponse({'productos': data, 'next': api_next_url(request, next_cursor)},
+                        json_dumps_params=json_params)
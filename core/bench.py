@@ -0,0 +1,181 @@
+"""
+Utilidades compartidas por los comandos de benchmark (bench_*).
+Los datos se generan dentro de una transacción que se revierte al final,
+así los benchmarks nunca dejan filas en la base de datos real (bench_suite y
+bench_db_profiles, que necesitan datos confirmados, trabajan sobre una copia).
+"""
+import gzip
+import random
+import re
+import sqlite3
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .facets import rebuild_facet_counts
+from .models import Category, Supplier, Product, Customer, Order, OrderItem
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Ejecuta el bloque en una transacción que siempre se revierte."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def seed_products(n, categories=20, suppliers=10, batch_size=5000, start=0):
+    """
+    Crea n productos sintéticos con bulk_create, repartidos en categorías y
+    proveedores, y recalcula los conteos de facetas (bulk_create no corre señales).
+    """
+    cats = Category.objects.bulk_create(
+        [Category(name=f'bench-cat-{start}-{i}') for i in range(categories)])
+    sups = Supplier.objects.bulk_create(
+        [Supplier(name=f'bench-sup-{start}-{i}') for i in range(suppliers)])
+    batch = []
+    for i in range(start, start + n):
+        batch.append(Product(
+            sku=f'BENCH-{i:08d}',
+            name=f'Producto de prueba {i}',
+            description='Descripción generada para benchmark',
+            category=cats[i % categories],
+            supplier=sups[i % suppliers],
+            price=Decimal(i % 1000) + Decimal('0.99'),
+            stock=i % 50,
+        ))
+        if len(batch) >= batch_size:
+            Product.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Product.objects.bulk_create(batch)
+    rebuild_facet_counts()
+    return cats, sups
+
+
+def seed_orders(n, products, customers=100, lines=3, days=90, batch_size=2000, seed=0):
+    """
+    Crea `customers` clientes y n pedidos repartidos en los últimos `days` días,
+    con 1..lines líneas sobre `products` [(pk, precio), ...] (los más vendidos
+    primero: la elección sigue una distribución de Pareto). Estados: 70 % completados,
+    20 % pendientes, 10 % cancelados. Todo con bulk_create: no corren las señales,
+    así que el total se calcula acá y los rollups se reconstruyen aparte.
+    """
+    rng = random.Random(seed)
+    prefix = f'bench-{time.time_ns()}'
+    users = User.objects.bulk_create([User(username=f'{prefix}-{i}', password='!') for i in range(customers)])
+    clients = Customer.objects.bulk_create([Customer(user=user) for user in users])
+    now = timezone.now()
+    per_day = -(-n // days)
+    created = 0
+    for day in range(days):
+        count = min(per_day, n - created)
+        if count <= 0:
+            break
+        # auto_now_add pisa created_at en bulk_create: se fija con un UPDATE por día
+        moment = now - timedelta(days=day, minutes=rng.randrange(24 * 60))
+        for start in range(0, count, batch_size):
+            orders, items = [], []
+            for _ in range(min(batch_size, count - start)):
+                lines_ = []
+                for _ in range(rng.randint(1, lines)):
+                    pk, price = products[min(int(rng.paretovariate(1.2)) - 1, len(products) - 1)]
+                    lines_.append(OrderItem(product_id=pk, quantity=rng.randint(1, 3), unit_price=price))
+                status = rng.choices('CPX', weights=(70, 20, 10))[0]
+                orders.append(Order(customer=rng.choice(clients), status=status,
+                                    total=sum(item.line_total() for item in lines_)))
+                items.append(lines_)
+            Order.objects.bulk_create(orders)
+            Order.objects.filter(pk__in=[o.pk for o in orders]).update(created_at=moment)
+            for order, lines_ in zip(orders, items):
+                for item in lines_:
+                    item.order_id = order.pk
+            OrderItem.objects.bulk_create([item for lines_ in items for item in lines_], batch_size=batch_size)
+        created += count
+    return clients
+
+
+def copy_database(source, target):
+    """Copia consistente de un archivo SQLite (API de backup) en modo rollback journal."""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+        dst.execute('PRAGMA journal_mode = DELETE')   # la copia arranca igual para cualquier perfil
+    finally:
+        src.close()
+        dst.close()
+
+
+def percentiles(samples, points=(0.50, 0.95, 0.99)):
+    """Percentiles en milisegundos de una lista de duraciones en segundos (None si está vacía)."""
+    ordered = sorted(samples)
+    return [ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000 if ordered else None for p in points]
+
+
+def page_transfer(client, url, browser_cache):
+    """
+    Simula la carga de `url` en un navegador con el test client: el HTML y los
+    archivos estáticos que referencia. browser_cache (dict ruta -> respuesta
+    guardada) hace de caché HTTP entre cargas: lo marcado immutable no se vuelve
+    a pedir y el resto se revalida con If-None-Match / If-Modified-Since.
+    Devuelve {'requests': peticiones hechas, 'bytes': bytes de cuerpo recibidos}.
+    """
+    stats = {'requests': 0, 'bytes': 0}
+
+    def fetch(path):
+        cached = browser_cache.get(path)
+        if cached and 'immutable' in cached['cache_control']:
+            return cached['body']
+        headers = {'HTTP_ACCEPT_ENCODING': 'br, gzip'}
+        if cached and cached['etag']:
+            headers['HTTP_IF_NONE_MATCH'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['HTTP_IF_MODIFIED_SINCE'] = cached['last_modified']
+        response = client.get(path, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        stats['requests'] += 1
+        stats['bytes'] += len(body)
+        if response.status_code == 304:
+            return cached['body']
+        if response.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        browser_cache[path] = {'etag': response.get('ETag'), 'last_modified': response.get('Last-Modified'),
+                               'cache_control': response.get('Cache-Control', ''), 'body': body}
+        return body
+
+    html = fetch(url).decode('utf-8')
+    static = re.escape(settings.STATIC_URL)
+    for asset in dict.fromkeys(re.findall(rf"""(?:href|src)=["']({static}[^"']+)["']""", html)):
+        fetch(asset)
+    return stats
+
+
+def measure(fn):
+    """Ejecuta fn() y devuelve (resultado, segundos, pico de memoria Python en bytes)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def parse_sizes(value):
+    return [int(v) for v in value.split(',') if v.strip()]
@@ -0,0 +1,134 @@
+"""
+Ediciones masivas de productos y pedidos (acciones del admin y /api/productos/masivo/).
+
+La selección se recorre por bloques de ids (keyset sobre pk, sin cargar todo
+en memoria) y cada bloque se escribe con un único UPDATE con expresiones F()
+en su propia transacción, así las demás escrituras no esperan a que termine
+la edición completa. updated_at se fija a mano: auto_now no corre en
+QuerySet.update(). Cada bloque deja una fila en BulkEditLog, no una por producto.
+
+Los UPDATE no disparan señales: la caché del catálogo se invalida al final,
+los conteos de facetas se recalculan si cambió algo más que el stock y el
+índice de búsqueda no cambia (no se tocan nombre, descripción ni SKU). En
+los pedidos, los rollups de ventas se ajustan en el mismo bloque.
+"""
+import uuid
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Now, Round
+from django.db.models.lookups import LessThan, LessThanOrEqual
+
+from .cache import bump_catalog_generation
+from .facets import rebuild_facet_counts
+from .models import BulkEditLog, Order, Product
+from .reports import COMPLETED, order_sales, record_sales
+from .stock import CANCELED, release_order_stock
+
+BULK_CHUNK = 1000
+
+# Operación -> descripción para el admin y los mensajes
+PRODUCT_OPERATIONS = {
+    'price_percent': "Cambiar el precio en un porcentaje",
+    'price_amount': "Sumar o restar un monto al precio",
+    'category': "Cambiar la categoría",
+    'supplier': "Cambiar el proveedor",
+    'stock': "Sumar o restar stock",
+}
+
+
+def _product_changes(operation, value):
+    """
+    (campos del UPDATE, condición de las filas que quedarían inválidas o None).
+    value: porcentaje o monto (Decimal), unidades (int) o id de categoría/proveedor.
+    """
+    if operation == 'price_percent':
+        price = Round(F('price') * Value(1 + Decimal(value) / 100), 2)
+        return {'price': price}, LessThanOrEqual(price, 0)
+    if operation == 'price_amount':
+        price = F('price') + Value(Decimal(value))
+        return {'price': price}, LessThanOrEqual(price, 0)
+    if operation == 'stock':
+        stock = F('stock') + Value(int(value))
+        return {'stock': stock}, LessThan(stock, 0)
+    if operation in ('category', 'supplier'):
+        return {f'{operation}_id': value}, None
+    raise ValueError(f"Operación inválida: {operation}. Opciones: {', '.join(PRODUCT_OPERATIONS)}.")
+
+
+def pk_chunks(queryset, size):
+    """Itera listas de hasta `size` pks del queryset, en orden de pk."""
+    last = None
+    while True:
+        page = queryset.order_by('pk')
+        if last is not None:
+            page = page.filter(pk__gt=last)
+        ids = list(page.values_list('pk', flat=True)[:size])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def _log(run, user, target, operation, params, batch, ids, count):
+    BulkEditLog.objects.create(run=run, user=user, target=target, operation=operation, params=params,
+                               batch=batch, count=count, first_id=ids[0], last_id=ids[-1])
+
+
+def update_products(queryset, operation, value, user=None, chunk_size=BULK_CHUNK):
+    """
+    Aplica la operación a los productos del queryset. Devuelve (productos cambiados, lotes).
+    ValueError si la operación no existe o dejaría precios <= 0 o stock negativo
+    (se verifica antes de escribir: en ese caso no se cambia nada).
+    """
+    changes, invalid = _product_changes(operation, value)
+    if invalid is not None:
+        count = queryset.filter(invalid).count()
+        if count:
+            field = 'precio' if 'price' in changes else 'stock'
+            raise ValueError(f"La operación dejaría {count} productos con {field} inválido.")
+    changes['updated_at'] = Now()
+    params = {'value': str(value)}
+    run, updated, batch = uuid.uuid4().hex, 0, 0
+    for batch, ids in enumerate(pk_chunks(queryset, chunk_size), 1):
+        with transaction.atomic():
+            rows = Product.objects.filter(pk__in=ids)
+            if invalid is not None:
+                rows = rows.exclude(invalid)   # por si otra escritura cambió la fila desde la verificación
+            count = rows.update(**changes)
+            _log(run, user, 'product', operation, params, batch, ids, count)
+        updated += count
+    if updated:
+        if operation != 'stock':
+            rebuild_facet_counts()   # cambian categorías, proveedores o rangos de precio
+        transaction.on_commit(bump_catalog_generation)
+    return updated, batch
+
+
+def update_order_status(queryset, status, user=None, chunk_size=BULK_CHUNK):
+    """
+    Cambia el estado de los pedidos del queryset que aún no lo tienen y ajusta
+    DailySalesRollup en la misma transacción de cada lote: suma las ventas de
+    los que pasan a completados y resta las de los que dejan de estarlo. Al
+    cancelar devuelve el stock que reservó place_order.
+    Devuelve (pedidos cambiados, lotes).
+    """
+    run, updated, batch = uuid.uuid4().hex, 0, 0
+    for batch, ids in enumerate(pk_chunks(queryset.exclude(status=status), chunk_size), 1):
+        with transaction.atomic():
+            # Se relee con lock: el estado pudo cambiar desde que se armó el bloque
+            ids = list(Order.objects.filter(pk__in=ids).exclude(status=status)
+                       .select_for_update().values_list('pk', flat=True))
+            if not ids:
+                continue
+            if status != COMPLETED:
+                record_sales(order_sales(ids, completed_only=True), sign=-1)
+            Order.objects.filter(pk__in=ids).update(status=status)
+            if status == COMPLETED:
+                record_sales(order_sales(ids))
+            elif status == CANCELED:
+                release_order_stock(ids)
+            _log(run, user, 'order', 'status', {'status': status}, batch, ids, len(ids))
+        updated += len(ids)
+    return updated, batch
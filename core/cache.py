@@ -0,0 +1,143 @@
+"""
+Caché de páginas del catálogo con invalidación por generación.
+
+Cada clave incluye la "generación" actual del catálogo; cualquier escritura en
+Product, Category o Supplier (ver core/signals.py) incrementa la generación y
+deja huérfanas todas las entradas anteriores, que expiran solas por timeout.
+
+Los fragmentos de template que solo dependen de categorías y proveedores
+(menú y filtros del listado) usan una generación aparte, la de la
+"taxonomía", que no cambia al editar productos. Vive en la misma caché que los
+fragmentos: si esa caché se vacía, se pierden juntos.
+
+El stock que descuentan y devuelven los pedidos (core/stock.py) tiene su propia
+generación: cambia las páginas cacheadas del listado y los validadores de
+core/conditional.py, no el resto del catálogo.
+
+Las variantes con prefijo "a" usan la API async de la caché, para las vistas
+de core/async_views.py que corren en el event loop.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+GENERATION_KEY = 'catalog:generation'
+TAXONOMY_GENERATION_KEY = 'catalog:taxonomy-generation'
+STOCK_GENERATION_KEY = 'catalog:stock-generation'
+
+
+def get_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def fragment_cache():
+    """La caché que usa {% cache %}: 'template_fragments' si está configurada."""
+    return caches['template_fragments' if 'template_fragments' in settings.CACHES else 'default']
+
+
+def cache_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+class CacheStats:
+    """Contadores de aciertos/fallos por proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+stats = CacheStats()
+
+
+def _generation(key, cache):
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, 1, timeout=None)
+        generation = cache.get(key, 1)
+    return generation
+
+
+async def _ageneration(key, cache):
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, 1, timeout=None)
+        generation = await cache.aget(key, 1)
+    return generation
+
+
+def _bump_generation(key, cache):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # La clave no existe (caché vacía o reiniciada): arrancar una generación nueva
+        cache.set(key, 2, timeout=None)
+        return 2
+
+
+def catalog_generation():
+    return _generation(GENERATION_KEY, get_cache())
+
+
+async def acatalog_generation():
+    return await _ageneration(GENERATION_KEY, get_cache())
+
+
+def bump_catalog_generation():
+    return _bump_generation(GENERATION_KEY, get_cache())
+
+
+def taxonomy_generation():
+    return _generation(TAXONOMY_GENERATION_KEY, fragment_cache())
+
+
+async def ataxonomy_generation():
+    return await _ageneration(TAXONOMY_GENERATION_KEY, fragment_cache())
+
+
+def bump_taxonomy_generation():
+    return _bump_generation(TAXONOMY_GENERATION_KEY, fragment_cache())
+
+
+def stock_generation():
+    return _generation(STOCK_GENERATION_KEY, get_cache())
+
+
+async def astock_generation():
+    return await _ageneration(STOCK_GENERATION_KEY, get_cache())
+
+
+def bump_stock_generation():
+    return _bump_generation(STOCK_GENERATION_KEY, get_cache())
+
+
+def fingerprint(params):
+    """Huella estable de un conjunto de parámetros ya normalizados."""
+    raw = '&'.join(f'{k}={params[k]}' for k in sorted(params))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def catalog_key(namespace, params):
+    return f'catalog:{catalog_generation()}:{namespace}:{fingerprint(params)}'
+
+
+async def acatalog_key(namespace, params):
+    return f'catalog:{await acatalog_generation()}:{namespace}:{fingerprint(params)}'
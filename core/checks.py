@@ -0,0 +1,63 @@
+"""
+Checks de sistema de los archivos estáticos.
+
+Con STATIC_PROFILE=production solo los nombres que salen de {% static %}
+llevan el hash del contenido y se sirven con caché inmutable; una ruta
+escrita a mano se sigue pidiendo y revalidando en cada carga de página.
+
+- core.E001: un template del proyecto referencia STATIC_URL a mano en vez de usar {% static %}.
+- core.E002 (solo `check --deploy` con storage de manifiesto): un {% static 'x' %}
+  no está en el manifiesto de collectstatic; la página fallaría al renderizarse.
+"""
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestFilesMixin
+from django.core.checks import Error, Tags, register
+from django.core.files.storage import storages
+
+STATIC_TAG = re.compile(r"""\{%\s*static\s+["']([^"']+)["']""")
+
+
+def project_templates():
+    """Templates de TEMPLATES['DIRS'] y de las apps del proyecto (no los de Django ni paquetes instalados)."""
+    dirs = [Path(d) for engine in settings.TEMPLATES for d in engine.get('DIRS', [])]
+    dirs += [Path(app.path) / 'templates' for app in apps.get_app_configs()
+             if Path(app.path).is_relative_to(settings.BASE_DIR)]
+    for directory in dirs:
+        if directory.is_dir():
+            yield from sorted(p for p in directory.rglob('*.html') if p.is_file())
+
+
+@register(Tags.templates)
+def check_static_references(app_configs, **kwargs):
+    hardcoded = re.compile(r"""(?:href|src)\s*=\s*["'](?:\{\{\s*STATIC_URL\s*\}\}|%s)""" % re.escape(settings.STATIC_URL))
+    errors = []
+    for path in project_templates():
+        for number, line in enumerate(path.read_text(encoding='utf-8').splitlines(), 1):
+            if hardcoded.search(line):
+                errors.append(Error(
+                    f"Línea {number}: referencia un archivo estático sin {{% static %}}.",
+                    hint="Usá {% static 'ruta' %}: solo así el nombre lleva el hash del manifiesto.",
+                    obj=str(path), id='core.E001'))
+    return errors
+
+
+@register(Tags.staticfiles, deploy=True)
+def check_static_manifest(app_configs, **kwargs):
+    storage = storages['staticfiles']
+    if not isinstance(storage, ManifestFilesMixin):
+        return []
+    errors = []
+    for path in project_templates():
+        for name in STATIC_TAG.findall(path.read_text(encoding='utf-8')):
+            try:
+                storage.stored_name(name)
+            except ValueError:
+                errors.append(Error(
+                    f"{{% static '{name}' %}} no está en el manifiesto de archivos estáticos.",
+                    hint="Corré collectstatic con STATIC_PROFILE=production (o revisá que el archivo exista).",
+                    obj=str(path), id='core.E002'))
+    return errors
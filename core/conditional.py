@@ -0,0 +1,120 @@
+"""
+GET condicional (ETag / Last-Modified) para las vistas de productos.
+
+Los validadores salen de una sola consulta indexada sobre Product.updated_at:
+el producto pedido en el detalle, o MAX(updated_at) + COUNT(*) del conjunto
+filtrado en el listado y la API (el conteo cubre las bajas, que no mueven el
+máximo; el resultado se guarda en la caché del catálogo por huella de filtros).
+Se calculan antes que la vista, así que un 304 no construye el queryset de la
+página ni el serializador.
+
+updated_at es un marcador de cambios exacto porque también se actualiza en
+los UPDATE masivos (ediciones, importación) y cuando se renombra o borra la
+categoría o el proveedor del producto (ver core/signals.py). La excepción es
+el stock que descuentan los pedidos: el ETag del detalle lo incluye aparte y
+el del listado y la API suma SUM(stock) del conjunto (ver core/stock.py). El ETag del
+listado HTML suma la huella de los conteos de facetas (core/facets.py).
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.contrib import messages
+from django.db.models import Count, Max, Sum
+from django.views.decorators.http import condition
+
+from . import cache as catalog_cache
+from .cache import taxonomy_generation
+from .facets import facet_counts, facets_digest
+from .filters import product_filters, filter_products
+from .models import Product
+
+# Cache-Control de todas las vistas de productos (ver patch_cache_control): piden
+# login, así que solo el navegador guarda la respuesta y la revalida cada vez.
+PRIVATE_CACHE = {'private': True, 'no_cache': True}
+
+
+def _etag(parts, weak=False):
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def _viewer(request):
+    # Partes del HTML que no dependen del producto: usuario, permisos y menú de categorías
+    return (request.user.pk, request.user.is_staff, taxonomy_generation())
+
+
+def _memoized(request, compute):
+    # condition() pide etag y last_modified por separado: una sola consulta por petición
+    if not hasattr(request, '_product_validators'):
+        request._product_validators = compute()
+    return request._product_validators
+
+
+def _product_validators(request, pk, html):
+    def compute():
+        if html and len(messages.get_messages(request)):
+            return None, None   # hay mensajes pendientes: siempre se renderiza la página
+        row = Product.objects.filter(pk=pk).values_list('updated_at', 'stock').first()
+        if row is None:
+            return None, None   # la vista responde 404
+        updated_at, stock = row
+        # Los pedidos cambian el stock sin tocar updated_at (ver core/stock.py)
+        parts = ('product', pk, updated_at.isoformat(), stock) + (_viewer(request) if html else ())
+        return _etag(parts, weak=html), updated_at
+    return _memoized(request, compute)
+
+
+def _product_set_validators(request, page_params, html):
+    def compute():
+        if html and len(messages.get_messages(request)):
+            return None, None
+        filters = product_filters(request.GET)
+        # Mismo ciclo de vida que las páginas cacheadas: cualquier escritura cambia la
+        # generación del catálogo y los pedidos la de stock
+        cache = catalog_cache.get_cache()
+        key = catalog_cache.catalog_key('validators', dict(filters, stock=catalog_cache.stock_generation()))
+        stats = cache.get(key)
+        if stats is None:
+            stats = (filter_products(Product.objects.all(), filters)
+                     .aggregate(last=Max('updated_at'), count=Count('id'), stock=Sum('stock')))
+            cache.set(key, stats, catalog_cache.cache_timeout())
+        last = stats['last']
+        page = [(k, request.GET.get(k, '')) for k in page_params]
+        parts = ('products', last.isoformat() if last else '-', stats['count'], stats['stock'],
+                 sorted(filters.items()), page) + (_viewer(request) if html else ())
+        if html:
+            # Los conteos de cada faceta también dependen de productos fuera del conjunto filtrado
+            parts += (facets_digest(facet_counts(filters)),)
+        # Last-Modified solo refleja altas/ediciones; el ETag (que tiene prioridad) cubre las bajas
+        return _etag(parts, weak=html), last
+    return _memoized(request, compute)
+
+
+def _conditional(validators):
+    """condition() para vistas síncronas o async; validators(request, ...) devuelve (etag, last_modified)."""
+    def decorator(view):
+        conditional = condition(etag_func=lambda request, *a, **kw: validators(request, *a, **kw)[0],
+                                last_modified_func=lambda request, *a, **kw: validators(request, *a, **kw)[1])(view)
+        if not iscoroutinefunction(view):
+            return conditional
+
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            # Los validadores consultan la base: se calculan (y memorizan) en el hilo
+            # del ORM antes de que condition() los pida dentro del event loop
+            await sync_to_async(validators)(request, *args, **kwargs)
+            return await conditional(request, *args, **kwargs)
+        return inner
+    return decorator
+
+
+def product_condition(html=True):
+    """condition() para vistas de un producto; el pk llega como argumento de URL."""
+    return _conditional(lambda request, pk, **kw: _product_validators(request, pk, html))
+
+
+def product_set_condition(page_params, html=True):
+    """condition() para listados de productos filtrados; page_params son los parámetros de paginación."""
+    return _conditional(lambda request, *a, **kw: _product_set_validators(request, page_params, html))
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .cache import taxonomy_generation
+from .models import Category
+
+
+def catalog_fragments(request):
+    """
+    Variables para los fragmentos cacheados ({% cache %}) del catálogo. Todo es
+    perezoso: la consulta de categorías del menú solo se ejecuta cuando el
+    fragmento no está en caché.
+    """
+    return {
+        'fragment_timeout': getattr(settings, 'TEMPLATE_FRAGMENT_TIMEOUT', 600),
+        'taxonomy_version': SimpleLazyObject(taxonomy_generation),
+        'menu_categories': Category.objects.order_by('name').only('id', 'name'),
+    }
@@ -0,0 +1,28 @@
+"""
+Ajustes por conexión de la base de datos según DB_PROFILE (ver settings).
+
+Los PRAGMA de SQLite valen por conexión (salvo journal_mode=WAL, que queda
+guardado en el archivo), así que se aplican en cada connection_created.
+Se ejecutan sobre la conexión sqlite3 cruda: no pasan por el log de
+consultas ni cuentan en los tests de cantidad de consultas.
+"""
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Receptor de connection_created: aplica settings.SQLITE_PRAGMAS a las conexiones SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        # Los PRAGMA no aceptan parámetros; nombres y valores vienen de settings
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def sqlite_pragmas(connection, names):
+    """Valores actuales de los PRAGMA dados en la conexión: {nombre: valor}."""
+    values = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+    return values
@@ -0,0 +1,223 @@
+"""
+Facetas del listado de productos: cuántos productos hay por categoría,
+proveedor y rango de precio para los filtros actuales.
+
+Cada faceta se cuenta con los demás filtros aplicados pero no con el propio
+(con category=3 se siguen viendo los conteos de las otras categorías), y todo
+sale de una sola consulta con agregación condicional:
+
+    SELECT COUNT(id) FILTER (WHERE category_id = 1 AND supplier_id = 2),
+           COUNT(id) FILTER (WHERE supplier_id = 1 AND category_id = 3), ...
+      FROM core_product
+     WHERE <búsqueda q>
+
+El resultado se guarda en la caché del catálogo por huella de filtros. Sin
+filtros (la portada del listado) no se agrega nada: los conteos base viven en
+ProductFacetCount y las señales de Product los mantienen por diferencias. Las
+escrituras masivas (importación, ediciones masivas) los recalculan con
+rebuild_facet_counts().
+"""
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+
+from . import cache as catalog_cache
+from .cache import taxonomy_generation
+from .models import Category, Product, ProductFacetCount, Supplier
+from .search import get_search_backend
+
+# Rangos de precio inclusivos, con los mismos límites que los filtros pmin / pmax
+PRICE_BUCKETS = (
+    (None, Decimal('9.99')),
+    (Decimal('10'), Decimal('49.99')),
+    (Decimal('50'), Decimal('99.99')),
+    (Decimal('100'), Decimal('499.99')),
+    (Decimal('500'), None),
+)
+
+
+def price_bucket(price):
+    price = Decimal(str(price))
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        if (low is None or price >= low) and (high is None or price <= high):
+            return index
+    return len(PRICE_BUCKETS) - 1
+
+
+def _bucket_q(index):
+    low, high = PRICE_BUCKETS[index]
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lte=high)
+    return q
+
+
+def _bucket_label(low, high):
+    if low is None:
+        return f"Hasta {high}"
+    if high is None:
+        return f"{low} o más"
+    return f"{low} – {high}"
+
+
+# ---------------------------------------------------------------------
+# Conteos base (sin filtros)
+# ---------------------------------------------------------------------
+def facet_values(category_id, supplier_id, price):
+    """Claves de ProductFacetCount a las que aporta un producto."""
+    return (('category', category_id or 0), ('supplier', supplier_id or 0), ('price', price_bucket(price)))
+
+
+def _add(facet, value, delta):
+    row = ProductFacetCount.objects.filter(facet=facet, value=value)
+    if row.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            ProductFacetCount.objects.create(facet=facet, value=value, count=delta)
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT
+        row.update(count=F('count') + delta)
+
+
+def update_facet_counts(before, after):
+    """Mueve un producto entre claves: before / after son tuplas de facet_values() o None."""
+    before, after = set(before or ()), set(after or ())
+    for facet, value in before - after:
+        _add(facet, value, -1)
+    for facet, value in after - before:
+        _add(facet, value, 1)
+
+
+def move_facet_count(facet, value, to_value=0):
+    """Pasa el conteo de una clave a otra (p. ej. al borrar una categoría sus productos quedan sin categoría)."""
+    count = ProductFacetCount.objects.filter(facet=facet, value=value).values_list('count', flat=True).first()
+    if count:
+        _add(facet, to_value, count)
+    ProductFacetCount.objects.filter(facet=facet, value=value).delete()
+
+
+def _price_bucket_expression():
+    return Case(*[When(_bucket_q(i), then=Value(i)) for i in range(len(PRICE_BUCKETS))],
+                default=Value(len(PRICE_BUCKETS) - 1), output_field=IntegerField())
+
+
+def rebuild_facet_counts():
+    """Recalcula ProductFacetCount desde Product (tres GROUP BY). Devuelve la cantidad de filas."""
+    groups = (
+        ('category', Product.objects.values(key=F('category'))),
+        ('supplier', Product.objects.values(key=F('supplier'))),
+        ('price', Product.objects.values(key=_price_bucket_expression())),
+    )
+    rows = [ProductFacetCount(facet=facet, value=r['key'] or 0, count=r['n'])
+            for facet, qs in groups for r in qs.annotate(n=Count('id')).order_by()]
+    with transaction.atomic():
+        ProductFacetCount.objects.all().delete()
+        ProductFacetCount.objects.bulk_create(rows)
+    catalog_cache.bump_catalog_generation()
+    return len(rows)
+
+
+def base_counts():
+    counts = {'category': {}, 'supplier': {}, 'price': {}}
+    for facet, value, count in ProductFacetCount.objects.values_list('facet', 'value', 'count'):
+        counts[facet][value] = count
+    return counts
+
+
+# ---------------------------------------------------------------------
+# Conteos con filtros
+# ---------------------------------------------------------------------
+def taxonomy():
+    """[(pk, nombre)] de categorías y proveedores, cacheados con la generación de la taxonomía."""
+    cache = catalog_cache.fragment_cache()
+    key = f'facets:taxonomy:{taxonomy_generation()}'
+    cached = cache.get(key)
+    if cached is None:
+        cached = (list(Category.objects.order_by('name').values_list('pk', 'name')),
+                  list(Supplier.objects.order_by('name').values_list('pk', 'name')))
+        cache.set(key, cached, None)
+    return cached
+
+
+def _and(*conditions):
+    combined = Q()
+    for condition in conditions:
+        combined &= condition
+    return combined or None
+
+
+def filtered_counts(filters, categories, suppliers):
+    """Conteos de todas las facetas para los filtros dados, en una sola consulta."""
+    by_facet = {
+        'category': Q(category_id=filters['category']) if 'category' in filters else Q(),
+        'supplier': Q(supplier_id=filters['supplier']) if 'supplier' in filters else Q(),
+        'price': _and(Q(price__gte=filters['pmin']) if 'pmin' in filters else Q(),
+                      Q(price__lte=filters['pmax']) if 'pmax' in filters else Q()) or Q(),
+    }
+
+    def others(facet):
+        return [q for name, q in by_facet.items() if name != facet]
+
+    aggregates = {}
+    for pk in categories:
+        aggregates[f'category_{pk}'] = Count('id', filter=_and(Q(category_id=pk), *others('category')))
+    for pk in suppliers:
+        aggregates[f'supplier_{pk}'] = Count('id', filter=_and(Q(supplier_id=pk), *others('supplier')))
+    for index in range(len(PRICE_BUCKETS)):
+        aggregates[f'price_{index}'] = Count('id', filter=_and(_bucket_q(index), *others('price')))
+    qs = Product.objects.all()
+    if 'q' in filters:
+        qs = get_search_backend().filter(qs, filters['q'])
+    counts = {'category': {}, 'supplier': {}, 'price': {}}
+    for name, count in qs.aggregate(**aggregates).items():
+        facet, _, value = name.partition('_')
+        counts[facet][int(value)] = count
+    return counts
+
+
+def facet_counts(filters):
+    """{'category': {pk: n}, 'supplier': {pk: n}, 'price': {índice: n}} para filtros de product_filters()."""
+    cache = catalog_cache.get_cache()
+    key = catalog_cache.catalog_key('facets', filters)
+    counts = cache.get(key)
+    if counts is None:
+        if filters:
+            categories, suppliers = taxonomy()
+            counts = filtered_counts(filters, [pk for pk, _ in categories], [pk for pk, _ in suppliers])
+        else:
+            counts = base_counts()
+        cache.set(key, counts, catalog_cache.cache_timeout())
+    return counts
+
+
+def product_facets(filters):
+    """Facetas listas para el template del listado, con la opción elegida marcada."""
+    counts = facet_counts(filters)
+    categories, suppliers = taxonomy()
+    selected = {k: str(v) for k, v in filters.items()}
+    others = {k: v for k, v in selected.items() if k not in ('pmin', 'pmax')}
+    prices = []
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        chosen = (filters.get('pmin'), filters.get('pmax')) == (low, high)
+        # El enlace del rango elegido lo quita; los demás conservan el resto de los filtros
+        params = others if chosen else dict(others, **{k: v for k, v in (('pmin', low), ('pmax', high)) if v is not None})
+        prices.append({'label': _bucket_label(low, high), 'count': counts['price'].get(index, 0),
+                       'selected': chosen, 'query': urlencode(params)})
+    return {
+        'categories': [{'pk': pk, 'name': name, 'count': counts['category'].get(pk, 0),
+                        'selected': selected.get('category') == str(pk)} for pk, name in categories],
+        'suppliers': [{'pk': pk, 'name': name, 'count': counts['supplier'].get(pk, 0),
+                       'selected': selected.get('supplier') == str(pk)} for pk, name in suppliers],
+        'prices': prices,
+        'digest': facets_digest(counts),
+    }
+
+
+def facets_digest(counts):
+    """Huella de los conteos (para ETags y claves de fragmentos): igual en todos los procesos."""
+    return catalog_cache.fingerprint({f'{facet}:{k}': v for facet, values in counts.items() for k, v in values.items()})
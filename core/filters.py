@@ -0,0 +1,45 @@
+from decimal import Decimal, InvalidOperation
+
+from .search import get_search_backend
+
+# Parámetros de filtrado que entiende el listado de productos
+PRODUCT_FILTER_PARAMS = ('q', 'category', 'supplier', 'pmin', 'pmax')
+
+
+def product_filters(params):
+    """
+    Extrae y normaliza los filtros de producto desde request.GET (o cualquier dict).
+    Los valores vacíos o inválidos se descartan, igual que en ProductListView.
+    """
+    filters = {}
+    for key in PRODUCT_FILTER_PARAMS:
+        value = (params.get(key) or '').strip()
+        if not value:
+            continue
+        # isdigit() también acepta dígitos Unicode como '²' o '٣' ('²' ni siquiera pasa por int())
+        if key in ('category', 'supplier') and not (value.isascii() and value.isdigit()):
+            continue
+        if key in ('pmin', 'pmax'):
+            try:
+                value = Decimal(value)
+            except (InvalidOperation, ValueError):
+                continue
+            if not value.is_finite():
+                continue
+        filters[key] = value
+    return filters
+
+
+def filter_products(qs, filters):
+    """Aplica al queryset los filtros normalizados por product_filters()."""
+    if 'q' in filters:
+        qs = get_search_backend().filter(qs, filters['q'])
+    if 'category' in filters:
+        qs = qs.filter(category_id=filters['category'])
+    if 'supplier' in filters:
+        qs = qs.filter(supplier_id=filters['supplier'])
+    if 'pmin' in filters:
+        qs = qs.filter(price__gte=filters['pmin'])
+    if 'pmax' in filters:
+        qs = qs.filter(price__lte=filters['pmax'])
+    return qs
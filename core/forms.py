@@ -1,17 +1,21 @@
 from django import forms
-from .models import Product, Order
+from .models import Product, Order, Category, Supplier
+from .bulk import PRODUCT_OPERATIONS
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
+def validate_price(p):
+    # Regla compartida por ProductForm y la importación masiva (core/importer.py)
+    if p <= 0:
+        raise forms.ValidationError("El precio debe ser mayor que 0.")
+    return p
+
 class ProductForm(forms.ModelForm):
     class Meta:
         model = Product
         fields = ['sku','name','description','category','supplier','price','stock']
     def clean_price(self):
-        p = self.cleaned_data.get('price')
-        if p <= 0:
-            raise forms.ValidationError("El precio debe ser mayor que 0.")
-        return p
+        return validate_price(self.cleaned_data.get('price'))
 
 class OrderForm(forms.ModelForm):
     class Meta:
@@ -23,3 +27,40 @@ class RegisterForm(UserCreationForm):
     class Meta:
         model = User
         fields = ("username","email","first_name","last_name","password1","password2")
+
+class ProductImportForm(forms.Form):
+    FORMAT_CHOICES = (('csv', 'CSV'), ('jsonl', 'JSON Lines'))
+    file = forms.FileField(label="Archivo")
+    format = forms.ChoiceField(label="Formato", choices=FORMAT_CHOICES, initial='csv')
+    batch_size = forms.IntegerField(label="Tamaño de lote", min_value=1, max_value=10000, initial=1000)
+
+class BulkProductEditForm(forms.Form):
+    """Parámetros de una edición masiva de productos (acción del admin y API)."""
+    operation = forms.ChoiceField(label="Operación", choices=list(PRODUCT_OPERATIONS.items()))
+    value = forms.DecimalField(label="Valor", required=False, max_digits=12, decimal_places=2,
+                               help_text="Porcentaje, monto o unidades (negativo para bajar).")
+    category = forms.ModelChoiceField(label="Categoría", queryset=Category.objects.all(), required=False)
+    supplier = forms.ModelChoiceField(label="Proveedor", queryset=Supplier.objects.all(), required=False)
+
+    def clean(self):
+        data = super().clean()
+        operation, value = data.get('operation'), data.get('value')
+        if operation in ('category', 'supplier'):
+            if not data.get(operation):
+                self.add_error(operation, "Elegí a qué asignar los productos.")
+        elif operation:
+            if value is None:
+                self.add_error('value', "Indicá el valor de la operación.")
+            elif operation == 'price_percent' and value <= -100:
+                self.add_error('value', "El porcentaje debe ser mayor que -100.")
+            elif operation == 'stock' and value != value.to_integral_value():
+                self.add_error('value', "El stock se ajusta en unidades enteras.")
+        return data
+
+    def operation_args(self):
+        """(operación, valor) listos para core.bulk.update_products."""
+        operation = self.cleaned_data['operation']
+        if operation in ('category', 'supplier'):
+            return operation, self.cleaned_data[operation].pk
+        value = self.cleaned_data['value']
+        return operation, int(value) if operation == 'stock' else value
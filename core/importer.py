@@ -0,0 +1,153 @@
+"""
+Importación masiva de productos desde CSV o JSON Lines.
+
+El archivo se lee en streaming, cada fila se valida con los mismos campos y
+reglas que ProductForm, y los productos se escriben por lotes con
+bulk_create(update_conflicts=True) usando el SKU como clave (upsert).
+Las categorías y proveedores se resuelven por nombre con una caché en memoria.
+"""
+import csv
+import io
+import json
+
+from django import forms
+from django.db import transaction
+
+from .cache import bump_catalog_generation
+from .facets import rebuild_facet_counts
+from .forms import ProductForm, validate_price
+from .models import Category, Supplier, Product
+from .search import get_search_backend
+
+UPDATE_FIELDS = ['name', 'description', 'category', 'supplier', 'price', 'stock', 'updated_at']
+
+
+def iter_csv(stream):
+    for line, row in enumerate(csv.DictReader(stream), start=2):
+        yield line, row
+
+
+def iter_jsonl(stream):
+    for line, raw in enumerate(stream, start=1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            row = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            yield line, exc
+            continue
+        yield line, row if isinstance(row, dict) else ValueError("La línea no es un objeto JSON.")
+
+
+READERS = {'csv': iter_csv, 'jsonl': iter_jsonl}
+
+
+class NameCache:
+    """Resuelve nombres a ids, creando los que faltan una sola vez por importación."""
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = {}
+        for pk, name in model.objects.order_by('-pk').values_list('pk', 'name'):
+            self.ids[name.strip().lower()] = pk
+
+    def resolve(self, name):
+        name = (name or '').strip()
+        if not name:
+            return None
+        key = name.lower()
+        if key not in self.ids:
+            self.ids[key] = self.model.objects.create(name=name).pk
+        return self.ids[key]
+
+
+class ImportReport:
+    def __init__(self):
+        self.batches = []   # (número de lote, filas escritas)
+        self.errors = []    # (línea, mensaje)
+        self.rows = 0
+
+    @property
+    def written(self):
+        return sum(count for _, count in self.batches)
+
+    def __str__(self):
+        return f"{self.rows} filas leídas, {self.written} productos escritos, {len(self.errors)} errores"
+
+
+class ProductImporter:
+    fields = ProductForm.base_fields
+
+    def __init__(self, batch_size=1000, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.categories = NameCache(Category)
+        self.suppliers = NameCache(Supplier)
+        self.report = ImportReport()
+
+    def clean_row(self, row):
+        """Convierte una fila en Product o lanza ValidationError con los errores de campo."""
+        data, errors = {}, []
+        for name in ('sku', 'name', 'description', 'price', 'stock'):
+            value = row.get(name)
+            value = '' if value is None else str(value).strip()
+            try:
+                data[name] = self.fields[name].clean(value)
+                if name == 'price':
+                    validate_price(data[name])
+            except forms.ValidationError as exc:
+                errors.append(f"{name}: {' '.join(exc.messages)}")
+        if not data.get('sku') and not any(e.startswith('sku') for e in errors):
+            errors.append("sku: El SKU es obligatorio para importar.")
+        if errors:
+            raise forms.ValidationError(errors)
+        return Product(
+            category_id=self.categories.resolve(row.get('category')),
+            supplier_id=self.suppliers.resolve(row.get('supplier')),
+            **data,
+        )
+
+    def write_batch(self, batch):
+        # Un SKU repetido dentro del lote se queda con la última fila
+        products = list({p.sku: p for p in batch}.values())
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                products, update_conflicts=True, unique_fields=['sku'], update_fields=UPDATE_FIELDS)
+            ids = Product.objects.filter(sku__in=[p.sku for p in products]).values_list('pk', flat=True)
+            get_search_backend().index_many(ids)
+        number = len(self.report.batches) + 1
+        self.report.batches.append((number, len(products)))
+        if self.progress:
+            self.progress(number, len(products), self.report)
+
+    def run(self, stream, fmt='csv'):
+        batch = []
+        for line, row in READERS[fmt](stream):
+            self.report.rows += 1
+            if isinstance(row, Exception):
+                self.report.errors.append((line, str(row)))
+                continue
+            try:
+                batch.append(self.clean_row(row))
+            except forms.ValidationError as exc:
+                self.report.errors.append((line, '; '.join(exc.messages)))
+                continue
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+        rebuild_facet_counts()   # también invalida la caché del catálogo
+        transaction.on_commit(bump_catalog_generation)
+        return self.report
+
+
+def import_products(fileobj, fmt='csv', batch_size=1000, progress=None, encoding='utf-8'):
+    """Importa desde un archivo binario o de texto; devuelve un ImportReport."""
+    if fmt not in READERS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    stream = fileobj
+    if not isinstance(fileobj, io.TextIOBase):
+        stream = io.TextIOWrapper(fileobj, encoding=encoding, newline='')
+    return ProductImporter(batch_size=batch_size, progress=progress).run(stream, fmt)
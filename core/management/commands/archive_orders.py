@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.archive import ARCHIVE_CHUNK, archivable_orders, archive_orders
+
+
+class Command(BaseCommand):
+    help = ("Mueve los pedidos completados o cancelados más viejos que --days días a ArchivedOrder "
+            "(líneas en JSON), por lotes. Las ventas archivadas siguen en los reportes. Pensado para cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ORDER_ARCHIVE_DAYS,
+                            help='Edad mínima en días (por defecto ORDER_ARCHIVE_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_CHUNK, help='Pedidos por transacción.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta los pedidos a archivar.')
+
+    def handle(self, *args, **options):
+        orders = archivable_orders(options['days'])
+        if options['dry_run']:
+            self.stdout.write(f"{orders.count()} pedidos para archivar.")
+            return
+        archived, batches = archive_orders(
+            orders, chunk_size=options['batch_size'],
+            progress=lambda batch, count: self.stdout.write(f"lote {batch}: {count} pedidos"))
+        self.stdout.write(self.style.SUCCESS(f"{archived} pedidos archivados en {batches} lotes."))
@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.utils.crypto import get_random_string
+
+from core.bench import copy_database, percentiles, seed_products
+from core.management.commands.loadtest import session_cookie
+from core.models import Customer, Order, Product
+from core.views import ProductListView
+
+
+class Command(BaseCommand):
+    help = ("Carga mixta lectura/escritura contra las vistas del catálogo con cada DB_PROFILE: "
+            "listado, detalle y API de productos mientras otros hilos crean pedidos y editan productos. "
+            "Cada perfil SQLite corre en un proceso aparte sobre una copia temporal de la base; "
+            "el perfil server usa la base configurada (DB_*) y borra sus datos al terminar.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='dev,sqlite', help='Perfiles separados por coma.')
+        parser.add_argument('--threads', type=int, default=8, help='Hilos concurrentes.')
+        parser.add_argument('--duration', type=float, default=10.0, help='Segundos por perfil.')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Fracción de peticiones que escriben.')
+        parser.add_argument('--products', type=int, default=5000, help='Productos generados.')
+        parser.add_argument('--json', dest='json_path', help='Guardar los resultados en este archivo JSON.')
+        parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_profile(options)))
+            return
+        profiles = [p.strip() for p in options['profiles'].split(',') if p.strip()]
+        results = []
+        self.stdout.write(f"{'perfil':<8} {'req/s':>8} {'lect/s':>8} {'escr/s':>8} {'lect p50':>9} "
+                          f"{'lect p99':>9} {'escr p50':>9} {'escr p99':>9} {'errores':>8}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for profile in profiles:
+                env = dict(os.environ, DB_PROFILE=profile)
+                if profile != 'server':
+                    env['SQLITE_PATH'] = os.path.join(tmp, f'{profile}.sqlite3')
+                    copy_database(settings.SQLITE_PATH, env['SQLITE_PATH'])
+                command = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_db_profiles', '--worker',
+                           '--threads', str(options['threads']), '--duration', str(options['duration']),
+                           '--write-ratio', str(options['write_ratio']), '--products', str(options['products'])]
+                proc = subprocess.run(command, env=env, capture_output=True, text=True)
+                if proc.returncode:
+                    raise CommandError(f"El perfil {profile} falló:\n{proc.stderr}")
+                stats = json.loads(proc.stdout.strip().splitlines()[-1])
+                results.append(stats)
+                cells = [f"{stats[k]:.1f}" if stats[k] is not None else '-'
+                         for k in ('read_p50_ms', 'read_p99_ms', 'write_p50_ms', 'write_p99_ms')]
+                self.stdout.write(f"{profile:<8} {stats['rps']:>8.1f} {stats['read_rps']:>8.1f} "
+                                  f"{stats['write_rps']:>8.1f} " + ' '.join(f'{c:>9}' for c in cells) +
+                                  f" {stats['errors']:>8}")
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(results, fh, indent=2)
+
+    def run_profile(self, options):
+        """Corre la carga en este proceso con el DB_PROFILE del entorno y devuelve las métricas."""
+        if settings.DB_PROFILE != 'server':
+            call_command('migrate', verbosity=0)
+        cats, sups = seed_products(options['products'], start=time.time_ns() % 10 ** 7)
+        user = User.objects.create_user(f'bench-db-{time.time_ns()}', is_staff=True)
+        customer = Customer.objects.create(user=user)
+        products = list(Product.objects.filter(category__in=cats)
+                        .values('pk', 'sku', 'name', 'description', 'category', 'supplier', 'price'))
+        csrf = get_random_string(32)
+        headers = {'HTTP_HOST': 'localhost', 'HTTP_X_CSRFTOKEN': csrf,
+                   'HTTP_COOKIE': f'{session_cookie(user.username)}; {settings.CSRF_COOKIE_NAME}={csrf}'}
+        pages = max(min(len(products) // ProductListView.paginate_by, 20), 1)
+        connection.close()   # cada hilo abre la suya, como un worker de WSGI
+
+        handler = WSGIHandler()
+        reads, writes, errors = [], [], []
+        deadline = time.perf_counter() + options['duration']
+
+        def call(request):
+            status = []
+            response = handler(request.environ, lambda s, h, exc_info=None: status.append(int(s.split()[0])))
+            for _ in response:
+                pass
+            response.close()   # dispara request_finished: cierra o conserva la conexión según CONN_MAX_AGE
+            return status[0]
+
+        def client(seed):
+            rng = random.Random(seed)
+            factory = RequestFactory(**headers)
+            while time.perf_counter() < deadline:
+                product = rng.choice(products)
+                if rng.random() < options['write_ratio']:
+                    if rng.random() < 0.5:
+                        request = factory.post('/pedidos/create/', {'customer': customer.pk, 'status': 'P'})
+                    else:
+                        data = dict(product, stock=rng.randint(0, 500))
+                        request = factory.post(f"/productos/{data.pop('pk')}/edit/",
+                                               {k: v for k, v in data.items() if v is not None})
+                    bucket, expected = writes, 302
+                else:
+                    path = rng.choice([f'/productos/?page={rng.randint(1, pages)}', '/api/productos/?limit=50',
+                                       f"/productos/{product['pk']}/"])
+                    request = factory.get(path)
+                    bucket, expected = reads, 200
+                started = time.perf_counter()
+                status = call(request)
+                if status == expected:
+                    bucket.append(time.perf_counter() - started)
+                else:
+                    errors.append(status)
+            connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(options['threads'])]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        if settings.DB_PROFILE == 'server':
+            Order.objects.filter(customer=customer).delete()
+            Product.objects.filter(category__in=cats).delete()
+            for model in cats + sups:
+                model.delete()
+            user.delete()
+
+        read_p50, read_p99 = percentiles(reads, (0.50, 0.99))
+        write_p50, write_p99 = percentiles(writes, (0.50, 0.99))
+        return {
+            'profile': settings.DB_PROFILE,
+            'threads': options['threads'],
+            'requests': len(reads) + len(writes),
+            'errors': len(errors),
+            'rps': (len(reads) + len(writes)) / elapsed,
+            'read_rps': len(reads) / elapsed,
+            'write_rps': len(writes) / elapsed,
+            'read_p50_ms': read_p50,
+            'read_p99_ms': read_p99,
+            'write_p50_ms': write_p50,
+            'write_p99_ms': write_p99,
+        }
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from core.bench import rolled_back, seed_products, measure, parse_sizes
+from core.models import Product
+from core.views import iter_products_csv
+
+
+def _buffered_export(qs):
+    # Implementación anterior: instancias completas y archivo entero en memoria.
+    import csv
+    import io
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['id', 'sku', 'name', 'category', 'supplier', 'price', 'stock'])
+    for p in qs.select_related('category', 'supplier'):
+        writer.writerow([p.id, p.sku, p.name, p.category.name if p.category else '',
+                         p.supplier.name if p.supplier else '', str(p.price), p.stock])
+    return len(out.getvalue())
+
+
+def _streamed_export(qs):
+    return sum(len(line) for line in iter_products_csv(qs))
+
+
+class Command(BaseCommand):
+    help = "Compara memoria y tiempo del export CSV en memoria vs. streaming a distintos tamaños."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,50000',
+                            help='Cantidades de productos separadas por coma.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'filas':>10} {'modo':>10} {'segundos':>10} {'pico KiB':>10}")
+        with rolled_back():
+            seeded = 0
+            for size in sorted(parse_sizes(options['sizes'])):
+                seed_products(size - seeded, start=seeded)
+                seeded = size
+                qs = Product.objects.all()
+                for mode, fn in (('buffer', _buffered_export), ('stream', _streamed_export)):
+                    _, elapsed, peak = measure(lambda: fn(qs))
+                    self.stdout.write(f"{size:>10} {mode:>10} {elapsed:>10.3f} {peak / 1024:>10.0f}")
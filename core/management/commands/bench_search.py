@@ -0,0 +1,46 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.bench import rolled_back, seed_products, parse_sizes
+from core.models import Product
+from core.search import get_search_backend
+
+QUERIES = ('4242', '99999', '12345 prueba', '777', 'inexistente')
+
+
+class Command(BaseCommand):
+    help = "Mide la latencia de búsqueda (índice vs. icontains) a distintos tamaños de catálogo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000',
+                            help='Cantidades de productos separadas por coma.')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def _latency(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            for q in QUERIES:
+                started = time.perf_counter()
+                fn(q)
+                samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples), max(samples)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f"backend: {type(backend).__name__}")
+        self.stdout.write(f"{'filas':>10} {'modo':>10} {'p50 ms':>10} {'max ms':>10}")
+        with rolled_back():
+            seeded = 0
+            for size in sorted(parse_sizes(options['sizes'])):
+                seed_products(size - seeded, start=seeded)
+                seeded = size
+                backend.rebuild()
+                modes = (
+                    ('indice', lambda q: backend.search(q, limit=20)),
+                    ('icontains', lambda q: list(Product.objects.filter(name__icontains=q)[:20])),
+                )
+                for mode, fn in modes:
+                    p50, worst = self._latency(fn, options['repeat'])
+                    self.stdout.write(f"{size:>10} {mode:>10} {p50:>10.2f} {worst:>10.2f}")
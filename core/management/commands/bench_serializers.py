@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.bench import rolled_back, seed_products, parse_sizes
+from core.models import Product
+from core.serializers import ProductAPISerializer, ProductFastSerializer
+
+
+def _drf(qs):
+    data = ProductAPISerializer(qs.select_related('category', 'supplier'), many=True).data
+    return JSONRenderer().render({'productos': data})
+
+
+def _fast(qs):
+    data = ProductFastSerializer(ProductFastSerializer.values(qs)).data
+    return JSONRenderer().render({'productos': data})
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark: ProductAPISerializer (DRF) vs. ProductFastSerializer (.values())."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Cantidades de productos separadas por coma.')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Repeticiones por medición (se informa la mejor).')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'filas':>10} {'drf s':>10} {'fast s':>10} {'speedup':>10}")
+        with rolled_back():
+            seeded = 0
+            for size in sorted(parse_sizes(options['sizes'])):
+                seed_products(size - seeded, start=seeded)
+                seeded = size
+                qs = Product.objects.order_by('id')
+                timings = {}
+                for name, fn in (('drf', _drf), ('fast', _fast)):
+                    best = None
+                    for _ in range(options['repeat']):
+                        started = time.perf_counter()
+                        body = fn(qs)
+                        elapsed = time.perf_counter() - started
+                        best = elapsed if best is None else min(best, elapsed)
+                    timings[name] = (best, body)
+                if timings['drf'][1] != timings['fast'][1]:
+                    self.stderr.write(f"¡Salidas distintas con {size} filas!")
+                drf, fast = timings['drf'][0], timings['fast'][0]
+                self.stdout.write(f"{size:>10} {drf:>10.3f} {fast:>10.3f} {drf / fast:>9.1f}x")
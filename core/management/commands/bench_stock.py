@@ -0,0 +1,66 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, OperationalError
+
+from core.models import Customer, Order, Product
+from core.stock import InsufficientStock, place_order
+
+
+class Command(BaseCommand):
+    help = ("Prueba de carga de la reserva de stock: varios hilos compran los mismos productos. "
+            "Verifica que no haya sobreventa e informa pedidos/segundo. Borra sus datos al terminar.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=200, help='Intentos de compra por hilo.')
+        parser.add_argument('--stock', type=int, default=1000, help='Stock inicial del producto disputado.')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(f'bench-stock-{time.time_ns()}')
+        customer = Customer.objects.create(user=user)
+        hot = Product.objects.create(name='bench-stock hot', price=Decimal('1.00'), stock=options['stock'])
+        cold = Product.objects.create(name='bench-stock cold', price=Decimal('2.00'), stock=10 ** 9)
+        placed, rejected, retries = [], [], []
+
+        def buyer():
+            try:
+                for _ in range(options['orders']):
+                    while True:
+                        try:
+                            place_order(customer, [(cold, 1), (hot, 1)])
+                            placed.append(1)
+                        except InsufficientStock:
+                            rejected.append(1)
+                        except OperationalError:
+                            retries.append(1)
+                            continue
+                        break
+            finally:
+                connection.close()
+
+        try:
+            threads = [threading.Thread(target=buyer) for _ in range(options['threads'])]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+
+            hot.refresh_from_db()
+            expected = max(options['stock'] - len(placed), 0)
+            self.stdout.write(f"hilos={options['threads']} pedidos={len(placed)} rechazados={len(rejected)} "
+                              f"reintentos={len(retries)}")
+            self.stdout.write(f"{len(placed) / elapsed:.1f} pedidos/s ({elapsed:.2f}s)")
+            if hot.stock != expected or hot.stock < 0:
+                self.stderr.write(self.style.ERROR(f"¡Sobreventa! stock={hot.stock}, esperado={expected}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Sin sobreventa: stock final {hot.stock}"))
+        finally:
+            Order.objects.filter(customer=customer).delete()
+            Product.objects.filter(pk__in=[hot.pk, cold.pk]).delete()
+            user.delete()
@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.bench import copy_database, measure, percentiles, seed_orders, seed_products
+from core.management.commands.loadtest import run_load, session_cookie
+from core.models import Customer, Product
+from core.reports import rebuild_rollups
+from core.search import get_search_backend
+from core.views import ProductListView
+
+SEARCH_TERMS = ('prueba', '4242', 'producto 77', 'generada', 'inexistente')
+ORDER_PRODUCTS = 20000   # productos candidatos para las líneas de pedido (los "más vendidos")
+
+
+def _request(method, name, params=None, data=None, args=()):
+    path = reverse(f'core:{name}', args=args)
+    if params:
+        path += '?' + '&'.join(f'{k}={v}' for k, v in params.items())
+    return method, path, data
+
+
+# Escenario -> función (contexto, número de petición) -> (método, ruta, datos del POST)
+SCENARIOS = {
+    'product_list': lambda ctx, i: _request('get', 'product_list', {'page': i % ctx['pages'] + 1}),
+    'product_list_filtered': lambda ctx, i: _request(
+        'get', 'product_list', {'category': ctx['categories'][i % len(ctx['categories'])]}),
+    'product_detail': lambda ctx, i: _request(
+        'get', 'product_detail', args=[ctx['products'][i * 7919 % len(ctx['products'])]]),
+    'search': lambda ctx, i: _request('get', 'search', {'q': SEARCH_TERMS[i % len(SEARCH_TERMS)].replace(' ', '+')}),
+    'api_productos': lambda ctx, i: _request(
+        'get', 'api_productos', {'limit': 50, 'category': ctx['categories'][i % len(ctx['categories'])]}),
+    'export_csv': lambda ctx, i: _request('get', 'export_csv',
+                                          {'category': ctx['categories'][i % len(ctx['categories'])]}),
+    'order_create': lambda ctx, i: _request('post', 'order_create', data={'customer': ctx['customer'],
+                                                                             'status': 'P'}),
+}
+SERVERS = {
+    'wsgi': '{python} manage.py runserver --noreload --skip-checks 127.0.0.1:{port}',
+    'asgi': '{python} -m uvicorn tienda_integrador.asgi:application --port {port} --log-level warning',
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"El servidor terminó al arrancar (código {process.returncode}).")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"El servidor no abrió el puerto {port} en {timeout} s.")
+
+
+def _fmt(value, spec='.1f'):
+    return '-' if value is None else format(value, spec)
+
+
+class Command(BaseCommand):
+    help = ("Suite de benchmarks de la tienda: genera un catálogo y un historial de pedidos con bulk_create "
+            "sobre una copia temporal de la base y mide los flujos principales (listado, detalle, búsqueda, "
+            "API, export CSV, alta de pedidos) con el test client -latencia p50/p95/p99, consultas por "
+            "petición y pico de memoria- y con servidores WSGI/ASGI locales. Resultados en JSON para comparar corridas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help='Productos generados (10k a 1M).')
+        parser.add_argument('--orders', type=int, default=20000, help='Pedidos generados.')
+        parser.add_argument('--customers', type=int, default=200, help='Clientes generados.')
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Escenarios separados por coma.')
+        parser.add_argument('--repeat', type=int, default=50, help='Peticiones por escenario con el test client.')
+        parser.add_argument('--export-repeat', type=int, default=3, help='Peticiones del escenario export_csv.')
+        parser.add_argument('--servers', default='wsgi,asgi',
+                            help="Servidores locales separados por coma ('' para omitirlos).")
+        parser.add_argument('--wsgi-command', default=SERVERS['wsgi'],
+                            help='Comando del servidor WSGI ({python} y {port} se reemplazan).')
+        parser.add_argument('--asgi-command', default=SERVERS['asgi'], help='Comando del servidor ASGI.')
+        parser.add_argument('--concurrency', type=int, default=10, help='Conexiones concurrentes contra los servidores.')
+        parser.add_argument('--duration', type=float, default=5.0, help='Segundos por escenario y servidor.')
+        parser.add_argument('--json', dest='json_path', help='Guardar los resultados en este archivo JSON.')
+        parser.add_argument('--baseline', help='JSON de una corrida anterior: muestra la variación de p95.')
+        parser.add_argument('--keep', help='Conservar la base generada en esta ruta.')
+        parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+
+    # -----------------------------------------------------------------
+    # Proceso principal: copia la base, lanza el worker e informa
+    # -----------------------------------------------------------------
+    def handle(self, *args, **options):
+        unknown = set(self.scenario_names(options)) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(unknown))}. "
+                               f"Opciones: {', '.join(SCENARIOS)}.")
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_suite(options)))
+            return
+        if settings.DB_PROFILE == 'server':
+            raise CommandError("bench_suite trabaja sobre una copia SQLite: usá DB_PROFILE=dev o sqlite.")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.sqlite3')
+            copy_database(settings.SQLITE_PATH, path)
+            command = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_suite', '--worker']
+            for name in ('products', 'orders', 'customers', 'scenarios', 'repeat', 'export_repeat', 'servers',
+                         'wsgi_command', 'asgi_command', 'concurrency', 'duration'):
+                command += [f"--{name.replace('_', '-')}", str(options[name])]
+            # stderr sin capturar: el worker informa el avance por ahí
+            proc = subprocess.run(command, env=dict(os.environ, SQLITE_PATH=path), stdout=subprocess.PIPE, text=True)
+            if proc.returncode:
+                raise CommandError("La suite falló (ver el error arriba).")
+            if options['keep']:
+                shutil.copyfile(path, options['keep'])
+        results = json.loads(proc.stdout.strip().splitlines()[-1])
+        results['meta'].update(self.run_info())
+        self.report(results, self.load_baseline(options['baseline']))
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(results, fh, indent=2)
+
+    def scenario_names(self, options):
+        return [s.strip() for s in options['scenarios'].split(',') if s.strip()]
+
+    def run_info(self):
+        try:
+            commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                                    capture_output=True, text=True).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {'commit': commit, 'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0],
+                'django': django.get_version(), 'db_profile': settings.DB_PROFILE,
+                'session_mode': settings.SESSION_MODE}
+
+    def load_baseline(self, path):
+        if not path:
+            return {}
+        with open(path, encoding='utf-8') as fh:
+            return {row['scenario']: row for row in json.load(fh).get('client', [])}
+
+    def report(self, results, baseline):
+        meta, seed = results['meta'], results['seed']
+        self.stdout.write(f"Datos: {meta['products']} productos, {meta['orders']} pedidos "
+                          f"(generados en {seed['seconds']:.1f} s)")
+        self.stdout.write(f"\n{'escenario':<22} {'req':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                          f"{'consultas':>9} {'pico MB':>8} {'errores':>7}" + (f" {'Δp95':>7}" if baseline else ''))
+        for row in results['client']:
+            line = (f"{row['scenario']:<22} {row['requests']:>5} {_fmt(row['p50_ms']):>8} {_fmt(row['p95_ms']):>8} "
+                    f"{_fmt(row['p99_ms']):>8} {row['queries_per_request']:>9.1f} {row['peak_mb']:>8.2f} "
+                    f"{row['errors']:>7}")
+            before = baseline.get(row['scenario'], {}).get('p95_ms')
+            if baseline:
+                delta = (row['p95_ms'] / before - 1) * 100 if before and row['p95_ms'] else None
+                line += f" {_fmt(delta, '+.0f') + '%' if delta is not None else '-':>7}"
+            self.stdout.write(line)
+        if results['server']:
+            self.stdout.write(f"\n{'servidor':<8} {'escenario':<22} {'conc':>5} {'req/s':>8} {'p50 ms':>8} "
+                              f"{'p95 ms':>8} {'p99 ms':>8} {'errores':>7}")
+            for row in results['server']:
+                self.stdout.write(f"{row['server']:<8} {row['scenario']:<22} {row['concurrency']:>5} "
+                                  f"{row['rps']:>8.1f} {_fmt(row['p50_ms']):>8} {_fmt(row['p95_ms']):>8} "
+                                  f"{_fmt(row['p99_ms']):>8} {row['errors']:>7}")
+
+    # -----------------------------------------------------------------
+    # Worker: corre con SQLITE_PATH apuntando a la copia
+    # -----------------------------------------------------------------
+    def progress(self, message):
+        self.stderr.write(message)
+
+    def run_suite(self, options):
+        call_command('migrate', verbosity=0)
+        self.progress(f"Generando {options['products']} productos y {options['orders']} pedidos...")
+        started = time.perf_counter()
+        with transaction.atomic():
+            self.seed(options)
+        seconds = time.perf_counter() - started
+        user = User.objects.create_user(f'bench-suite-{time.time_ns()}', is_staff=True)
+        ctx = {
+            'customer': Customer.objects.create(user=user).pk,
+            'products': list(Product.objects.values_list('pk', flat=True)[:ORDER_PRODUCTS]),
+            'categories': list(Product.objects.values_list('category', flat=True).distinct()
+                               .exclude(category=None).order_by('category')[:20]),
+            'pages': max(min(options['products'] // ProductListView.paginate_by, 50), 1),
+        }
+        scenarios = self.scenario_names(options)
+        client = Client(SERVER_NAME='localhost')   # ALLOWED_HOSTS vacío con DEBUG solo acepta localhost
+        client.force_login(user)
+        results = {
+            'meta': {'products': options['products'], 'orders': options['orders'], 'repeat': options['repeat']},
+            'seed': {'seconds': seconds},
+            'client': [],
+            'server': [],
+        }
+        for name in scenarios:
+            self.progress(f"test client: {name}")
+            repeat = options['export_repeat'] if name == 'export_csv' else options['repeat']
+            results['client'].append(self.run_client(client, name, ctx, repeat))
+
+        cookie = session_cookie(user.username)
+        commands = {'wsgi': options['wsgi_command'], 'asgi': options['asgi_command']}
+        for server in [s.strip() for s in options['servers'].split(',') if s.strip()]:
+            if server not in commands:
+                raise CommandError(f"Servidor desconocido: {server}. Opciones: wsgi, asgi.")
+            results['server'] += self.run_server(server, commands[server], ctx, scenarios, cookie, options)
+        return results
+
+    def seed(self, options):
+        seed_products(options['products'])
+        products = list(Product.objects.order_by('pk').values_list('pk', 'price')[:ORDER_PRODUCTS])
+        seed_orders(options['orders'], products, customers=options['customers'])
+        get_search_backend().rebuild()   # bulk_create no pasa por las señales que mantienen el índice
+        rebuild_rollups()
+
+    def run_client(self, client, name, ctx, repeat):
+        latencies, queries, errors = [], [], 0
+
+        def send(i):
+            method, path, data = SCENARIOS[name](ctx, i)
+            response = getattr(client, method)(path, data)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            return response
+
+        for i in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = send(i)
+                elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            queries.append(len(captured))
+        # El pico de memoria se mide aparte: tracemalloc distorsiona las latencias
+        _, _, peak = measure(lambda: [send(i) for i in range(min(repeat, 5))])
+        p50, p95, p99 = percentiles(latencies)
+        return {'scenario': name, 'requests': len(latencies), 'errors': errors,
+                'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+                'queries_per_request': sum(queries) / len(queries) if queries else 0,
+                'max_queries': max(queries, default=0), 'peak_mb': peak / 2 ** 20}
+
+    def run_server(self, server, command, ctx, scenarios, cookie, options):
+        port = _free_port()
+        argv = shlex.split(command.format(python=shlex.quote(sys.executable), port=port))
+        process = subprocess.Popen(argv, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        rows = []
+        try:
+            _wait_for_port(port, process)
+            for name in scenarios:
+                method = SCENARIOS[name](ctx, 0)[0]
+                if method != 'get':
+                    continue   # la carga HTTP solo hace GET
+                self.progress(f"{server}: {name}")
+                paths = [SCENARIOS[name](ctx, i)[1] for i in range(50)]
+                stats = asyncio.run(run_load(f'http://127.0.0.1:{port}', paths, cookie, options['concurrency'],
+                                             options['duration']))
+                rows.append(dict(stats, server=server, scenario=name, concurrency=options['concurrency']))
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+        return rows
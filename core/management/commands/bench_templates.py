@@ -0,0 +1,68 @@
+import copy
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from core.bench import rolled_back, seed_products
+from core.views import ProductListView
+
+LOADERS = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+DUMMY_FRAGMENTS = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+LOCMEM_FRAGMENTS = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'bench-templates', 'OPTIONS': {'MAX_ENTRIES': 100000}}
+
+
+def template_settings(cached_loader):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', LOADERS)] if cached_loader else LOADERS
+    templates[0]['APP_DIRS'] = False
+    return templates
+
+
+MODES = [
+    # nombre, loader cacheado, caché de fragmentos
+    ('sin caché', False, DUMMY_FRAGMENTS),
+    ('loader', True, DUMMY_FRAGMENTS),
+    ('loader+frag', True, LOCMEM_FRAGMENTS),
+]
+
+
+class Command(BaseCommand):
+    help = ("Tiempo de renderizado de templates por página de /productos/: sin cachés, "
+            "con el loader cacheado y con loader + fragmentos cacheados.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000, help='Productos generados.')
+        parser.add_argument('--per-page', type=int, default=ProductListView.paginate_by,
+                            help='Filas por página del listado.')
+        parser.add_argument('--pages', type=int, default=5, help='Páginas distintas recorridas por ronda.')
+        parser.add_argument('--repeat', type=int, default=20, help='Rondas por modo.')
+
+    def handle(self, *args, **options):
+        view = ProductListView.as_view(paginate_by=options['per_page'])
+        factory = RequestFactory()
+        self.stdout.write(f"{'modo':<12} {'p50 ms':>9} {'p95 ms':>9} {'media ms':>9}")
+        with rolled_back():
+            seed_products(options['products'])
+            user = User.objects.create_user('bench-templates', is_staff=True)
+            for name, cached_loader, fragments in MODES:
+                caches = dict(settings.CACHES, template_fragments=fragments)
+                with override_settings(TEMPLATES=template_settings(cached_loader), CACHES=caches):
+                    timings = []
+                    for round_ in range(options['repeat'] + 1):
+                        for page in range(1, options['pages'] + 1):
+                            request = factory.get('/productos/', {'page': page})
+                            request.user, request.session = user, {}
+                            response = view(request)
+                            started = time.perf_counter()
+                            response.render()
+                            if round_:   # la primera ronda solo calienta cachés
+                                timings.append(time.perf_counter() - started)
+                ordered = sorted(timings)
+                p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+                self.stdout.write(f"{name:<12} {statistics.median(ordered) * 1000:>9.2f} "
+                                  f"{p95 * 1000:>9.2f} {statistics.fmean(ordered) * 1000:>9.2f}")
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import import_products, READERS
+
+
+class Command(BaseCommand):
+    help = "Importa productos desde CSV o JSON Lines con upserts por lotes (clave: sku)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo a importar.')
+        parser.add_argument('--format', choices=sorted(READERS), default=None,
+                            help='Formato del archivo (por defecto se deduce de la extensión).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-errors', type=int, default=20,
+                            help='Cantidad máxima de errores a listar al final.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        started = time.perf_counter()
+
+        def progress(number, count, report):
+            self.stdout.write(f"lote {number}: {count} productos escritos "
+                              f"({report.rows} filas leídas, {len(report.errors)} errores)")
+
+        try:
+            with open(path, 'rb') as fileobj:
+                report = import_products(fileobj, fmt, options['batch_size'], progress)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for line, message in report.errors[:options['max_errors']]:
+            self.stderr.write(f"línea {line}: {message}")
+        if len(report.errors) > options['max_errors']:
+            self.stderr.write(f"... y {len(report.errors) - options['max_errors']} errores más")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{report} en {elapsed:.2f}s"))
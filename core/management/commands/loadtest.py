@@ -0,0 +1,152 @@
+import asyncio
+import json
+import statistics
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bench import percentiles
+
+DEFAULT_PATHS = '/productos/,/async/productos/,/api/productos/,/async/api/productos/,/search/?q=agua,/async/search/?q=agua'
+
+
+def session_cookie(username):
+    """Crea una sesión autenticada para `username` con el SESSION_ENGINE configurado."""
+    try:
+        user = get_user_model().objects.get(username=username)
+    except get_user_model().DoesNotExist:
+        raise CommandError(f"No existe el usuario {username!r}.")
+    store = import_module(settings.SESSION_ENGINE).SessionStore()
+    store[SESSION_KEY] = str(user.pk)
+    store[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    store.save()
+    return f'{settings.SESSION_COOKIE_NAME}={store.session_key}'
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("conexión cerrada")
+    status = int(status_line.split()[1])
+    length, chunked, close = None, False, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value:
+            chunked = True
+        elif name == 'connection' and value == 'close':
+            close = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        close = True
+    return status, close
+
+
+async def _worker(host, port, paths, cookie, deadline, latencies, errors, index):
+    reader = writer = None
+    i = index
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        request = (f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nCookie: {cookie}\r\n'
+                   f'Accept: */*\r\n\r\n').encode()
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            await writer.drain()
+            status, close = await _read_response(reader)
+            if status >= 400:
+                errors.append(status)
+            else:
+                latencies.append(time.perf_counter() - started)
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            errors.append('conexión')
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(base_url, paths, cookie, concurrency, duration):
+    parts = urlsplit(base_url)
+    host, port = parts.hostname, parts.port or 80
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*[_worker(host, port, paths, cookie, deadline, latencies, errors, n)
+                           for n in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    p50, p95, p99 = percentiles(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': p50,
+        'p95_ms': p95,
+        'p99_ms': p99,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else None,
+    }
+
+
+class Command(BaseCommand):
+    help = ("Prueba de carga HTTP contra uno o más despliegues (p. ej. WSGI vs ASGI): "
+            "informa peticiones/s y latencias p50/p99 por ruta y nivel de concurrencia.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True,
+                            help='nombre=URL base, p. ej. wsgi=http://127.0.0.1:8000 (repetible).')
+        parser.add_argument('--paths', default=DEFAULT_PATHS, help='Rutas separadas por coma.')
+        parser.add_argument('--concurrency', default='100,500', help='Conexiones concurrentes, separadas por coma.')
+        parser.add_argument('--duration', type=float, default=10.0, help='Segundos por medición.')
+        parser.add_argument('--username', required=True, help='Usuario con el que se autentican las peticiones.')
+        parser.add_argument('--json', dest='json_path', help='Guardar los resultados en este archivo JSON.')
+
+    def handle(self, *args, **options):
+        cookie = session_cookie(options['username'])
+        targets = []
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            if not sep:
+                raise CommandError(f"--target debe tener la forma nombre=URL: {target!r}")
+            targets.append((name, url.rstrip('/')))
+        paths = [p.strip() for p in options['paths'].split(',') if p.strip()]
+        levels = [int(c) for c in options['concurrency'].split(',')]
+
+        results = []
+        self.stdout.write(f"{'destino':<8} {'ruta':<28} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errores':>8}")
+        for path in paths:
+            for concurrency in levels:
+                for name, url in targets:
+                    stats = asyncio.run(run_load(url, [path], cookie, concurrency, options['duration']))
+                    results.append(dict(stats, target=name, path=path, concurrency=concurrency))
+                    p50 = f"{stats['p50_ms']:.1f}" if stats['p50_ms'] is not None else '-'
+                    p99 = f"{stats['p99_ms']:.1f}" if stats['p99_ms'] is not None else '-'
+                    self.stdout.write(f"{name:<8} {path:<28} {concurrency:>5} {stats['rps']:>9.1f} "
+                                      f"{p50:>9} {p99:>9} {stats['errors']:>8}")
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(results, fh, indent=2)
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.restock import compute_reorder_suggestions, supplier_totals
+
+
+class Command(BaseCommand):
+    help = ("Calcula la velocidad de venta por producto (una consulta agregada sobre OrderItem), "
+            "marca los productos con stock para menos de N días y guarda sugerencias de "
+            "reposición por proveedor. Pensado para correr desde cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=14,
+                            help='Umbral: marcar productos cuyo stock cubre menos de estos días.')
+        parser.add_argument('--window', type=int, default=30,
+                            help='Días de historial de ventas usados para la velocidad.')
+        parser.add_argument('--target-days', type=int, default=30,
+                            help='Días de venta que debería cubrir el stock después de reponer.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Sugerencias por INSERT.')
+
+    def handle(self, *args, **options):
+        if min(options['days'], options['window'], options['target_days'], options['batch_size']) < 1:
+            raise CommandError("--days, --window, --target-days y --batch-size deben ser positivos.")
+        started = time.perf_counter()
+        count = compute_reorder_suggestions(options['days'], options['window'], options['target_days'],
+                                            options['batch_size'])
+        for row in supplier_totals():
+            name = row['supplier__name'] or 'Sin proveedor'
+            self.stdout.write(f"{name}: {row['products']} productos, {row['units']} unidades a pedir")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{count} productos con stock bajo en {elapsed:.2f}s."))
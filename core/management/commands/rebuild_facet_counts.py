@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.facets import rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = ("Recalcula los conteos base de facetas (ProductFacetCount) desde los productos. "
+            "Útil tras cargas con update()/bulk_create fuera del importador y las ediciones masivas.")
+
+    def handle(self, *args, **options):
+        rows = rebuild_facet_counts()
+        self.stdout.write(self.style.SUCCESS(f"{rows} conteos de facetas recalculados."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.reports import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = ("Recalcula DailySalesRollup desde los pedidos completados (una consulta agregada). "
+            "Útil tras cargas con update()/bulk_create, que no disparan las señales.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Filas por INSERT.')
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollups(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{rows} filas de rollup recalculadas."))
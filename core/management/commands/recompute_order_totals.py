@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
+
+from core.models import Order, OrderItem
+
+
+def computed_total():
+    """Subconsulta correlacionada: suma de unit_price * quantity de las líneas del pedido."""
+    money = DecimalField(max_digits=12, decimal_places=2)
+    lines = (OrderItem.objects.filter(order=OuterRef('pk'))
+             .values('order')
+             .annotate(total=Sum(F('unit_price') * F('quantity'), output_field=money))
+             .values('total'))
+    return Round(Coalesce(Subquery(lines, output_field=money), Value(0), output_field=money), 2,
+                 output_field=money)
+
+
+class Command(BaseCommand):
+    help = "Recalcula Order.total a partir de sus líneas (un UPDATE agregado por lote) y corrige desvíos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rango de ids de pedidos procesado por cada UPDATE.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo cuenta los pedidos con total desviado, sin modificarlos.')
+
+    def handle(self, *args, **options):
+        batch = options['batch_size']
+        last_id = Order.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        fixed = 0
+        for start in range(1, last_id + 1, batch):
+            drifted = (Order.objects.filter(id__gte=start, id__lt=start + batch)
+                       .exclude(total=computed_total()))
+            with transaction.atomic():
+                if options['dry_run']:
+                    count = drifted.count()
+                else:
+                    count = drifted.update(total=computed_total())
+            fixed += count
+            if count:
+                self.stdout.write(f"pedidos {start}-{min(start + batch - 1, last_id)}: {count} desviados")
+        verb = "desviados" if options['dry_run'] else "corregidos"
+        self.stdout.write(self.style.SUCCESS(f"{fixed} pedidos {verb}."))
@@ -0,0 +1,113 @@
+"""
+Histogramas por proceso para las métricas de PerformanceMiddleware.
+
+Cada hilo escribe en su propio fragmento (threading.local), así que el camino
+caliente de una petición no toma ningún lock; solo se sincroniza al crear el
+fragmento de un hilo nuevo y al leer (se suman todos los fragmentos). Cuando un
+hilo termina (servidores con un hilo por petición, el pool de asgiref) su
+fragmento se suma a un total compartido y se descarta: la lista de fragmentos
+no crece más allá de los hilos vivos.
+"""
+import bisect
+import itertools
+import threading
+import weakref
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2)
+
+METRICS = {
+    # nombre: (ayuda, buckets)
+    'core_request_duration_seconds': ("Tiempo total de la petición.", LATENCY_BUCKETS),
+    'core_request_sql_queries': ("Consultas SQL por petición.", QUERY_BUCKETS),
+    'core_request_sql_duration_seconds': ("Tiempo en SQL por petición.", LATENCY_BUCKETS),
+    'core_request_template_seconds': ("Tiempo de renderizado de templates por petición.", LATENCY_BUCKETS),
+    'core_response_size_bytes': ("Tamaño del cuerpo de la respuesta.", SIZE_BUCKETS),
+}
+
+
+def _merge(total, shard):
+    for key, series in list(shard.items()):
+        merged = total.setdefault(key, [0] * (len(series) - 1) + [0.0])
+        for i, value in enumerate(series):
+            merged[i] += value
+
+
+class _ShardOwner:
+    """Vive solo en el threading.local del hilo: se libera cuando el hilo termina."""
+
+
+class MetricsRegistry:
+    def __init__(self, metrics=METRICS):
+        self.metrics = metrics
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = {}   # suma de los fragmentos de hilos terminados
+        self._keys = itertools.count()
+        # RLock: _retire puede correr desde el recolector de basura en cualquier hilo
+        self._shards_lock = threading.RLock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard, key = {}, next(self._keys)
+            with self._shards_lock:
+                self._shards[key] = shard
+            self._local.owner = _ShardOwner()
+            weakref.finalize(self._local.owner, self._retire, key)
+            self._local.shard = shard
+        return shard
+
+    def _retire(self, key):
+        with self._shards_lock:
+            shard = self._shards.pop(key, None)
+            if shard:
+                _merge(self._retired, shard)
+
+    def observe(self, name, label, value):
+        buckets = self.metrics[name][1]
+        series = self._shard().get((name, label))
+        if series is None:
+            # [conteo por bucket..., +Inf, suma]
+            series = self._shard()[(name, label)] = [0] * (len(buckets) + 1) + [0.0]
+        series[bisect.bisect_left(buckets, value)] += 1
+        series[-1] += value
+
+    def snapshot(self):
+        """Suma los fragmentos de todos los hilos: {(nombre, etiqueta): [buckets..., +Inf, suma]}."""
+        merged = {}
+        with self._shards_lock:
+            _merge(merged, self._retired)
+            shards = list(self._shards.values())
+        for shard in shards:
+            _merge(merged, shard)
+        return merged
+
+    def reset(self):
+        with self._shards_lock:
+            self._retired.clear()
+            for shard in self._shards.values():
+                shard.clear()
+
+    def render_prometheus(self):
+        """Formato de exposición de texto de Prometheus (histogramas acumulados)."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, (help_text, buckets) in self.metrics.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (metric, label), series in sorted(snapshot.items()):
+                if metric != name:
+                    continue
+                view = label.replace('\\', '\\\\').replace('"', '\\"')
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), series[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{view="{view}"}} {series[-1]}')
+                lines.append(f'{name}_count{{view="{view}"}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
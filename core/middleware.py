@@ -0,0 +1,193 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from .metrics import registry
+from .models import Customer
+
+logger = logging.getLogger('core.performance')
+
+
+class QueryRecorder:
+    """execute_wrapper que cuenta y cronometra las consultas de la petición."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            self.queries.append((elapsed, sql))
+
+    def top(self, n=5):
+        return sorted(self.queries, key=lambda q: q[0], reverse=True)[:n]
+
+
+# Recorder de la petición en curso. Es una ContextVar y no un execute_wrapper
+# puesto en el middleware: bajo ASGI las consultas del ORM async corren en el
+# hilo de sync_to_async, con otra conexión, y la variable de contexto viaja con
+# ellas. record_queries se instala en cada conexión al abrirse (CoreConfig.ready).
+_current_recorder = ContextVar('core_query_recorder', default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    # connection_created se dispara en cada reconexión del mismo wrapper
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+class PerformanceMiddleware:
+    """
+    Mide por nombre de URL: tiempo total, cantidad y tiempo de SQL, tiempo de
+    renderizado de templates (TemplateResponse) y tamaño de la respuesta.
+    Las peticiones más lentas que SLOW_REQUEST_THRESHOLD se registran en el
+    logger 'core.performance' junto con sus consultas más costosas.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        request._template_seconds = 0.0
+        started = time.perf_counter()
+        token = _current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.record(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        # Bajo ASGI la cadena se mantiene asíncrona (sin saltos a un hilo por este middleware)
+        recorder = QueryRecorder()
+        request._template_seconds = 0.0
+        started = time.perf_counter()
+        token = _current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.record(request, response, recorder, time.perf_counter() - started)
+
+    def record(self, request, response, recorder, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match and match.url_name else '<unresolved>'
+        registry.observe('core_request_duration_seconds', view, elapsed)
+        registry.observe('core_request_sql_queries', view, recorder.count)
+        registry.observe('core_request_sql_duration_seconds', view, recorder.duration)
+        registry.observe('core_request_template_seconds', view, request._template_seconds)
+        if not response.streaming:
+            registry.observe('core_response_size_bytes', view, len(response.content))
+
+        threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD', 1.0)
+        if threshold is not None and elapsed >= threshold:
+            top = '\n'.join(f"  {duration * 1000:.1f} ms  {sql}" for duration, sql in recorder.top())
+            logger.warning("Petición lenta %s %s (%s): %.3fs, %d consultas (%.3fs en SQL), templates %.3fs\n%s",
+                           request.method, request.path, view, elapsed, recorder.count,
+                           recorder.duration, request._template_seconds, top)
+        return response
+
+    def process_template_response(self, request, response):
+        # El render ocurre justo después de este hook; el callback cierra la medición.
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._template_seconds += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def get_customer(request):
+    """Perfil Customer del usuario de la petición (None si no tiene); una sola consulta por petición."""
+    if not hasattr(request, '_cached_customer'):
+        user = request.user
+        request._cached_customer = (Customer.objects.filter(user=user).first()
+                                    if user.is_authenticated else None)
+    return request._cached_customer
+
+
+async def aget_customer(request):
+    if not hasattr(request, '_cached_customer'):
+        user = await request.auser()
+        request._cached_customer = (await Customer.objects.filter(user=user).afirst()
+                                    if user.is_authenticated else None)
+    return request._cached_customer
+
+
+class CustomerMiddleware:
+    """
+    request.customer / await request.acustomer(): el Customer del usuario
+    autenticado, perezoso (sin consulta si la vista no lo usa) y memorizado.
+    Como request.user, es un SimpleLazyObject: sin perfil se evalúa como falso.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.customer = SimpleLazyObject(lambda: get_customer(request))
+        request.acustomer = lambda: aget_customer(request)
+        # Bajo ASGI get_response devuelve una corrutina y el manejador la espera
+        return self.get_response(request)
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise con soporte asíncrono: el WhiteNoiseMiddleware original es solo
+    síncrono y obliga a Django a pasar cada petición ASGI por un hilo antes de
+    llegar a las vistas async. Los archivos estáticos se siguen sirviendo igual.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
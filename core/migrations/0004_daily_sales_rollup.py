@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    # Carga inicial desde los pedidos ya completados; después se mantiene por señales.
+    OrderItem = apps.get_model('core', 'OrderItem')
+    DailySalesRollup = apps.get_model('core', 'DailySalesRollup')
+    sales = (OrderItem.objects.filter(order__status='C')
+             .values(day=TruncDate('order__created_at'), cat=F('product__category'), sup=F('product__supplier'))
+             .annotate(units=Sum('quantity'),
+                       revenue=Sum(F('unit_price') * F('quantity'),
+                                   output_field=DecimalField(max_digits=14, decimal_places=2)))
+             .order_by())
+    DailySalesRollup.objects.bulk_create(
+        [DailySalesRollup(date=r['day'], category_id=r['cat'], supplier_id=r['sup'],
+                          units=r['units'], revenue=r['revenue']) for r in sales.iterator()],
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_product_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.category')),
+                ('supplier', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.supplier')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'category', 'supplier'), name='rollup_day_cat_sup_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.PositiveIntegerField()),
+                ('units_sold', models.PositiveIntegerField()),
+                ('daily_velocity', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('days_of_cover', models.DecimalField(decimal_places=1, max_digits=10)),
+                ('suggested_quantity', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.product')),
+                ('supplier', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.supplier')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['supplier', 'days_of_cover'], name='reorder_sup_cover_idx')],
+            },
+        ),
+    ]
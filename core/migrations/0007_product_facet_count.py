@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+
+
+def backfill_facet_counts(apps, schema_editor):
+    # Carga inicial; después la mantienen las señales de Product (rangos de core.facets.PRICE_BUCKETS)
+    Product = apps.get_model('core', 'Product')
+    ProductFacetCount = apps.get_model('core', 'ProductFacetCount')
+    bucket = Case(When(price__lte='9.99', then=Value(0)),
+                  When(Q(price__gte=10, price__lte='49.99'), then=Value(1)),
+                  When(Q(price__gte=50, price__lte='99.99'), then=Value(2)),
+                  When(Q(price__gte=100, price__lte='499.99'), then=Value(3)),
+                  default=Value(4), output_field=IntegerField())
+    groups = (('category', F('category')), ('supplier', F('supplier')), ('price', bucket))
+    ProductFacetCount.objects.bulk_create(
+        [ProductFacetCount(facet=facet, value=r['key'] or 0, count=r['n'])
+         for facet, key in groups
+         for r in Product.objects.values(key=key).annotate(n=Count('id')).order_by()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_bulk_edit_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=10)),
+                ('value', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('facet', 'value'), name='facet_count_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_facet_counts, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,28 @@
 #core/models.py
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
-class Category(models.Model):
+class RemembersName:
+    """Guarda el nombre persistido: las páginas de productos muestran solo el nombre (ver core/signals.py)."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_name()
+        return instance
+
+    def remember_name(self):
+        if 'name' in self.__dict__:
+            self._stored_name = self.name
+
+class Category(RemembersName, models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
     def __str__(self): return self.name
 
-class Supplier(models.Model):
+class Supplier(RemembersName, models.Model):
     name = models.CharField(max_length=120)
     contact_email = models.EmailField(blank=True)
     phone = models.CharField(max_length=20, blank=True)
@@ -25,6 +40,31 @@ class Product(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     def __str__(self): return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_facets()
+        return instance
+
+    def remember_facets(self):
+        # Valores persistidos, para que las señales ajusten ProductFacetCount solo si cambian
+        if all(f in self.__dict__ for f in ('category_id', 'supplier_id', 'price')):
+            self._stored_facets = (self.category_id, self.supplier_id, self.price)
+
+    class Meta:
+        indexes = [
+            # ProductListView: filtro por categoría/proveedor ordenado por -updated_at
+            models.Index(fields=['category', '-updated_at'], name='product_cat_updated_idx'),
+            models.Index(fields=['supplier', '-updated_at'], name='product_sup_updated_idx'),
+            # Listado sin filtros (-updated_at) y cursor de /api/productos/ (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='product_updated_id_idx'),
+            models.Index(fields=['price'], name='product_price_idx'),
+        ]
+        constraints = [
+            # Los NULL no colisionan en un índice único: solo se exige unicidad a los SKU cargados
+            models.UniqueConstraint(fields=['sku'], name='product_sku_uniq'),
+        ]
+
 class Customer(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='customer_profile')
     phone = models.CharField(max_length=20, blank=True)
@@ -37,9 +77,44 @@ class Order(models.Model):
     products = models.ManyToManyField(Product, through='OrderItem')
     status = models.CharField(max_length=1, choices=STATUS_CHOICES, default='P')
     total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # place_order descontó el stock de las líneas y todavía no se devolvió (core.stock)
+    stock_reserved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     def __str__(self): return f"Order #{self.id} - {self.customer}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_status()
+        return instance
+
+    def remember_status(self):
+        # Estado persistido, para que las señales detecten el paso a/desde 'Completed'
+        if 'status' in self.__dict__:
+            self._stored_status = self.status
+
+    def save(self, *args, **kwargs):
+        # total (señales de OrderItem) y stock_reserved (core.stock) se actualizan en la base
+        # con UPDATE propios: una instancia vieja no debe pisarlos
+        if not self._state.adding and not args and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [f.attname for f in self._meta.concrete_fields
+                                       if not f.primary_key and f.name not in ('total', 'stock_reserved')
+                                       and f.attname not in deferred]
+        # El cambio de estado y el ajuste de DailySalesRollup (señal post_save) van juntos
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # OrderListView de un cliente: customer = ? ORDER BY -created_at
+            models.Index(fields=['customer', '-created_at'], name='order_customer_created_idx'),
+            # OrderListView de staff (todos los pedidos, más recientes primero)
+            models.Index(fields=['-created_at'], name='order_created_idx'),
+            # Reportes y acciones por estado en un rango de fechas
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ]
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
@@ -47,3 +122,125 @@ class OrderItem(models.Model):
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     def line_total(self): return self.unit_price * self.quantity
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_line_total()
+        return instance
+
+    def remember_line_total(self):
+        # Estado persistido, para que las señales ajusten Order.total solo por la diferencia
+        if 'unit_price' in self.__dict__ and 'quantity' in self.__dict__:
+            self._stored_line = (self.order_id, self.line_total())
+
+    def save(self, *args, **kwargs):
+        # La fila y el ajuste de Order.total (señal post_save) van en la misma transacción
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class ArchivedOrder(models.Model):
+    """
+    Pedido completado o cancelado que salió de core_order (ver core.archive).
+    Conserva el id original; las líneas van en `items` como listas
+    [product_id, nombre, cantidad, precio unitario, category_id, supplier_id],
+    con el nombre y la categoría/proveedor del producto al archivar.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    # SET_NULL: borrar el cliente no borra ventas que siguen en DailySalesRollup
+    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True, related_name='archived_orders')
+    status = models.CharField(max_length=1, choices=Order.STATUS_CHOICES)
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    items = models.JSONField(default=list)
+    archived = True
+    def __str__(self): return f"Order #{self.id} - {self.customer} (archivado)"
+
+    def lines(self):
+        """Líneas como OrderItem sin guardar (producto con id y nombre), para los mismos templates."""
+        return [OrderItem(order_id=self.id, product=Product(pk=product_id, name=name), quantity=quantity,
+                          unit_price=Decimal(unit_price))
+                for product_id, name, quantity, unit_price, *_ in self.items]
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer', '-created_at'], name='archived_customer_created_idx'),
+            models.Index(fields=['-created_at'], name='archived_created_idx'),
+        ]
+
+
+class DailySalesRollup(models.Model):
+    """
+    Ventas de pedidos completados agregadas por día, categoría y proveedor.
+    Se mantiene en forma incremental (core.reports) y los reportes leen solo esta tabla.
+    """
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='+')
+    supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, related_name='+')
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    def __str__(self): return f"{self.date} {self.category_id}/{self.supplier_id}: {self.revenue}"
+
+    class Meta:
+        constraints = [
+            # También es el índice de los reportes por rango de fechas (date es la primera columna)
+            models.UniqueConstraint(fields=['date', 'category', 'supplier'], name='rollup_day_cat_sup_uniq'),
+        ]
+
+
+class ReorderSuggestion(models.Model):
+    """
+    Resultado de la última corrida de `low_stock_report`: productos cuyo stock
+    cubre menos días que el umbral y cuánto pedirle a su proveedor.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, related_name='+')
+    stock = models.PositiveIntegerField()
+    units_sold = models.PositiveIntegerField()
+    daily_velocity = models.DecimalField(max_digits=12, decimal_places=3)
+    days_of_cover = models.DecimalField(max_digits=10, decimal_places=1)
+    suggested_quantity = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+    def __str__(self): return f"{self.product_id}: pedir {self.suggested_quantity}"
+
+    class Meta:
+        indexes = [
+            # Vista de staff: agrupada por proveedor, lo más urgente primero
+            models.Index(fields=['supplier', 'days_of_cover'], name='reorder_sup_cover_idx'),
+        ]
+
+
+class BulkEditLog(models.Model):
+    """
+    Auditoría de las ediciones masivas (core.bulk): una fila por lote aplicado,
+    con la operación, sus parámetros, cuántas filas cambió y el rango de ids del lote.
+    """
+    run = models.CharField(max_length=32, db_index=True)   # agrupa los lotes de una misma edición
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    target = models.CharField(max_length=20)   # 'product' u 'order'
+    operation = models.CharField(max_length=30)
+    params = models.JSONField(default=dict)
+    batch = models.PositiveIntegerField()
+    count = models.PositiveIntegerField()
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    def __str__(self): return f"{self.target}.{self.operation} #{self.batch}: {self.count} filas"
+
+
+class ProductFacetCount(models.Model):
+    """
+    Conteos de productos sin filtros por faceta (core.facets): category y
+    supplier por id (0 = sin asignar) y price por índice de rango.
+    Se mantienen por diferencias desde las señales de Product.
+    """
+    facet = models.CharField(max_length=10)
+    value = models.IntegerField()
+    count = models.IntegerField(default=0)
+    def __str__(self): return f"{self.facet}={self.value}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['facet', 'value'], name='facet_count_uniq'),
+        ]
@@ -0,0 +1,61 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(updated_at, pk):
+    raw = f"{updated_at.isoformat()}|{pk}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Devuelve (updated_at, id) a partir del cursor opaco enviado por el cliente."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        stamp, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(stamp), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor("Cursor inválido.") from exc
+
+
+def keyset_queryset(qs, cursor=None):
+    """Ordena por (updated_at, id) y descarta lo anterior al cursor."""
+    qs = qs.order_by('updated_at', 'id')
+    if cursor:
+        updated_at, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk))
+    return qs
+
+
+def _page_result(rows, limit):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor(last['updated_at'], last['id'])
+    return rows, encode_cursor(last.updated_at, last.pk)
+
+
+def keyset_page(qs, cursor=None, limit=50):
+    """
+    Paginación por clave (updated_at, id) ascendente: cada página es un
+    WHERE (updated_at, id) > (cursor) ... LIMIT n, con costo constante
+    sin importar qué tan profunda sea la página (a diferencia de OFFSET).
+    Acepta querysets de modelos o de .values() (que deben incluir updated_at e id).
+    Devuelve (filas, cursor_siguiente o None).
+    """
+    qs = keyset_queryset(qs, cursor)
+    return _page_result(list(qs[:limit + 1]), limit)
+
+
+async def akeyset_page(qs, cursor=None, limit=50):
+    """Versión asíncrona de keyset_page (ORM async)."""
+    qs = keyset_queryset(qs, cursor)
+    return _page_result([row async for row in qs[:limit + 1]], limit)
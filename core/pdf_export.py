@@ -0,0 +1,132 @@
+"""
+Exportación del catálogo a PDF como trabajo en segundo plano.
+
+La petición solo encola el trabajo; un pool local de hilos genera el PDF con
+consultas por bloques en un archivo temporal y lo mueve a EXPORT_ROOT. El id
+del trabajo es la huella de la versión del catálogo (último updated_at,
+cantidad de productos y stock total, que los pedidos cambian sin tocar
+updated_at), así que pedidos repetidos sobre un catálogo sin
+cambios reutilizan el mismo archivo y nunca se generan dos veces a la vez.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Sum
+from reportlab.pdfgen import canvas
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, READY, FAILED = 'pending', 'running', 'ready', 'failed'
+
+
+def export_root():
+    return Path(getattr(settings, 'EXPORT_ROOT', Path(settings.MEDIA_ROOT) / 'exports'))
+
+
+def catalog_version():
+    """Huella del catálogo: cambia con cualquier alta, edición o baja de productos y con los pedidos."""
+    stats = Product.objects.aggregate(last=Max('updated_at'), count=Count('id'), stock=Sum('stock'))
+    last = stats['last'].isoformat() if stats['last'] else '-'
+    return hashlib.sha1(f"{last}|{stats['count']}|{stats['stock']}".encode()).hexdigest()[:20]
+
+
+def artifact_path(job_id):
+    return export_root() / f'productos-{job_id}.pdf'
+
+
+def render_products_pdf(target, chunk_size=2000):
+    """Dibuja el listado leyendo tuplas por bloques (sin instanciar modelos)."""
+    pdf = canvas.Canvas(target)
+    y = 800
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.drawString(100, y, "Listado de productos")
+    y -= 30
+    pdf.setFont("Helvetica", 10)
+    rows = Product.objects.order_by('id').values_list('id', 'name', 'price', 'stock').iterator(chunk_size=chunk_size)
+    for pk, name, price, stock in rows:
+        pdf.drawString(50, y, f"{pk} - {name} - {price} - Stock: {stock}")
+        y -= 15
+        if y < 50:
+            pdf.showPage()
+            y = 800
+            pdf.setFont("Helvetica", 10)
+    pdf.showPage()
+    pdf.save()
+
+
+class PdfExportJobs:
+    """Registro de trabajos del proceso y pool de hilos que los ejecuta."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}   # job_id -> {'status': ..., 'error': ...}
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            workers = getattr(settings, 'PDF_EXPORT_WORKERS', 1)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pdf-export')
+        return self._executor
+
+    def status(self, job_id):
+        if artifact_path(job_id).exists():
+            return {'status': READY, 'error': None}
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def submit(self, job_id):
+        """Encola la generación de job_id si no está lista ni en curso; devuelve su estado."""
+        if artifact_path(job_id).exists():
+            return self.status(job_id)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job and job['status'] in (PENDING, RUNNING):
+                return dict(job)
+            self._jobs[job_id] = {'status': PENDING, 'error': None}
+        if getattr(settings, 'PDF_EXPORT_WORKERS', 1) == 0:
+            self._run(job_id, close_connection=False)   # modo síncrono (tests / depuración)
+        else:
+            self._get_executor().submit(self._run, job_id)
+        return self.status(job_id)
+
+    def _set(self, job_id, status, error=None):
+        with self._lock:
+            self._jobs[job_id] = {'status': status, 'error': error}
+
+    def _run(self, job_id, close_connection=True):
+        self._set(job_id, RUNNING)
+        root = export_root()
+        try:
+            root.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=root, suffix='.pdf.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as fh:
+                    render_products_pdf(fh)
+                os.replace(tmp, artifact_path(job_id))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            self._set(job_id, READY)
+            # Las versiones anteriores del catálogo ya no se van a pedir
+            for old in root.glob('productos-*.pdf'):
+                if old != artifact_path(job_id):
+                    old.unlink(missing_ok=True)
+        except Exception as exc:
+            logger.exception("Falló la exportación PDF %s", job_id)
+            self._set(job_id, FAILED, str(exc))
+        finally:
+            if close_connection:
+                connection.close()
+
+
+jobs = PdfExportJobs()
@@ -0,0 +1,147 @@
+"""
+Reportes de ventas sobre DailySalesRollup.
+
+La tabla guarda unidades e ingresos de los pedidos completados por (día,
+categoría, proveedor) y se actualiza por diferencias cuando un pedido entra o
+sale del estado 'C' o cambian las líneas de un pedido completado. Los
+reportes solo agregan filas de la tabla: el costo depende del rango de días
+pedido, no del historial de pedidos.
+
+El día es la fecha local (TIME_ZONE) de Order.created_at; la categoría y el
+proveedor son los del producto al momento de registrar la venta. Los pedidos
+archivados (core.archive) siguen contando: sus ventas no se restan al
+archivarlos y rebuild_rollups() las lee de ArchivedOrder.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedOrder, DailySalesRollup, OrderItem
+
+COMPLETED = 'C'
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+# Agrupaciones del reporte: nombre público -> columnas de DailySalesRollup
+GROUPINGS = {
+    'dia': ('date',),
+    'categoria': ('category', 'category__name'),
+    'proveedor': ('supplier', 'supplier__name'),
+}
+DEFAULT_DAYS = 30
+
+
+def _aggregate(items):
+    return (items.values(day=TruncDate('order__created_at'), cat=F('product__category'), sup=F('product__supplier'))
+            .annotate(units=Sum('quantity'), revenue=Sum(F('unit_price') * F('quantity'), output_field=MONEY))
+            .order_by())
+
+
+def _sales(items):
+    return {(r['day'], r['cat'], r['sup']): [r['units'], r['revenue']] for r in _aggregate(items)}
+
+
+def order_sales(order_ids, completed_only=False):
+    """
+    Ventas de los pedidos dados en una sola consulta agregada:
+    {(día, category_id, supplier_id): [unidades, ingresos]}.
+    """
+    items = OrderItem.objects.filter(order_id__in=order_ids)
+    if completed_only:
+        items = items.filter(order__status=COMPLETED)
+    return _sales(items)
+
+
+def item_sales(item_pk):
+    """Aporte de una línea a los rollups según su estado en la base (vacío si su pedido no está completado)."""
+    return _sales(OrderItem.objects.filter(pk=item_pk, order__status=COMPLETED))
+
+
+def sales_delta(before, after):
+    """Diferencia after - before de dos resultados de order_sales (sin claves en cero)."""
+    delta = defaultdict(lambda: [0, 0])
+    for sign, sales in ((-1, before), (1, after)):
+        for key, (units, revenue) in sales.items():
+            delta[key][0] += sign * units
+            delta[key][1] += sign * revenue
+    return {key: value for key, value in delta.items() if any(value)}
+
+
+def record_sales(sales, sign=1):
+    """Suma (o resta, sign=-1) las ventas a DailySalesRollup: un UPDATE por clave, INSERT si no existe."""
+    for (day, category_id, supplier_id), (units, revenue) in sales.items():
+        units, revenue = sign * units, sign * revenue
+        row = DailySalesRollup.objects.filter(date=day, category_id=category_id, supplier_id=supplier_id)
+        if row.update(units=F('units') + units, revenue=F('revenue') + revenue):
+            continue
+        try:
+            with transaction.atomic():
+                DailySalesRollup.objects.create(date=day, category_id=category_id, supplier_id=supplier_id,
+                                                units=units, revenue=revenue)
+        except IntegrityError:
+            # Otra transacción creó la fila entre el UPDATE y el INSERT
+            row.update(units=F('units') + units, revenue=F('revenue') + revenue)
+
+
+def archived_sales(orders):
+    """Ventas de pedidos archivados (queryset de ArchivedOrder), leídas de sus líneas en JSON; mismo formato que order_sales."""
+    sales = defaultdict(lambda: [0, Decimal('0')])
+    for created_at, items in orders.values_list('created_at', 'items').iterator():
+        day = timezone.localdate(created_at)
+        for _, _, quantity, unit_price, category_id, supplier_id in items:
+            sales[day, category_id, supplier_id][0] += quantity
+            sales[day, category_id, supplier_id][1] += Decimal(unit_price) * quantity
+    return dict(sales)
+
+
+def rebuild_rollups(batch_size=1000):
+    """Recalcula la tabla completa desde los pedidos completados, también los archivados. Devuelve la cantidad de filas."""
+    sales = defaultdict(lambda: [0, 0])
+    for source in (_sales(OrderItem.objects.filter(order__status=COMPLETED)),
+                   archived_sales(ArchivedOrder.objects.filter(status=COMPLETED))):
+        for key, (units, revenue) in source.items():
+            sales[key][0] += units
+            sales[key][1] += revenue
+    with transaction.atomic():
+        DailySalesRollup.objects.all().delete()
+        rows = [DailySalesRollup(date=day, category_id=cat, supplier_id=sup, units=units, revenue=revenue)
+                for (day, cat, sup), (units, revenue) in sales.items()]
+        DailySalesRollup.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+# ---------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------
+def report_range(params):
+    """(desde, hasta) de los parámetros GET; por defecto los últimos DEFAULT_DAYS días. ValueError si no son fechas."""
+    try:
+        end = date.fromisoformat(params['hasta']) if params.get('hasta') else timezone.localdate()
+        start = date.fromisoformat(params['desde']) if params.get('desde') else end - timedelta(days=DEFAULT_DAYS - 1)
+    except ValueError:
+        raise ValueError("Las fechas deben tener el formato AAAA-MM-DD.")
+    if start > end:
+        raise ValueError("'desde' no puede ser posterior a 'hasta'.")
+    return start, end
+
+
+def sales_report(start, end, group_by=('dia',)):
+    """Filas agregadas de DailySalesRollup entre start y end (inclusive) según las agrupaciones pedidas."""
+    unknown = [g for g in group_by if g not in GROUPINGS]
+    if unknown:
+        raise ValueError(f"Agrupación inválida: {', '.join(unknown)}. Opciones: {', '.join(GROUPINGS)}.")
+    columns = [c for g in group_by for c in GROUPINGS[g]]
+    return list(DailySalesRollup.objects.filter(date__range=(start, end))
+                .values(*columns)
+                .annotate(units=Sum('units'), revenue=Sum('revenue'))
+                .order_by(*columns))
+
+
+def sales_totals(start, end):
+    totals = DailySalesRollup.objects.filter(date__range=(start, end)).aggregate(units=Sum('units'),
+                                                                                 revenue=Sum('revenue'))
+    return {'units': totals['units'] or 0, 'revenue': totals['revenue'] or Decimal('0.00')}
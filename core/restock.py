@@ -0,0 +1,73 @@
+"""
+Detección de productos con poco stock y sugerencias de reposición.
+
+La velocidad de venta sale de una sola consulta agregada sobre OrderItem
+(pedidos no cancelados de la ventana), que ya descarta en SQL (HAVING) los
+productos con cobertura suficiente. Las filas se leen como tuplas por bloques
+y el resultado reemplaza el contenido de ReorderSuggestion, que es lo que
+consulta la vista de staff.
+"""
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import OrderItem, ReorderSuggestion
+
+CANCELED = 'X'
+
+
+def low_stock_rows(days, window, now=None, chunk_size=2000):
+    """
+    Itera (product_id, supplier_id, stock, unidades vendidas en la ventana)
+    de los productos cuyo stock cubre menos de `days` días de venta.
+    stock / (vendidas / window) < days  <=>  vendidas * days > stock * window
+    """
+    since = (now or timezone.now()) - timedelta(days=window)
+    return (OrderItem.objects.filter(order__created_at__gte=since)
+            .exclude(order__status=CANCELED)
+            .values('product', 'product__supplier', 'product__stock')
+            .annotate(sold=Sum('quantity'), demand=Sum('quantity') * days)
+            .filter(demand__gt=F('product__stock') * window)
+            .order_by()
+            .values_list('product', 'product__supplier', 'product__stock', 'sold')
+            .iterator(chunk_size=chunk_size))
+
+
+def suggest(stock, sold, window, target_days):
+    """(velocidad diaria, días de cobertura, cantidad a pedir para cubrir target_days)."""
+    velocity = Decimal(sold) / window
+    cover = Decimal(stock) / velocity
+    quantity = max(math.ceil(velocity * target_days) - stock, 0)
+    return velocity.quantize(Decimal('0.001')), cover.quantize(Decimal('0.1')), quantity
+
+
+def compute_reorder_suggestions(days=14, window=30, target_days=30, batch_size=1000, now=None):
+    """Recalcula ReorderSuggestion en una transacción. Devuelve la cantidad de productos marcados."""
+    now = now or timezone.now()
+    count = 0
+    with transaction.atomic():
+        ReorderSuggestion.objects.all().delete()
+        batch = []
+        for product_id, supplier_id, stock, sold in low_stock_rows(days, window, now):
+            velocity, cover, quantity = suggest(stock, sold, window, target_days)
+            batch.append(ReorderSuggestion(product_id=product_id, supplier_id=supplier_id, stock=stock,
+                                           units_sold=sold, daily_velocity=velocity, days_of_cover=cover,
+                                           suggested_quantity=quantity, computed_at=now))
+            if len(batch) >= batch_size:
+                ReorderSuggestion.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        ReorderSuggestion.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def supplier_totals():
+    """Resumen por proveedor de la última corrida: (supplier__name, productos, unidades a pedir)."""
+    return list(ReorderSuggestion.objects.values('supplier', 'supplier__name')
+                .annotate(products=Count('id'), units=Sum('suggested_quantity'))
+                .order_by('supplier__name'))
@@ -0,0 +1,162 @@
+"""
+Búsqueda de productos por texto completo.
+
+El backend se elige con settings.PRODUCT_SEARCH_BACKEND (ruta a la clase);
+si no está definido se usa SQLiteFTS5Backend sobre SQLite y, en cualquier
+otro motor, IcontainsBackend (un futuro PostgresBackend con tsvector solo
+tiene que implementar la misma interfaz).
+"""
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Product
+
+FTS_TABLE = 'core_product_fts'
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(q):
+    return _TERM_RE.findall(q or '')
+
+
+class SearchBackend:
+    """Interfaz común de los backends de búsqueda de productos."""
+
+    def filter(self, qs, q):
+        """Restringe qs a los productos que coinciden con q (sin cambiar el orden)."""
+        raise NotImplementedError
+
+    def search(self, q, limit=20):
+        """Devuelve hasta `limit` productos ordenados por relevancia."""
+        raise NotImplementedError
+
+    async def asearch(self, q, limit=20):
+        # Django no tiene cursores crudos asíncronos: una única ida al hilo de la BD.
+        return await sync_to_async(self.search)(q, limit)
+
+    def index(self, product):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def index_many(self, ids):
+        """Reindexa de una vez los productos dados (tras bulk_create/update, que no disparan señales)."""
+        pass
+
+    def rebuild(self):
+        """Reconstruye el índice completo; devuelve la cantidad de productos indexados."""
+        return 0
+
+
+class IcontainsBackend(SearchBackend):
+    """Backend sin índice: LIKE '%q%' sobre nombre, descripción y SKU."""
+
+    def filter(self, qs, q):
+        from django.db.models import Q
+        terms = search_terms(q)
+        if not terms:
+            return qs.none()
+        for term in terms:
+            qs = qs.filter(Q(name__icontains=term) | Q(description__icontains=term) | Q(sku__icontains=term))
+        return qs
+
+    def search(self, q, limit=20):
+        return list(self.filter(Product.objects.all(), q).order_by('name')[:limit])
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Tabla virtual FTS5 (rowid = Product.id) con ranking BM25 y coincidencia por
+    prefijo. La tabla la crea la migración 0002; se mantiene sincronizada con
+    las señales de core/signals.py y se reconstruye con `rebuild_search_index`.
+    """
+    # Pesos BM25 por columna: name, description, sku
+    weights = (10.0, 1.0, 5.0)
+
+    def match_expression(self, q):
+        # Cada término se cita (evita la sintaxis de consulta de FTS5) y se busca por prefijo.
+        terms = search_terms(q)
+        return ' '.join('"%s"*' % t.replace('"', '""') for t in terms)
+
+    def filter(self, qs, q):
+        match = self.match_expression(q)
+        if not match:
+            return qs.none()
+        sql = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        return qs.filter(id__in=RawSQL(sql, (match,)))
+
+    def ranked_ids(self, q, limit=20):
+        match = self.match_expression(q)
+        if not match:
+            return []
+        weights = ', '.join(str(w) for w in self.weights)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s',
+                (match, limit),
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def search(self, q, limit=20):
+        ids = self.ranked_ids(q, limit)
+        found = Product.objects.in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
+
+    def index(self, product):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (product.pk,))
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description, sku) VALUES (%s, %s, %s, %s)',
+                (product.pk, product.name, product.description, product.sku or ''),
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (pk,))
+
+    def index_many(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        table = Product._meta.db_table
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', ids)
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description, sku) '
+                f"SELECT id, name, description, COALESCE(sku, '') FROM {table} WHERE id IN ({placeholders})",
+                ids,
+            )
+
+    def rebuild(self):
+        table = Product._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description, sku) '
+                f"SELECT id, name, description, COALESCE(sku, '') FROM {table}"
+            )
+            return cursor.rowcount
+
+
+_backend = None
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'sqlite':
+            _backend = SQLiteFTS5Backend()
+        else:
+            _backend = IcontainsBackend()
+    return _backend
@@ -14,4 +14,51 @@ class ProductAPISerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = ['id', 'sku', 'name', 'category', 'supplier', 'price', 'stock']
\ No newline at end of file
+        fields = ['id', 'sku', 'name', 'category', 'supplier', 'price', 'stock']
+
+    def __init__(self, *args, **kwargs):
+        # Sparse fieldsets: ProductAPISerializer(qs, many=True, fields=['id', 'name'])
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+# Serializador de solo lectura para listados: arma los dicts directamente desde
+# filas .values(), sin instanciar modelos ni pasar por los Field de DRF.
+# Debe producir exactamente la misma salida que ProductAPISerializer
+# (ver ProductFastSerializerParityTests en core/tests.py).
+class ProductFastSerializer:
+    # campo de salida -> columna de .values()
+    columns = {
+        'id': 'id',
+        'sku': 'sku',
+        'name': 'name',
+        'category': 'category__name',
+        'supplier': 'supplier__name',
+        'price': 'price',
+        'stock': 'stock',
+    }
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.fields = [f for f in ProductAPISerializer.Meta.fields if fields is None or f in fields]
+
+    @classmethod
+    def values(cls, qs, fields=None, extra=()):
+        """Queryset .values() con solo las columnas necesarias para `fields`."""
+        wanted = [f for f in ProductAPISerializer.Meta.fields if fields is None or f in fields]
+        return qs.values(*[cls.columns[f] for f in wanted], *extra)
+
+    @property
+    def data(self):
+        pairs = [(f, self.columns[f]) for f in self.fields]
+        price = 'price' in self.fields
+        out = []
+        for row in self.rows:
+            item = {f: row[col] for f, col in pairs}
+            if price:
+                item['price'] = str(item['price'])
+            out.append(item)
+        return out
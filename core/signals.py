@@ -0,0 +1,220 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import Product, Category, Supplier, Order, OrderItem
+from .archive import archiving
+from .cache import bump_catalog_generation, bump_taxonomy_generation
+from .reports import COMPLETED, item_sales, order_sales, record_sales, sales_delta
+from .search import get_search_backend
+from .stock import CANCELED, release_order_stock
+from .facets import facet_values, move_facet_count, update_facet_counts
+
+
+# ---------------------------------------------------------------------
+# Índice de búsqueda de productos
+# ---------------------------------------------------------------------
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+# ---------------------------------------------------------------------
+# Invalidación de la caché del catálogo
+# ---------------------------------------------------------------------
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Supplier)
+def invalidate_catalog_cache(sender, **kwargs):
+    # Se invalida ya y otra vez al confirmar la transacción, para que una lectura
+    # concurrente no deje cacheado el estado previo bajo la generación nueva.
+    bump_catalog_generation()
+    transaction.on_commit(bump_catalog_generation)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Supplier)
+def invalidate_taxonomy_fragments(sender, **kwargs):
+    # Menú de categorías y filtros del listado (fragmentos de template cacheados)
+    bump_taxonomy_generation()
+    transaction.on_commit(bump_taxonomy_generation)
+
+
+# ---------------------------------------------------------------------
+# Product.updated_at como marcador de cambios (ETag / Last-Modified)
+# ---------------------------------------------------------------------
+# La API y los listados muestran el nombre de la categoría y del proveedor:
+# renombrarlos o borrarlos (SET_NULL no pasa por save()) cambia sus productos.
+# Guardar sin cambiar el nombre no los toca (no reordena el listado por
+# -updated_at ni corre los cursores de la API).
+def _name_changed(instance, created, raw):
+    # Sin nombre recordado (instancia que no salió de la base) se asume que cambió
+    changed = not (created or raw) and getattr(instance, '_stored_name', None) != instance.name
+    instance.remember_name()
+    return changed
+
+
+@receiver(post_save, sender=Category)
+def touch_category_products(sender, instance, created=False, raw=False, **kwargs):
+    if _name_changed(instance, created, raw):
+        Product.objects.filter(category=instance).update(updated_at=Now())
+
+
+@receiver(post_save, sender=Supplier)
+def touch_supplier_products(sender, instance, created=False, raw=False, **kwargs):
+    if _name_changed(instance, created, raw):
+        Product.objects.filter(supplier=instance).update(updated_at=Now())
+
+
+@receiver(pre_delete, sender=Category)
+def category_products_losing_category(sender, instance, **kwargs):
+    Product.objects.filter(category=instance).update(updated_at=Now())
+
+
+@receiver(pre_delete, sender=Supplier)
+def supplier_products_losing_supplier(sender, instance, **kwargs):
+    Product.objects.filter(supplier=instance).update(updated_at=Now())
+
+
+# ---------------------------------------------------------------------
+# Conteos base de facetas (ProductFacetCount)
+# ---------------------------------------------------------------------
+@receiver(pre_save, sender=Product)
+def product_facets_saving(sender, instance, raw=False, **kwargs):
+    # Instancia que no salió de la base (o con campos diferidos): se leen los valores guardados
+    if not raw and instance.pk and getattr(instance, '_stored_facets', None) is None:
+        instance._stored_facets = (Product.objects.filter(pk=instance.pk)
+                                   .values_list('category_id', 'supplier_id', 'price').first())
+
+
+@receiver(post_save, sender=Product)
+def product_facets_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    stored = None if created else getattr(instance, '_stored_facets', None)
+    update_facet_counts(stored and facet_values(*stored),
+                        facet_values(instance.category_id, instance.supplier_id, instance.price))
+    instance.remember_facets()
+
+
+@receiver(post_delete, sender=Product)
+def product_facets_deleted(sender, instance, **kwargs):
+    stored = getattr(instance, '_stored_facets', None) or (instance.category_id, instance.supplier_id, instance.price)
+    update_facet_counts(facet_values(*stored), None)
+
+
+@receiver(pre_delete, sender=Category)
+def category_facets_deleting(sender, instance, **kwargs):
+    # SET_NULL actualiza los productos sin pasar por sus señales
+    move_facet_count('category', instance.pk)
+
+
+@receiver(pre_delete, sender=Supplier)
+def supplier_facets_deleting(sender, instance, **kwargs):
+    move_facet_count('supplier', instance.pk)
+
+
+# ---------------------------------------------------------------------
+# Order.total incremental
+# ---------------------------------------------------------------------
+def adjust_order_total(order_id, delta):
+    if order_id and delta:
+        Order.objects.filter(pk=order_id).update(total=F('total') + delta)
+
+
+@receiver(post_save, sender=OrderItem)
+def order_item_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_order, old_line = getattr(instance, '_stored_line', (None, 0))
+    new_line = instance.line_total()
+    if old_order == instance.order_id:
+        adjust_order_total(instance.order_id, new_line - old_line)
+    else:
+        adjust_order_total(old_order, -old_line)
+        adjust_order_total(instance.order_id, new_line)
+    instance.remember_line_total()
+
+
+@receiver(post_delete, sender=OrderItem)
+def order_item_deleted(sender, instance, **kwargs):
+    # Se ejecuta dentro de la transacción del borrado (también en cascada y queryset.delete())
+    if archiving.get():
+        return
+    old_order, old_line = getattr(instance, '_stored_line', (instance.order_id, instance.line_total()))
+    adjust_order_total(old_order, -old_line)
+
+
+# ---------------------------------------------------------------------
+# Rollups de ventas (DailySalesRollup)
+# ---------------------------------------------------------------------
+@receiver(post_save, sender=Order)
+def order_status_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    was_completed = getattr(instance, '_stored_status', None) == COMPLETED
+    if was_completed != (instance.status == COMPLETED):
+        record_sales(order_sales([instance.pk]), sign=-1 if was_completed else 1)
+    if instance.status == CANCELED and getattr(instance, '_stored_status', None) != CANCELED:
+        release_order_stock([instance.pk])   # solo si place_order había reservado
+    instance.remember_status()
+
+
+@receiver(pre_delete, sender=Order)
+def completed_order_deleting(sender, instance, **kwargs):
+    # Las líneas siguen en la base: se resta el pedido entero en una consulta.
+    # Un pedido que se archiva sigue contando en los reportes (core/archive.py)
+    if not archiving.get() and getattr(instance, '_stored_status', instance.status) == COMPLETED:
+        record_sales(order_sales([instance.pk]), sign=-1)
+
+
+def _may_affect_sales(instance):
+    # Línea de un pedido en memoria que no está completado y no cambia de pedido: nada que mover
+    stored_order = getattr(instance, '_stored_line', (None, 0))[0]
+    return not (stored_order in (None, instance.order_id) and OrderItem.order.is_cached(instance)
+                and instance.order.status != COMPLETED)
+
+
+@receiver(pre_save, sender=OrderItem)
+def order_item_saving(sender, instance, raw=False, **kwargs):
+    if not raw and _may_affect_sales(instance):
+        instance._sales_before = item_sales(instance.pk) if instance.pk else {}
+
+
+@receiver(post_save, sender=OrderItem)
+def order_item_sales_saved(sender, instance, raw=False, **kwargs):
+    before = instance.__dict__.pop('_sales_before', None)
+    if before is not None:
+        record_sales(sales_delta(before, item_sales(instance.pk)))
+
+
+def _deleted_directly(origin):
+    # En un borrado en cascada el origen es el pedido (o su cliente): lo resuelve completed_order_deleting
+    return isinstance(origin, OrderItem) or getattr(origin, 'model', None) is OrderItem
+
+
+@receiver(pre_delete, sender=OrderItem)
+def order_item_deleting(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(origin) and _may_affect_sales(instance):
+        instance._sales_before = item_sales(instance.pk)
+
+
+@receiver(post_delete, sender=OrderItem)
+def order_item_sales_deleted(sender, instance, **kwargs):
+    before = instance.__dict__.pop('_sales_before', None)
+    if before:
+        record_sales(before, sign=-1)
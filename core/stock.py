@@ -0,0 +1,147 @@
+"""
+Reserva de stock para pedidos.
+
+El descuento se hace con un único UPDATE condicional por pedido:
+
+    UPDATE core_product
+       SET stock = stock - CASE id WHEN 1 THEN 2 WHEN 7 THEN 1 END
+     WHERE id IN (1, 7) AND stock >= CASE id WHEN 1 THEN 2 WHEN 7 THEN 1 END
+
+Si alguna línea no tiene stock suficiente la fila no se actualiza, la cantidad
+de filas afectadas no coincide y la transacción completa se revierte. No hace
+falta ningún lock global: la base serializa solo las filas en conflicto.
+
+place_order arma el pedido completo en pocas consultas sin importar la
+cantidad de líneas: los productos se leen con un solo in_bulk (de ahí sale el
+precio unitario), las líneas se insertan con un bulk_create y Order.total se
+calcula en memoria. bulk_create no dispara las señales de OrderItem, así que
+el total y los rollups de ventas se resuelven acá.
+
+Los UPDATE de stock solo tocan `stock`: ni updated_at ni la generación del
+catálogo. Un pedido no reordena el listado (-updated_at) ni corre los cursores
+de la API; al confirmarse la transacción sube la generación de stock
+(core/cache.py), que descarta las páginas cacheadas del listado y los
+validadores del listado y la API, cuyos ETags suman SUM(stock). El ETag del
+detalle incluye el stock del producto.
+
+Los pedidos creados con place_order quedan con stock_reserved; al cancelarlos
+(Order.save o update_order_status) release_order_stock devuelve las cantidades
+una sola vez. Los pedidos armados a mano en el admin no reservan ni devuelven.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .cache import bump_stock_generation
+from .models import Product, Order, OrderItem
+from .reports import COMPLETED, order_sales, record_sales
+
+CANCELED = 'X'
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Stock insuficiente para los productos: {', '.join(map(str, self.product_ids))}")
+
+
+class UnknownProducts(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"No existen los productos: {', '.join(map(str, self.product_ids))}")
+
+
+class _Shortage(Exception):
+    pass
+
+
+def _quantities(lines):
+    """Suma las cantidades por producto: [(product_id, qty), ...] -> {product_id: qty}."""
+    totals = Counter()
+    for product_id, quantity in lines:
+        if quantity <= 0:
+            raise ValueError("La cantidad debe ser mayor que 0.")
+        totals[product_id] += quantity
+    return dict(totals)
+
+
+def _per_product(quantities):
+    return Case(*[When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()],
+                output_field=IntegerField())
+
+
+def reserve_stock(lines):
+    """
+    Descuenta el stock de todas las líneas en un solo UPDATE condicional.
+    Lanza InsufficientStock (y revierte todo) si alguna no alcanza.
+    """
+    quantities = _quantities(lines)
+    if not quantities:
+        return
+    delta = _per_product(quantities)
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                updated = (Product.objects
+                           .filter(pk__in=quantities.keys(), stock__gte=delta)
+                           .update(stock=F('stock') - delta))
+                if updated != len(quantities):
+                    raise _Shortage
+                transaction.on_commit(bump_stock_generation)
+        except _Shortage:
+            # El UPDATE ya se revirtió: las filas que cumplen la condición son las que alcanzan
+            available = Product.objects.filter(pk__in=quantities.keys(), stock__gte=delta)
+            raise InsufficientStock(set(quantities) - set(available.values_list('pk', flat=True)))
+
+
+def release_stock(lines):
+    """Devuelve al stock las cantidades de las líneas."""
+    quantities = _quantities(lines)
+    if not quantities:
+        return
+    Product.objects.filter(pk__in=quantities.keys()).update(stock=F('stock') + _per_product(quantities))
+    transaction.on_commit(bump_stock_generation)
+
+
+@transaction.atomic
+def release_order_stock(order_ids):
+    """Devuelve el stock reservado por los pedidos dados (al cancelarlos). Devuelve los pedidos liberados."""
+    reserved = list(Order.objects.filter(pk__in=order_ids, stock_reserved=True)
+                    .select_for_update().values_list('pk', flat=True))
+    if reserved:
+        release_stock(OrderItem.objects.filter(order_id__in=reserved).values_list('product_id', 'quantity'))
+        Order.objects.filter(pk__in=reserved).update(stock_reserved=False)
+    return len(reserved)
+
+
+@transaction.atomic
+def place_order(customer, lines, status='P'):
+    """
+    Crea un pedido con sus líneas reservando el stock en la misma transacción.
+    `lines` es una lista de (producto o id, cantidad); las cantidades de un mismo
+    producto se suman en una línea y el precio unitario es el actual del producto.
+    Lanza UnknownProducts o InsufficientStock (sin crear nada) si corresponde.
+    """
+    quantities = _quantities((getattr(product, 'pk', product), quantity) for product, quantity in lines)
+    if not quantities:
+        raise ValueError("El pedido no tiene líneas.")
+    products = Product.objects.in_bulk(list(quantities))
+    if len(products) != len(quantities):
+        raise UnknownProducts(set(quantities) - set(products))
+    reserve_stock(quantities.items())
+    items = [OrderItem(product_id=pk, quantity=quantity, unit_price=products[pk].price)
+             for pk, quantity in quantities.items()]
+    # Se crea pendiente: las líneas todavía no existen cuando corre la señal de rollups
+    order = Order.objects.create(customer=customer, total=sum(item.line_total() for item in items),
+                                 stock_reserved=True)
+    for item in items:
+        item.order = order
+    OrderItem.objects.bulk_create(items)
+    if status != order.status:
+        Order.objects.filter(pk=order.pk).update(status=status)
+        order.status = status
+        if status == COMPLETED:
+            record_sales(order_sales([order.pk]))
+    order.remember_status()
+    return order
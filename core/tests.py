@@ -1,3 +1,1324 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, OperationalError
+from django.test import Client, TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import cache as catalog_cache
+from . import async_views
+from . import pdf_export
+from .db import sqlite_pragmas
+from .bench import page_transfer, seed_orders, seed_products
+from .checks import check_static_manifest, check_static_references
+from .archive import archivable_orders, archive_orders
+from .bulk import update_products, update_order_status
+from .facets import base_counts, facet_counts, rebuild_facet_counts
+from .models import (Category, Supplier, Product, Customer, Order, OrderItem, ArchivedOrder, DailySalesRollup,
+                     ReorderSuggestion, BulkEditLog)
+from .importer import import_products
+from .metrics import MetricsRegistry, registry as metrics_registry
+from .reports import rebuild_rollups
+from .restock import compute_reorder_suggestions
+from .search import get_search_backend
+from .serializers import ProductAPISerializer, ProductFastSerializer
+from .stock import InsufficientStock, reserve_stock, release_stock, place_order
+from .views import ProductListView, OrderListView
+
+
+class CatalogTestMixin:
+    """Catálogo mínimo y usuarios (staff / cliente) compartidos por los tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.user = User.objects.create_user('cliente', password='x')
+        cls.cat_a = Category.objects.create(name='Bebidas')
+        cls.cat_b = Category.objects.create(name='Snacks')
+        cls.sup = Supplier.objects.create(name='Distribuidora')
+        cls.p1 = Product.objects.create(sku='A1', name='Agua mineral', category=cls.cat_a,
+                                        supplier=cls.sup, price=Decimal('1.50'), stock=10)
+        cls.p2 = Product.objects.create(sku=None, name='Papas fritas', category=cls.cat_b,
+                                        price=Decimal('3.25'), stock=5)
+        cls.p3 = Product.objects.create(sku='A3', name='Agua saborizada', category=cls.cat_a,
+                                        supplier=cls.sup, price=Decimal('2.00'), stock=0)
+
+    def setUp(self):
+        super().setUp()
+        catalog_cache.get_cache().clear()
+        catalog_cache.stats.reset()
+        catalog_cache.fragment_cache().clear()
+
+
+
+class QueryBudgetMixin:
+    """
+    Presupuesto de consultas: la cantidad de queries de una vista no puede
+    crecer con la cantidad de filas que muestra.
+
+        self.assertConstantQueries(url, add_row, sizes=(1, 5))
+
+    llama a add_row() hasta tener cada tamaño, pide la URL y compara.
+    """
+
+    def count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, url)
+        return len(ctx), ctx
+
+    def assertConstantQueries(self, url, add_row, sizes=(1, 5), params=None, budget=None):
+        self.client.get(url, params or {})   # calienta los fragmentos cacheados (menú y filtros)
+        counts = {}
+        rows = 0
+        for size in sizes:
+            while rows < size:
+                add_row(rows)
+                rows += 1
+            counts[size], ctx = self.count_queries(url, params)
+            if budget is not None:
+                self.assertLessEqual(counts[size], budget, '\n'.join(q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(len(set(counts.values())), 1,
+                         f"{url}: las consultas crecen con las filas {counts}\n"
+                         + '\n'.join(q['sql'] for q in ctx.captured_queries))
+
+
+class ExportCsvTests(CatalogTestMixin, TestCase):
+    def _rows(self, response):
+        body = b''.join(response.streaming_content)
+        if response['Content-Type'] == 'application/gzip':
+            body = gzip.decompress(body)
+        return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+
+    def test_requires_staff(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('core:export_csv'))
+        self.assertRedirects(response, reverse('core:product_list'))
+
+    def test_streams_all_products(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('core:export_csv'))
+        self.assertTrue(response.streaming)
+        rows = self._rows(response)
+        self.assertEqual(rows[0], ['id', 'sku', 'name', 'category', 'supplier', 'price', 'stock'])
+        self.assertEqual(rows[2], [str(self.p2.id), '', 'Papas fritas', 'Snacks', '', '3.25', '5'])
+        self.assertEqual(len(rows), 4)
+
+    def test_filters_and_gzip(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('core:export_csv'),
+                                   {'q': 'agua', 'pmin': '1.75', 'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        rows = self._rows(response)
+        self.assertEqual([r[0] for r in rows[1:]], [str(self.p3.id)])
+
+
+class ApiProductosTests(CatalogTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_walks_every_page_with_cursor(self):
+        url = reverse('core:api_productos')
+        seen = []
+        params = {'limit': 2}
+        while url:
+            data = self.client.get(url, params).json()
+            seen += [p['id'] for p in data['productos']]
+            url, params = data['next'], None
+        self.assertEqual(seen, [self.p1.id, self.p2.id, self.p3.id])
+
+    def test_deep_page_is_constant_query_count(self):
+        first = self.client.get(reverse('core:api_productos'), {'limit': 1}).json()
+        # usuario + una única consulta de página (la sesión sale de la caché)
+        with self.assertNumQueries(2):
+            self.client.get(first['next'])
+
+    def test_sparse_fields_and_filters(self):
+        response = self.client.get(reverse('core:api_productos'),
+                                   {'fields': 'id,price', 'category': self.cat_a.id, 'pmax': '1.99'})
+        self.assertEqual(response.json()['productos'], [{'id': self.p1.id, 'price': '1.50'}])
+
+    def test_non_ascii_digit_ids_are_ignored(self):
+        for value in ('²', '٣'):
+            response = self.client.get(reverse('core:api_productos'), {'category': value})
+            self.assertEqual(len(response.json()['productos']), 3)
+            self.assertEqual(self.client.get(reverse('core:product_list'), {'supplier': value}).status_code, 200)
+
+    def test_rejects_unknown_field_and_bad_cursor(self):
+        url = reverse('core:api_productos')
+        self.assertEqual(self.client.get(url, {'fields': 'id,secret'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': '%%%'}).status_code, 400)
+
+
+class ProductFastSerializerParityTests(CatalogTestMixin, TestCase):
+    """El serializador rápido debe producir exactamente los mismos bytes que el de DRF."""
+
+    def _render(self, data):
+        return JSONRenderer().render({'productos': data})
+
+    def test_full_output_is_byte_identical(self):
+        qs = Product.objects.order_by('id')
+        slow = ProductAPISerializer(qs.select_related('category', 'supplier'), many=True).data
+        fast = ProductFastSerializer(ProductFastSerializer.values(qs)).data
+        self.assertEqual(self._render(fast), self._render(slow))
+
+    def test_sparse_output_is_byte_identical(self):
+        qs = Product.objects.order_by('id')
+        for fields in (['id'], ['price', 'name'], ['category', 'supplier', 'sku']):
+            slow = ProductAPISerializer(qs, many=True, fields=fields).data
+            fast = ProductFastSerializer(ProductFastSerializer.values(qs, fields), fields=fields).data
+            self.assertEqual(self._render(fast), self._render(slow), fields)
+
+
+class ProductSearchTests(CatalogTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_prefix_match_on_name_description_and_sku(self):
+        Product.objects.create(sku='ZX-99', name='Galletitas', description='Con chips de chocolate',
+                               price=Decimal('2.10'))
+        backend = get_search_backend()
+        self.assertEqual([p.name for p in backend.search('choco')], ['Galletitas'])
+        self.assertEqual([p.name for p in backend.search('zx')], ['Galletitas'])
+        self.assertEqual({p.pk for p in backend.search('agu')}, {self.p1.pk, self.p3.pk})
+
+    def test_name_matches_rank_above_description_matches(self):
+        Product.objects.create(name='Vaso', description='Ideal para agua fresca', price=Decimal('4'))
+        ranked = get_search_backend().search('agua')
+        self.assertEqual(ranked[-1].name, 'Vaso')
+
+    def test_index_follows_updates_and_deletes(self):
+        self.p2.name = 'Nachos'
+        self.p2.save()
+        self.assertEqual(get_search_backend().search('papas'), [])
+        self.assertEqual(get_search_backend().search('nachos'), [self.p2])
+        self.p2.delete()
+        self.assertEqual(get_search_backend().search('nachos'), [])
+
+    def test_search_view_and_list_filter_use_index(self):
+        response = self.client.get(reverse('core:search'), {'q': 'saborizada'})
+        self.assertEqual(list(response.context['products']), [self.p3])
+        response = self.client.get(reverse('core:product_list'), {'q': 'agua'})
+        self.assertEqual({p.pk for p in response.context['products']}, {self.p1.pk, self.p3.pk})
+
+    def test_query_syntax_is_escaped(self):
+        backend = get_search_backend()
+        self.assertEqual(backend.search('agua) NEAR("*'), backend.search('agua near'))
+        self.assertEqual({p.pk for p in backend.search('"agua":*')}, {self.p1.pk, self.p3.pk})
+        self.assertEqual(get_search_backend().search('***'), [])
+
+    def test_rebuild_command(self):
+        Product.objects.filter(pk=self.p1.pk).update(name='Soda')  # update() no dispara señales
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(get_search_backend().search('soda'), [Product.objects.get(pk=self.p1.pk)])
+
+
+class ProductListCacheTests(CatalogTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.url = reverse('core:product_list')
+
+    def test_repeated_page_skips_product_queries(self):
+        first = self.client.get(self.url, {'category': self.cat_a.id})
+        # solo el usuario; ni sesión (cached_db), ni COUNT(*), ni consulta de página
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, {'category': str(self.cat_a.id), 'pmin': ''})
+        self.assertEqual(list(second.context['products']), list(first.context['products']))
+        self.assertEqual(second.context['paginator'].count, 2)
+        self.assertEqual(catalog_cache.stats.as_dict(), {'hits': 1, 'misses': 1})
+
+    def test_later_pages_are_cached_separately(self):
+        for i in range(12):
+            Product.objects.create(name=f'Extra {i}', price=Decimal('1'))
+        page2 = [p.pk for p in self.client.get(self.url, {'page': 2}).context['products']]
+        with self.assertNumQueries(1):
+            cached = self.client.get(self.url, {'page': 2})
+        self.assertEqual([p.pk for p in cached.context['products']], page2)
+        self.assertEqual(cached.context['page_obj'].number, 2)
+
+    def test_writes_invalidate_cached_pages(self):
+        self.client.get(self.url)
+        for obj in (self.p1, self.cat_a, self.sup):
+            obj.name = obj.name + ' (editado)'
+            obj.save()
+            response = self.client.get(self.url)
+            self.assertEqual(catalog_cache.stats.hits, 0)
+        self.assertIn('Agua mineral (editado)', [p.name for p in response.context['products']])
+
+
+class TemplateFragmentCacheTests(CatalogTestMixin, TestCase):
+    def get_list(self, username='cliente'):
+        self.client.login(username=username, password='x')
+        catalog_cache.get_cache().clear()   # solo interesa la caché de fragmentos
+        return self.client.get(reverse('core:product_list'))
+
+    def test_product_rows_are_keyed_on_updated_at(self):
+        self.get_list()
+        Product.objects.filter(pk=self.p1.pk).update(name='Agua con gas')   # update() no toca updated_at
+        self.assertContains(self.get_list(), 'Agua mineral')
+        product = Product.objects.get(pk=self.p1.pk)
+        product.name = 'Agua con gas'
+        product.save()
+        response = self.get_list()
+        self.assertContains(response, 'Agua con gas')
+        self.assertNotContains(response, 'Agua mineral')
+
+    def test_staff_actions_stay_outside_the_row_fragment(self):
+        self.assertContains(self.get_list('staff'), 'Editar')
+        self.assertNotContains(self.get_list('cliente'), 'Editar')
+
+    def test_taxonomy_fragments_skip_queries_until_a_category_changes(self):
+        self.assertContains(self.get_list(), 'Bebidas')
+        with CaptureQueriesContext(connection) as ctx:
+            self.get_list()
+        self.assertFalse([q for q in ctx.captured_queries
+                          if 'core_category' in q['sql'] and 'core_product' not in q['sql']])
+        self.cat_a.name = 'Infusiones'
+        self.cat_a.save()
+        response = self.get_list()
+        self.assertContains(response, 'Infusiones')
+        self.assertNotContains(response, 'Bebidas')
+
+
+class ConditionalGetTests(CatalogTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='cliente', password='x')
+
+    def revalidate(self, url, response, params=None):
+        return self.client.get(url, params or {}, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_product_detail_304_from_one_query(self):
+        url = reverse('core:product_detail', args=[self.p1.pk])
+        response = self.client.get(url)
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        with self.assertNumQueries(2):   # usuario + updated_at del producto
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        reserve_stock([(self.p1.pk, 1)])   # no toca updated_at
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        response = self.client.get(url)
+        self.p1.save()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        self.assertEqual(self.client.get(reverse('core:product_detail', args=[999])).status_code, 404)
+
+    def test_product_list_etag_tracks_filters_deletes_and_user(self):
+        url = reverse('core:product_list')
+        params = {'category': self.cat_a.pk}
+        response = self.client.get(url, params)
+        self.assertEqual(self.revalidate(url, response, params).status_code, 304)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)   # otros filtros
+        self.client.login(username='staff', password='x')
+        self.assertEqual(self.revalidate(url, response, params).status_code, 200)   # otro usuario
+        self.client.login(username='cliente', password='x')
+        self.p3.delete()   # no cambia MAX(updated_at), sí el conteo
+        self.assertEqual(self.revalidate(url, response, params).status_code, 200)
+
+    def test_api_304_skips_page_query_and_serializer(self):
+        url = reverse('core:api_productos')
+        response = self.client.get(url, {'fields': 'id,category'})
+        self.assertFalse(response['ETag'].startswith('W/'))
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        with self.assertNumQueries(1):   # solo el usuario: los validadores ya están en caché
+            self.assertEqual(self.revalidate(url, response, {'fields': 'id,category'}).status_code, 304)
+        self.cat_a.name = 'Aguas'
+        self.cat_a.save()   # renombrar la categoría toca updated_at de sus productos
+        fresh = self.revalidate(url, response, {'fields': 'id,category'})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertIn('Aguas', [p['category'] for p in fresh.json()['productos']])
+
+    def test_orders_change_list_and_api_etags(self):
+        customer = Customer.objects.create(user=self.user)
+        api, listing = reverse('core:api_productos'), reverse('core:product_list')
+        api_response = self.client.get(api, {'fields': 'id,stock'})
+        list_response = self.client.get(listing)
+        with self.captureOnCommitCallbacks(execute=True):
+            order = place_order(customer, [(self.p1, 1)])
+        self.assertEqual(self.revalidate(api, api_response, {'fields': 'id,stock'}).status_code, 200)
+        fresh = self.revalidate(listing, list_response)
+        self.assertEqual(fresh.status_code, 200)   # y no sale de la página cacheada
+        self.assertEqual({p.pk: p.stock for p in fresh.context['products']}[self.p1.pk], self.p1.stock - 1)
+        list_response = fresh
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'X'
+            order.save()   # la cancelación devuelve el stock
+        self.assertEqual(self.revalidate(listing, list_response).status_code, 200)
+
+    def test_saving_taxonomy_without_renaming_keeps_etags(self):
+        url = reverse('core:api_productos')
+        response = self.client.get(url)
+        category = Category.objects.get(pk=self.cat_a.pk)
+        category.save()   # mismo nombre: los productos no cambian
+        Supplier.objects.get(pk=self.p1.supplier_id).save()
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+        category.name = 'Aguas'
+        category.save()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+
+class QueryPlanTests(CatalogTestMixin, TestCase):
+    """Los querysets de las vistas no deben recorrer tablas completas (EXPLAIN QUERY PLAN)."""
+    # "SCAN tabla" sin "USING INDEX" es un recorrido completo; las tablas virtuales FTS no cuentan
+    FULL_SCAN = re.compile(r'\bSCAN (core|auth)_\w+\b(?! (USING|VIRTUAL))')
+
+    def _view_queryset(self, view_class, user, params=None):
+        request = RequestFactory().get('/', params or {})
+        request.user = user
+        view = view_class()
+        view.setup(request)
+        return view.get_queryset()
+
+    def assertNoFullScan(self, qs, label):
+        plan = qs.explain()
+        self.assertIsNone(self.FULL_SCAN.search(plan), f"{label}:\n{plan}")
+
+    def test_product_list_querysets(self):
+        cases = ({}, {'category': self.cat_a.id}, {'supplier': self.sup.id},
+                 {'pmin': '1', 'pmax': '5'}, {'q': 'agua'}, {'category': self.cat_a.id, 'pmax': '3'})
+        for params in cases:
+            self.assertNoFullScan(self._view_queryset(ProductListView, self.user, params), params)
+
+    def test_order_list_querysets(self):
+        Customer.objects.create(user=self.user)
+        for user in (self.staff, self.user):
+            self.assertNoFullScan(self._view_queryset(OrderListView, user), user.username)
+
+    def test_sku_and_api_cursor_lookups(self):
+        self.assertNoFullScan(Product.objects.filter(sku='A1'), 'sku')
+        self.assertNoFullScan(Product.objects.order_by('updated_at', 'id')[:50], 'api')
+
+
+class QueryBudgetTests(QueryBudgetMixin, CatalogTestMixin, TestCase):
+    """Ninguna vista de core hace N+1: sus consultas no dependen de las filas mostradas."""
+
+    def setUp(self):
+        super().setUp()
+        root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(EXPORT_ROOT=root, PDF_EXPORT_WORKERS=0))
+        self.customer = Customer.objects.create(user=self.user)
+        self.order = Order.objects.create(customer=self.customer)
+
+    def _add_product(self, i):
+        i = Product.objects.count()
+        Product.objects.create(name=f'Agua extra {i}', sku=f'X{i}', category=self.cat_a,
+                               supplier=self.sup, price=Decimal('1'))
+        catalog_cache.get_cache().clear()
+
+    def _add_order(self, i):
+        user = User.objects.create_user(f'cli{i}', first_name='Cli', last_name=str(i))
+        Order.objects.create(customer=Customer.objects.create(user=user))
+
+    def _add_item(self, i):
+        product = Product.objects.create(name=f'Item {i}', price=Decimal('2'))
+        OrderItem.objects.create(order=self.order, product=product, quantity=1, unit_price=product.price)
+
+    def test_product_views(self):
+        self.client.force_login(self.staff)
+        for name, params in (('product_list', None), ('search', {'q': 'agua'}),
+                             ('api_productos', None), ('export_csv', None), ('export_pdf', None)):
+            self.assertConstantQueries(reverse(f'core:{name}'), self._add_product,
+                                       sizes=(3, 6) if name != 'search' else (1, 4), params=params)
+
+    def test_order_list(self):
+        self.client.force_login(self.staff)
+        self.assertConstantQueries(reverse('core:order_list'), self._add_order, budget=3)
+
+    def test_order_detail(self):
+        self.client.force_login(self.staff)
+        self.assertConstantQueries(reverse('core:order_detail', args=[self.order.pk]), self._add_item,
+                                   budget=5)
+
+
+class OrderTotalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        customer = Customer.objects.create(user=User.objects.create_user('cli'))
+        cls.order = Order.objects.create(customer=customer)
+        cls.other = Order.objects.create(customer=customer)
+        cls.product = Product.objects.create(name='Yerba', price=Decimal('10.00'))
+
+    def total(self, order):
+        return Order.objects.values_list('total', flat=True).get(pk=order.pk)
+
+    def add_item(self, order, quantity=1, unit_price='10.00'):
+        return OrderItem.objects.create(order=order, product=self.product, quantity=quantity,
+                                        unit_price=Decimal(unit_price))
+
+    def test_create_update_delete_adjust_total(self):
+        item = self.add_item(self.order, 2)
+        self.add_item(self.order, 1, '2.50')
+        self.assertEqual(self.total(self.order), Decimal('22.50'))
+        item.quantity = 3
+        item.save()
+        self.assertEqual(self.total(self.order), Decimal('32.50'))
+        item = OrderItem.objects.get(pk=item.pk)
+        item.unit_price = Decimal('5.00')
+        item.save()
+        self.assertEqual(self.total(self.order), Decimal('17.50'))
+        item.delete()
+        self.assertEqual(self.total(self.order), Decimal('2.50'))
+
+    def test_moving_item_and_queryset_delete(self):
+        item = self.add_item(self.order, 4)
+        item.order = self.other
+        item.save()
+        self.assertEqual((self.total(self.order), self.total(self.other)), (Decimal('0'), Decimal('40.00')))
+        self.add_item(self.other, 1)
+        OrderItem.objects.filter(order=self.other).delete()
+        self.assertEqual(self.total(self.other), Decimal('0'))
+
+    def test_saving_stale_instance_keeps_total(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        self.add_item(self.order, 1)
+        stale.status = 'X'
+        stale.save()
+        self.assertEqual(self.total(self.order), Decimal('10.00'))
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'X')
+
+    def test_recompute_command_repairs_drift(self):
+        self.add_item(self.order, 3, '1.10')
+        self.add_item(self.other, 1)
+        Order.objects.update(total=Decimal('999'))  # desvío: update() no dispara señales
+        out = io.StringIO()
+        call_command('recompute_order_totals', '--batch-size', '1', stdout=out)
+        self.assertIn('2 pedidos corregidos', out.getvalue())
+        self.assertEqual((self.total(self.order), self.total(self.other)), (Decimal('3.30'), Decimal('10.00')))
+        out = io.StringIO()
+        call_command('recompute_order_totals', '--dry-run', stdout=out)
+        self.assertIn('0 pedidos desviados', out.getvalue())
+
+
+class SalesRollupTests(CatalogTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.customer = Customer.objects.create(user=cls.user)
+
+    def make_order(self, *lines):
+        order = Order.objects.create(customer=self.customer)
+        for product, quantity in lines:
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, unit_price=product.price)
+        return order
+
+    def rollups(self):
+        return {(r.category_id, r.supplier_id): (r.units, r.revenue)
+                for r in DailySalesRollup.objects.all() if r.units or r.revenue}
+
+    def assertRollups(self, expected):
+        self.assertEqual(self.rollups(), expected)
+        rebuild_rollups()   # el mantenimiento incremental coincide con el recálculo completo
+        self.assertEqual(self.rollups(), expected)
+
+    def test_status_transitions_and_item_changes(self):
+        order = self.make_order((self.p1, 2), (self.p2, 1))
+        self.assertRollups({})
+        order.status = 'C'
+        order.save()
+        bebidas, snacks = (self.cat_a.pk, self.sup.pk), (self.cat_b.pk, None)
+        self.assertRollups({bebidas: (2, Decimal('3.00')), snacks: (1, Decimal('3.25'))})
+        item = order.items.get(product=self.p1)
+        item.quantity = 5
+        item.save()
+        OrderItem.objects.create(order=order, product=self.p3, quantity=1, unit_price=Decimal('2.00'))
+        self.assertRollups({bebidas: (6, Decimal('9.50')), snacks: (1, Decimal('3.25'))})
+        order.items.filter(product__in=[self.p2, self.p3]).delete()
+        self.assertRollups({bebidas: (5, Decimal('7.50'))})
+        order = Order.objects.get(pk=order.pk)
+        order.status = 'X'
+        order.save()
+        self.assertRollups({})
+
+    def test_admin_mark_completed_and_delete(self):
+        first = self.make_order((self.p1, 1))
+        second = self.make_order((self.p1, 3), (self.p2, 2))
+        User.objects.create_superuser('admin', password='x')
+        self.client.login(username='admin', password='x')
+        response = self.client.post(reverse('admin:core_order_changelist'),
+                                    {'action': 'mark_completed', '_selected_action': [first.pk, second.pk]})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(set(Order.objects.values_list('status', flat=True)), {'C'})
+        self.assertRollups({(self.cat_a.pk, self.sup.pk): (4, Decimal('6.00')), (self.cat_b.pk, None): (2, Decimal('6.50'))})
+        Order.objects.get(pk=second.pk).delete()   # cascada: se resta el pedido una sola vez
+        self.assertRollups({(self.cat_a.pk, self.sup.pk): (1, Decimal('1.50'))})
+
+    def test_api_and_dashboard_read_only_rollups(self):
+        order = self.make_order((self.p1, 2), (self.p2, 1))
+        order.status = 'C'
+        order.save()
+        url = reverse('core:api_reportes_ventas')
+        self.client.login(username='cliente', password='x')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.login(username='staff', password='x')
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(url, {'agrupar': 'dia,categoria'}).json()
+        report_sql = [q['sql'] for q in ctx.captured_queries if 'core_dailysalesrollup' in q['sql']]
+        self.assertEqual(len(report_sql), 2)
+        self.assertFalse([sql for sql in report_sql if 'core_order' in sql])
+        self.assertEqual([(r['category__name'], r['units'], r['revenue']) for r in data['filas']],
+                         [('Bebidas', 2, '3.00'), ('Snacks', 1, '3.25')])
+        self.assertEqual(data['totales'], {'units': 3, 'revenue': '6.25'})
+        self.assertEqual(self.client.get(url, {'desde': 'ayer'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'agrupar': 'mes'}).status_code, 400)
+        response = self.client.get(reverse('core:sales_report'))
+        self.assertContains(response, 'Snacks')
+        self.assertEqual(response.context['totals']['units'], 3)
+
+
+class ReorderSuggestionTests(CatalogTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        customer = Customer.objects.create(user=cls.user)
+
+        def order(status, *lines):
+            order = Order.objects.create(customer=customer, status=status)
+            OrderItem.objects.bulk_create([OrderItem(order=order, product=p, quantity=q, unit_price=p.price)
+                                           for p, q in lines])
+            return order
+
+        order('C', (cls.p1, 20), (cls.p2, 1), (cls.p3, 3))
+        order('P', (cls.p1, 10))
+        order('X', (cls.p2, 500))                       # cancelado: no cuenta como venta
+        old = order('C', (cls.p2, 500))
+        Order.objects.filter(pk=old.pk).update(created_at=old.created_at - timedelta(days=60))
+
+    def test_flags_low_cover_and_suggests_quantities(self):
+        with CaptureQueriesContext(connection) as ctx:
+            count = compute_reorder_suggestions(days=14, window=30, target_days=30)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]), 3)
+        self.assertEqual(count, 2)
+        rows = {s.product_id: (s.supplier_id, s.units_sold, s.daily_velocity, s.days_of_cover, s.suggested_quantity)
+                for s in ReorderSuggestion.objects.all()}
+        # Agua mineral: 30 vendidas en 30 días, stock 10 -> 10 días de cobertura, pedir 20
+        self.assertEqual(rows[self.p1.pk], (self.sup.pk, 30, Decimal('1.000'), Decimal('10.0'), 20))
+        self.assertEqual(rows[self.p3.pk], (self.sup.pk, 3, Decimal('0.100'), Decimal('0.0'), 3))
+        self.assertEqual(compute_reorder_suggestions(days=5), 1)   # reemplaza la corrida anterior
+
+    def test_command_and_staff_view(self):
+        out = io.StringIO()
+        call_command('low_stock_report', '--days', '14', stdout=out)
+        self.assertIn('Distribuidora: 2 productos, 23 unidades a pedir', out.getvalue())
+        url = reverse('core:reorder_list')
+        self.client.login(username='cliente', password='x')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.login(username='staff', password='x')
+        response = self.client.get(url)
+        self.assertContains(response, 'Agua saborizada')
+        self.assertNotContains(response, 'Papas fritas')
+
+
+class BulkEditTests(CatalogTestMixin, TestCase):
+    def test_price_percent_runs_one_update_and_audit_row_per_batch(self):
+        before = dict(Product.objects.values_list('pk', 'updated_at'))
+        generation = catalog_cache.catalog_generation()
+        with CaptureQueriesContext(connection) as ctx:
+            count, batches = update_products(Product.objects.all(), 'price_percent', Decimal('10'),
+                                             user=self.staff, chunk_size=2)
+        self.assertEqual((count, batches), (3, 2))
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "core_product"')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(sorted(Product.objects.values_list('price', flat=True)),
+                         [Decimal('1.65'), Decimal('2.20'), Decimal('3.58')])
+        for pk, updated_at in Product.objects.values_list('pk', 'updated_at'):
+            self.assertGreater(updated_at, before[pk])
+        logs = list(BulkEditLog.objects.order_by('batch').values_list('batch', 'count', 'user', 'params'))
+        self.assertEqual(logs, [(1, 2, self.staff.pk, {'value': '10'}), (2, 1, self.staff.pk, {'value': '10'})])
+        self.assertEqual(BulkEditLog.objects.values('run').distinct().count(), 1)
+        self.assertNotEqual(catalog_cache.catalog_generation(), generation)
+
+    def test_invalid_results_are_rejected_before_writing(self):
+        with self.assertRaises(ValueError):
+            update_products(Product.objects.all(), 'price_amount', Decimal('-1.50'))
+        with self.assertRaises(ValueError):
+            update_products(Product.objects.all(), 'stock', -1)   # p3 tiene stock 0
+        self.assertEqual(Product.objects.get(pk=self.p1.pk).price, Decimal('1.50'))
+        self.assertFalse(BulkEditLog.objects.exists())
+        generation = catalog_cache.catalog_generation()
+        with self.captureOnCommitCallbacks() as callbacks:
+            update_products(Product.objects.filter(stock__gt=0), 'stock', -5)
+        self.assertEqual(sorted(Product.objects.values_list('stock', flat=True)), [0, 0, 5])
+        # La generación cambia recién al confirmar: antes un lector cachearía las filas viejas
+        self.assertEqual(catalog_cache.catalog_generation(), generation)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(catalog_cache.catalog_generation(), generation)
+
+    def test_api_reassigns_filtered_products(self):
+        url = reverse('core:api_productos_masivo')
+        body = {'operation': 'category', 'category': self.cat_b.pk, 'filters': {'category': self.cat_a.pk}}
+        self.client.login(username='cliente', password='x')
+        self.assertEqual(self.client.post(url, body, content_type='application/json').status_code, 403)
+        self.client.login(username='staff', password='x')
+        response = self.client.post(url, body, content_type='application/json')
+        self.assertEqual(response.json(), {'operation': 'category', 'updated': 2, 'batches': 1})
+        self.assertEqual(set(Product.objects.values_list('category', flat=True)), {self.cat_b.pk})
+        response = self.client.post(url, {'operation': 'stock', 'value': 3, 'ids': [self.p2.pk]},
+                                    content_type='application/json')
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(Product.objects.get(pk=self.p2.pk).stock, 8)
+        self.assertEqual(self.client.post(url, {'operation': 'price_percent', 'ids': [self.p1.pk]},
+                                          content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'operation': 'stock', 'value': 1},
+                                          content_type='application/json').status_code, 400)
+
+    def test_admin_bulk_edit_and_cancel_orders(self):
+        User.objects.create_superuser('admin', password='x')
+        self.client.login(username='admin', password='x')
+        url = reverse('admin:core_product_changelist')
+        selection = {'action': 'bulk_edit', '_selected_action': [self.p1.pk, self.p3.pk]}
+        self.assertContains(self.client.post(url, selection), 'Se van a modificar <strong>2</strong> productos')
+        response = self.client.post(url, dict(selection, apply='1', operation='price_amount', value='0.50'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Product.objects.get(pk=self.p3.pk).price, Decimal('2.50'))
+        self.assertEqual(Product.objects.get(pk=self.p2.pk).price, Decimal('3.25'))
+
+        order = Order.objects.create(customer=Customer.objects.create(user=self.user))
+        OrderItem.objects.create(order=order, product=self.p1, quantity=2, unit_price=Decimal('2.00'))
+        update_order_status(Order.objects.all(), 'C')
+        self.assertEqual(DailySalesRollup.objects.get().units, 2)
+        self.client.post(reverse('admin:core_order_changelist'),
+                         {'action': 'mark_canceled', '_selected_action': [order.pk]})
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'X')
+        self.assertEqual(DailySalesRollup.objects.get().units, 0)
+        self.assertEqual(BulkEditLog.objects.filter(target='order').count(), 2)
+
+
+class FacetCountTests(CatalogTestMixin, TestCase):
+    def _product_queries(self, ctx):
+        return [q['sql'] for q in ctx.captured_queries if 'FROM "core_product"' in q['sql']]
+
+    def test_signals_keep_base_counts_in_sync_with_rebuild(self):
+        cat_c = Category.objects.create(name='Lácteos')
+        Product.objects.create(name='Yogur', category=cat_c, supplier=self.sup, price=Decimal('75'))
+        self.p1.category, self.p1.price = self.cat_b, Decimal('12')
+        self.p1.save()
+        Product.objects.filter(pk=self.p3.pk).first().delete()
+        self.sup.delete()   # SET_NULL no pasa por las señales de Product
+        incremental = base_counts()
+        self.assertEqual(incremental['category'], {self.cat_a.pk: 0, self.cat_b.pk: 2, cat_c.pk: 1})
+        self.assertEqual(incremental['supplier'], {0: 3})
+        rebuild_facet_counts()
+        rebuilt = base_counts()
+        self.assertEqual({f: {k: n for k, n in v.items() if n} for f, v in incremental.items()}, rebuilt)
+
+    def test_landing_page_does_not_aggregate(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('core:product_list'))
+        self.assertFalse([sql for sql in self._product_queries(ctx) if 'FILTER (WHERE' in sql])
+        facets = response.context['facets']
+        self.assertEqual([(c['name'], c['count']) for c in facets['categories']], [('Bebidas', 2), ('Snacks', 1)])
+        self.assertEqual([b['count'] for b in facets['prices']], [3, 0, 0, 0, 0])
+        self.assertContains(response, 'Bebidas (2)')
+
+    def test_filtered_counts_are_disjunctive_and_cached(self):
+        filters = {'category': str(self.cat_a.pk), 'pmin': Decimal('1.75')}
+        with CaptureQueriesContext(connection) as ctx:
+            counts = facet_counts(filters)
+        self.assertEqual(len(self._product_queries(ctx)), 1)
+        # Cada faceta ignora su propio filtro: se siguen viendo las otras categorías
+        self.assertEqual(counts['category'], {self.cat_a.pk: 1, self.cat_b.pk: 1})
+        self.assertEqual(counts['supplier'], {self.sup.pk: 1})
+        self.assertEqual(counts['price'][0], 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(facet_counts(filters), counts)
+        self.assertEqual(facet_counts({'q': 'agua'})['category'], {self.cat_a.pk: 2, self.cat_b.pk: 0})
+
+    def test_list_etag_changes_with_counts_outside_the_filter(self):
+        self.client.force_login(self.user)
+        url, params = reverse('core:product_list'), {'category': self.cat_a.pk}
+        response = self.client.get(url, params)
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        # p2 no está en el listado filtrado, pero cambia el conteo de Snacks
+        self.p2.category = None
+        self.p2.save()
+        fresh = self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertContains(fresh, 'Snacks (0)')
+
+
+class BenchDataTests(TestCase):
+    def test_generated_orders_are_consistent(self):
+        seed_products(30, categories=3, suppliers=2)
+        products = list(Product.objects.values_list('pk', 'price'))
+        seed_orders(40, products, customers=5, days=4)
+        self.assertEqual(Order.objects.count(), 40)
+        self.assertEqual(Customer.objects.count(), 5)
+        self.assertEqual(len({o.created_at.date() for o in Order.objects.all()}), 4)
+        # El total se calcula sin señales: tiene que coincidir con el recálculo desde las líneas
+        out = io.StringIO()
+        call_command('recompute_order_totals', '--dry-run', stdout=out)
+        self.assertIn('0 pedidos desviados', out.getvalue())
+
+
+class StockReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(user=User.objects.create_user('cli'))
+        cls.a = Product.objects.create(name='A', price=Decimal('1.00'), stock=5)
+        cls.b = Product.objects.create(name='B', price=Decimal('2.00'), stock=1)
+
+    def stock(self):
+        return dict(Product.objects.filter(pk__in=[self.a.pk, self.b.pk]).values_list('pk', 'stock'))
+
+    def test_reserves_all_lines_in_one_update(self):
+        with CaptureQueriesContext(connection) as ctx:
+            reserve_stock([(self.a.pk, 2), (self.b.pk, 1), (self.a.pk, 1)])
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('UPDATE'))
+        self.assertEqual(self.stock(), {self.a.pk: 2, self.b.pk: 0})
+        release_stock([(self.b.pk, 1)])
+        self.assertEqual(self.stock()[self.b.pk], 1)
+
+    def test_shortage_rolls_back_every_line(self):
+        with self.assertRaises(InsufficientStock) as ctx:
+            reserve_stock([(self.a.pk, 2), (self.b.pk, 2)])
+        self.assertEqual(ctx.exception.product_ids, [self.b.pk])
+        self.assertEqual(self.stock(), {self.a.pk: 5, self.b.pk: 1})
+
+    def test_place_order_creates_items_and_reserves(self):
+        order = place_order(self.customer, [(self.a, 3), (self.b, 1)])
+        order.refresh_from_db()
+        self.assertEqual(order.total, Decimal('5.00'))
+        self.assertEqual(self.stock(), {self.a.pk: 2, self.b.pk: 0})
+        with self.assertRaises(InsufficientStock):
+            place_order(self.customer, [(self.a, 1), (self.b, 1)])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.stock(), {self.a.pk: 2, self.b.pk: 0})
+
+    def test_orders_leave_listing_order_and_catalog_cache_alone(self):
+        before = dict(Product.objects.values_list('pk', 'updated_at'))
+        generation = catalog_cache.catalog_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(self.customer, [(self.a, 1)])
+        self.assertEqual(dict(Product.objects.values_list('pk', 'updated_at')), before)
+        self.assertEqual(catalog_cache.catalog_generation(), generation)
+
+    def test_cancelling_releases_reserved_stock_once(self):
+        order = place_order(self.customer, [(self.a, 3), (self.b, 1)])
+        stale = Order.objects.get(pk=order.pk)
+        order.status = 'X'
+        order.save()
+        self.assertEqual(self.stock(), {self.a.pk: 5, self.b.pk: 1})
+        stale.status = 'X'
+        stale.save()   # instancia vieja con stock_reserved=True: no devuelve dos veces
+        order.status = 'P'
+        order.save()
+        order.status = 'X'
+        order.save()
+        self.assertEqual(self.stock(), {self.a.pk: 5, self.b.pk: 1})
+        # Cancelación masiva; un pedido sin reserva (admin) no devuelve nada
+        reserved = place_order(self.customer, [(self.a, 2)])
+        manual = Order.objects.create(customer=self.customer)
+        OrderItem.objects.create(order=manual, product=self.a, quantity=4, unit_price=Decimal('1.00'))
+        update_order_status(Order.objects.filter(pk__in=[reserved.pk, manual.pk]), 'X')
+        self.assertEqual(self.stock(), {self.a.pk: 5, self.b.pk: 1})
+
+
+class OrderApiTests(CatalogTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.customer = Customer.objects.create(user=cls.user)
+
+    def test_large_cart_takes_constant_queries(self):
+        Product.objects.bulk_create([Product(name=f'B2B {i}', price=Decimal(i % 7 + 1), stock=10) for i in range(300)])
+        products = list(Product.objects.filter(name__startswith='B2B'))
+        with CaptureQueriesContext(connection) as ctx:
+            order = place_order(self.customer, [(p.pk, 2) for p in products] + [(products[0].pk, 1)])
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        # in_bulk, reserva de stock, INSERT del pedido y bulk_create de las líneas (en lotes)
+        self.assertLessEqual(len(statements), 5)
+        self.assertEqual(order.items.count(), 300)
+        expected = sum(p.price * 2 for p in products) + products[0].price
+        self.assertEqual(order.total, expected)
+        self.assertEqual(Order.objects.get(pk=order.pk).total, expected)
+        self.assertEqual(Product.objects.get(pk=products[0].pk).stock, 7)
+
+    def test_customer_creates_pending_order_with_price_snapshot(self):
+        url = reverse('core:api_pedidos')
+        self.client.login(username='cliente', password='x')
+        cart = {'items': [{'product': self.p1.pk, 'quantity': 2}, {'product': self.p2.pk}], 'status': 'C'}
+        response = self.client.post(url, cart, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data['customer'], data['status'], data['total']), (self.customer.pk, 'P', '6.25'))
+        self.assertEqual(data['items'], [{'product': self.p1.pk, 'quantity': 2, 'unit_price': '1.50'},
+                                         {'product': self.p2.pk, 'quantity': 1, 'unit_price': '3.25'}])
+        Product.objects.filter(pk=self.p1.pk).update(price=Decimal('9.99'))
+        self.assertEqual(OrderItem.objects.get(order=data['id'], product=self.p1).unit_price, Decimal('1.50'))
+        response = self.client.post(url, {'items': [{'product': self.p3.pk, 'quantity': 1}]},
+                                    content_type='application/json')
+        self.assertEqual((response.status_code, response.json()['products']), (409, [self.p3.pk]))
+        response = self.client.post(url, {'items': [{'product': 999999, 'quantity': 1}]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post(url, {'items': []}, content_type='application/json').status_code, 400)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_staff_completed_order_reaches_rollups(self):
+        self.client.login(username='staff', password='x')
+        response = self.client.post(reverse('core:api_pedidos'),
+                                    {'customer': self.customer.pk, 'status': 'C',
+                                     'items': [{'product': self.p1.pk, 'quantity': 4}]},
+                                    content_type='application/json')
+        self.assertEqual(response.json()['status'], 'C')
+        rollup = DailySalesRollup.objects.get()
+        self.assertEqual((rollup.category_id, rollup.units, rollup.revenue), (self.cat_a.pk, 4, Decimal('6.00')))
+        rebuild_rollups()
+        self.assertEqual(DailySalesRollup.objects.get().units, 4)
+
+class OrderArchiveTests(CatalogTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.customer = Customer.objects.create(user=cls.user)
+        cls.old_completed = cls.order([(cls.p1, 2), (cls.p2, 1)], 'C', days=400)
+        cls.old_canceled = cls.order([(cls.p3, 1)], 'X', days=400)
+        cls.old_pending = cls.order([(cls.p1, 1)], 'P', days=400)
+        cls.recent = cls.order([(cls.p2, 3)], 'C', days=10)
+
+    @classmethod
+    def order(cls, lines, status, days):
+        order = Order.objects.create(customer=cls.customer)
+        for product, quantity in lines:
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, unit_price=product.price)
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days))
+        order = Order.objects.get(pk=order.pk)
+        order.status = status
+        order.save()   # las ventas se registran con la fecha vieja
+        return order
+
+    def rollups(self):
+        return sorted(DailySalesRollup.objects.values_list('date', 'category', 'supplier', 'units', 'revenue'))
+
+    def test_archive_moves_closed_orders_and_keeps_sales(self):
+        before = self.rollups()
+        out = io.StringIO()
+        call_command('archive_orders', days=365, batch_size=1, stdout=out)
+        self.assertIn('2 pedidos archivados en 2 lotes', out.getvalue())
+        self.assertEqual(set(Order.objects.values_list('pk', flat=True)), {self.old_pending.pk, self.recent.pk})
+        self.assertFalse(OrderItem.objects.filter(order__in=[self.old_completed.pk, self.old_canceled.pk]).exists())
+        archived = ArchivedOrder.objects.get(pk=self.old_completed.pk)
+        self.assertEqual((archived.status, archived.total, archived.created_at),
+                         ('C', Decimal('6.25'), self.old_completed.created_at))
+        self.assertEqual(archived.items, [[self.p1.pk, 'Agua mineral', 2, '1.50', self.cat_a.pk, self.sup.pk],
+                                          [self.p2.pk, 'Papas fritas', 1, '3.25', self.cat_b.pk, None]])
+        # El archivo no resta ventas y un rebuild las vuelve a leer del JSON
+        self.assertEqual(self.rollups(), before)
+        rebuild_rollups()
+        self.assertEqual(self.rollups(), before)
+        self.assertEqual(archive_orders(archivable_orders(365)), (0, 0))
+
+    def test_deleting_customer_keeps_archived_sales(self):
+        archive_orders(archivable_orders(365))
+        before = self.rollups()
+        self.customer.delete()   # se lleva los pedidos vivos: restan sus ventas
+        self.assertEqual(ArchivedOrder.objects.filter(customer=None).count(), 2)
+        # Quedan solo las ventas archivadas, las mismas que relee un rebuild
+        after = [row for row in self.rollups() if row[3]]
+        self.assertEqual(after, [row for row in before if row[0] != self.recent.created_at.date()])
+        rebuild_rollups()
+        self.assertEqual(self.rollups(), after)
+
+    def test_views_paginate_and_read_archive_on_demand(self):
+        archive_orders(archivable_orders(365))
+        Order.objects.bulk_create([Order(customer=self.customer) for _ in range(30)])
+        self.client.force_login(self.staff)
+        url = reverse('core:order_list')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertFalse([q for q in ctx.captured_queries if 'core_archivedorder' in q['sql']])
+        self.assertEqual(response.context['paginator'].count, 32)
+        self.assertEqual(len(response.context['orders']), OrderListView.paginate_by)
+        archived = self.client.get(url, {'archivados': '1'})
+        self.assertEqual([o.pk for o in archived.context['orders']], [self.old_canceled.pk, self.old_completed.pk])
+        detail = self.client.get(reverse('core:order_detail', args=[self.old_completed.pk]))
+        self.assertContains(detail, 'Archivado')
+        self.assertContains(detail, 'Papas fritas')
+        self.assertEqual(self.client.get(reverse('core:order_edit', args=[self.old_completed.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('core:order_detail', args=[999999])).status_code, 404)
+
+
+class StockContentionTests(TransactionTestCase):
+    """Varios hilos compran el mismo producto: nunca se vende más que el stock."""
+    THREADS = 8
+    ATTEMPTS = 10
+    STOCK = 25
+
+    def test_no_overselling_under_contention(self):
+        customer = Customer.objects.create(user=User.objects.create_user('cli'))
+        product = Product.objects.create(name='Oferta', price=Decimal('1.00'), stock=self.STOCK)
+        other = Product.objects.create(name='Regalo', price=Decimal('0.50'), stock=10 ** 6)
+        placed, rejected = [], []
+
+        def buyer():
+            try:
+                for _ in range(self.ATTEMPTS):
+                    while True:
+                        try:
+                            place_order(customer, [(other, 1), (product, 1)])
+                            placed.append(1)
+                        except InsufficientStock:
+                            rejected.append(1)
+                        except OperationalError:  # tabla bloqueada en SQLite: reintentar
+                            time.sleep(0.001)
+                            continue
+                        break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buyer) for _ in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        product.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(len(placed), self.STOCK)
+        self.assertEqual(len(rejected), self.THREADS * self.ATTEMPTS - self.STOCK)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(other.stock, 10 ** 6 - self.STOCK)
+        self.assertEqual(OrderItem.objects.filter(product=product).count(), self.STOCK)
+
+
+class ProductImportTests(CatalogTestMixin, TestCase):
+    CSV = (
+        "sku,name,description,category,supplier,price,stock\n"
+        "A1,Agua mineral 2L,,bebidas,Distribuidora,1.80,40\n"
+        "N1,Jugo de naranja,Natural,Jugos,Nuevo proveedor,2.40,12\n"
+        "N2,Sin precio,,Jugos,,0,3\n"
+        ",Sin sku,,Jugos,,1.00,3\n"
+        "N3,Jugo de pomelo,,Jugos,Nuevo proveedor,2.60,8\n"
+    )
+
+    def test_csv_upserts_by_sku_in_batches(self):
+        batches = []
+        report = import_products(io.BytesIO(self.CSV.encode()), 'csv', batch_size=2,
+                                 progress=lambda n, count, r: batches.append(count))
+        self.assertEqual(batches, [2, 1])
+        self.assertEqual([line for line, _ in report.errors], [4, 5])
+        self.assertIn('mayor que 0', report.errors[0][1])
+        self.p1.refresh_from_db()
+        self.assertEqual((self.p1.name, self.p1.price, self.p1.stock, self.p1.category),
+                         ('Agua mineral 2L', Decimal('1.80'), 40, self.cat_a))
+        juice = Product.objects.get(sku='N1')
+        self.assertEqual((juice.category.name, juice.supplier.name), ('Jugos', 'Nuevo proveedor'))
+        self.assertEqual(Category.objects.filter(name='Jugos').count(), 1)
+        self.assertEqual(Supplier.objects.filter(name='Nuevo proveedor').count(), 1)
+        self.assertEqual(get_search_backend().search('pomelo'), [Product.objects.get(sku='N3')])
+
+    def test_jsonl_command(self):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'productos.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"sku": "J1", "name": "Mate", "price": 9.5, "stock": 2, "category": "Bebidas"}\n'
+                    'no es json\n')
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_products', path, stdout=out, stderr=err)
+        self.assertIn('1 productos escritos, 1 errores', out.getvalue())
+        self.assertIn('línea 2', err.getvalue())
+        self.assertEqual(Product.objects.get(sku='J1').category, self.cat_a)
+
+    def test_upload_view_is_staff_only(self):
+        url = reverse('core:product_import')
+        self.client.force_login(self.user)
+        self.assertRedirects(self.client.get(url), reverse('core:product_list'))
+        self.client.force_login(self.staff)
+        upload = SimpleUploadedFile('productos.csv', self.CSV.encode(), content_type='text/csv')
+        response = self.client.post(url, {'file': upload, 'format': 'csv', 'batch_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'].written, 3)
+
+
+class PdfExportJobTests(CatalogTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(EXPORT_ROOT=self.root, PDF_EXPORT_WORKERS=0))
+        self.client.force_login(self.staff)
+
+    def test_enqueue_poll_and_download(self):
+        response = self.client.get(reverse('core:export_pdf'))
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        status = self.client.get(job['status_url']).json()
+        self.assertEqual(status['status'], pdf_export.READY)
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(download.streaming_content).startswith(b'%PDF'))
+
+    def test_unchanged_catalog_is_served_from_artifact(self):
+        job = self.client.get(reverse('core:export_pdf')).json()['job']
+        with self.assertNumQueries(2):  # usuario + versión del catálogo
+            response = self.client.get(reverse('core:export_pdf'))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.streaming)
+        Product.objects.create(name='Nuevo', price=Decimal('1'))
+        new_job = self.client.get(reverse('core:export_pdf')).json()['job']
+        self.assertNotEqual(new_job, job)
+        self.assertEqual(os.listdir(self.root), [f'productos-{new_job}.pdf'])
+        place_order(Customer.objects.create(user=self.user), [(self.p1, 1)])   # solo cambia el stock
+        self.assertNotEqual(pdf_export.catalog_version(), new_job)
+
+    def test_status_endpoints_are_staff_only_and_404_for_unknown_jobs(self):
+        self.assertEqual(self.client.get(reverse('core:export_pdf_status', args=['nope'])).status_code, 404)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('core:export_pdf_status', args=['nope'])).status_code, 403)
+
+
+class SessionAndCustomerTests(CatalogTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.customer = Customer.objects.create(user=cls.user)
+
+    def queries_for(self, engine):
+        with override_settings(SESSION_ENGINE=f'django.contrib.sessions.backends.{engine}'):
+            client = self.client_class()   # SessionMiddleware fija el engine al construirse
+            client.login(username='cliente', password='x')
+            client.get(reverse('core:order_list'))   # calienta los fragmentos cacheados
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(client.get(reverse('core:order_list')).status_code, 200)
+        return [q['sql'] for q in ctx.captured_queries]
+
+    def test_cached_and_cookie_sessions_skip_the_session_query(self):
+        db = self.queries_for('db')
+        self.assertTrue(any('django_session' in sql for sql in db))
+        for engine in ('cached_db', 'signed_cookies'):
+            queries = self.queries_for(engine)
+            self.assertEqual(len(queries), len(db) - 1, engine)
+            self.assertFalse([sql for sql in queries if 'django_session' in sql], engine)
+
+    def test_order_create_resolves_customer_once(self):
+        self.client.login(username='cliente', password='x')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('core:order_create'),
+                                        {'customer': self.customer.pk, 'status': 'P'})
+        self.assertRedirects(response, reverse('core:order_list'), fetch_redirect_response=False)
+        # El perfil del usuario se busca una sola vez aunque la vista use request.customer dos veces
+        lookups = [q['sql'] for q in ctx.captured_queries if '"core_customer"."user_id" =' in q['sql']]
+        self.assertEqual(len(lookups), 1)
+        self.assertEqual(Order.objects.get().customer, self.customer)
+
+    def test_user_without_profile_cannot_create_orders(self):
+        User.objects.create_user('sinperfil', password='x')
+        self.client.login(username='sinperfil', password='x')
+        response = self.client.post(reverse('core:order_create'), {'customer': self.customer.pk, 'status': 'P'})
+        self.assertRedirects(response, reverse('core:order_list'), fetch_redirect_response=False)
+        self.assertFalse(Order.objects.exists())
+
+
+
+class StaticAssetTests(CatalogTestMixin, TestCase):
+    PRODUCTION = {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'}
+
+    def collect(self, staticfiles):
+        root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(STATIC_ROOT=root, STORAGES=dict(settings.STORAGES, staticfiles=staticfiles)))
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def load_twice(self, staticfiles):
+        """Carga en frío y en caliente del listado con un navegador que guarda su caché HTTP."""
+        self.collect(staticfiles)
+        client = Client()   # handler nuevo: WhiteNoise indexa el STATIC_ROOT recién recolectado
+        client.force_login(self.user)
+        browser_cache, url = {}, reverse('core:product_list')
+        return page_transfer(client, url, browser_cache), page_transfer(client, url, browser_cache), browser_cache
+
+    def test_cold_and_warm_product_list_transfer(self):
+        dev_cold, dev_warm, _ = self.load_twice(settings.STORAGES['staticfiles'])
+        cold, warm, browser_cache = self.load_twice(self.PRODUCTION)
+        assets = [path for path in browser_cache if path.startswith(settings.STATIC_URL)]
+        self.assertEqual(len(assets), 3)
+        for path in assets:
+            self.assertRegex(path, r'\.[0-9a-f]{12}\.')
+            self.assertIn('immutable', browser_cache[path]['cache_control'])
+        self.assertEqual(cold['requests'], dev_cold['requests'])
+        self.assertLess(cold['bytes'], dev_cold['bytes'])   # main.js viaja comprimido
+        # En caliente solo se revalida el HTML (304 sin cuerpo); sin hash cada estático se revalida
+        self.assertEqual(warm, {'requests': 1, 'bytes': 0})
+        self.assertEqual(dev_warm, {'requests': 4, 'bytes': 0})
+
+    def test_checks_require_static_tag_and_manifest_entries(self):
+        root = self.enterContext(tempfile.TemporaryDirectory())
+        with open(os.path.join(root, 'legacy.html'), 'w', encoding='utf-8') as fh:
+            fh.write('<link rel="stylesheet" href="/static/core/css/styles.css">\n')
+        with override_settings(TEMPLATES=[dict(settings.TEMPLATES[0], DIRS=[root])]):
+            self.assertEqual([e.id for e in check_static_references(None)], ['core.E001'])
+        self.assertEqual(check_static_references(None), [])
+        self.assertEqual(check_static_manifest(None), [])   # sin manifiesto en el perfil dev
+        with override_settings(STORAGES=dict(settings.STORAGES, staticfiles=self.PRODUCTION),
+                               STATIC_ROOT=self.enterContext(tempfile.TemporaryDirectory())):
+            self.assertEqual({e.id for e in check_static_manifest(None)}, {'core.E002'})
+        self.collect(self.PRODUCTION)
+        self.assertEqual(check_static_manifest(None), [])
+
+
+class DatabaseProfileTests(TestCase):
+    PRAGMAS = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000, 'cache_size': -64000}
+
+    def open_connection(self, name):
+        wrapper = connection.copy()
+        wrapper.settings_dict = dict(wrapper.settings_dict, NAME=name)
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def test_sqlite_profile_pragmas_applied_on_connect(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(SQLITE_PRAGMAS=self.PRAGMAS):
+            wrapper = self.open_connection(os.path.join(tmp, 'perfil.sqlite3'))
+            values = sqlite_pragmas(wrapper, self.PRAGMAS)
+            wrapper.close()
+        # synchronous se informa como número: 1 = NORMAL
+        self.assertEqual(values, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'cache_size': -64000})
+
+    def test_dev_profile_leaves_sqlite_defaults(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(SQLITE_PRAGMAS={}):
+            wrapper = self.open_connection(os.path.join(tmp, 'perfil.sqlite3'))
+            values = sqlite_pragmas(wrapper, ['journal_mode', 'cache_size'])
+            wrapper.close()
+        self.assertEqual(values, {'journal_mode': 'delete', 'cache_size': -2000})
+
+class PerformanceMiddlewareTests(CatalogTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        metrics_registry.reset()
+
+    def series(self, name, view):
+        return metrics_registry.snapshot().get((name, view))
+
+    def test_records_per_view_metrics(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('core:product_list'))
+        self.client.get(reverse('core:search'), {'q': 'agua'})
+        for view in ('core:product_list', 'core:search'):
+            self.assertEqual(sum(self.series('core_request_duration_seconds', view)[:-1]), 1)
+            self.assertGreater(self.series('core_request_template_seconds', view)[-1], 0)
+            self.assertGreater(self.series('core_response_size_bytes', view)[-1], 1000)
+        queries = self.series('core_request_sql_queries', 'core:product_list')
+        self.assertGreaterEqual(queries[-1], 3)  # sesión + usuario + COUNT + página
+
+    def test_metrics_endpoint_is_staff_only_prometheus_text(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('core:metrics')).status_code, 403)
+        self.client.force_login(self.staff)
+        self.client.get(reverse('core:api_productos'))
+        body = self.client.get(reverse('core:metrics')).content.decode()
+        self.assertIn('# TYPE core_request_duration_seconds histogram', body)
+        self.assertIn('core_request_sql_queries_count{view="core:api_productos"} 1', body)
+        self.assertIn('core_request_duration_seconds_bucket{view="core:api_productos",le="+Inf"} 1', body)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD=0)
+    def test_slow_requests_are_logged_with_top_queries(self):
+        self.client.force_login(self.user)
+        with self.assertLogs('core.performance', 'WARNING') as logs:
+            self.client.get(reverse('core:product_list'))
+        self.assertIn('core:product_list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    async def test_async_requests_count_queries_from_the_orm_thread(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('core:product_list_async'))
+        self.assertEqual(response.status_code, 200)
+        queries = self.series('core_request_sql_queries', 'core:product_list_async')
+        self.assertGreaterEqual(queries[-1], 3)   # sesión + usuario + COUNT + página
+        self.assertGreater(self.series('core_request_sql_duration_seconds', 'core:product_list_async')[-1], 0)
+        self.assertGreater(self.series('core_request_template_seconds', 'core:product_list_async')[-1], 0)
+
+    def test_shards_from_threads_are_merged(self):
+        registry = MetricsRegistry()
+        threads = [threading.Thread(target=lambda: [registry.observe('core_request_sql_queries', 'v', 3)
+                                                    for _ in range(100)]) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        series = registry.snapshot()[('core_request_sql_queries', 'v')]
+        self.assertEqual((sum(series[:-1]), series[-1]), (400, 1200))
+        # Los hilos terminados no dejan fragmentos: se sumaron al total compartido
+        self.assertEqual(registry._shards, {})
+        registry.observe('core_request_sql_queries', 'v', 3)
+        self.assertEqual(sum(registry.snapshot()[('core_request_sql_queries', 'v')][:-1]), 401)
+
+
+class AsyncViewsTests(CatalogTestMixin, TestCase):
+    """Las vistas async devuelven lo mismo que sus pares síncronas."""
+
+    async def _login(self):
+        await self.async_client.aforce_login(self.staff)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff)
+
+    async def test_api_output_matches_sync_view(self):
+        await self._login()
+        for params in ({}, {'fields': 'id,name', 'limit': 2}, {'q': 'agua', 'pmin': '1.75'}):
+            sync_response = await sync_to_async(self.client.get)(reverse('core:api_productos'), params)
+            async_response = await self.async_client.get(reverse('core:api_productos_async'), params)
+            self.assertEqual(async_response.json()['productos'], sync_response.json()['productos'])
+            self.assertEqual(async_response.content.split(b'"next"')[0], sync_response.content.split(b'"next"')[0])
+        bad = await self.async_client.get(reverse('core:api_productos_async'), {'cursor': '%%%'})
+        self.assertEqual(bad.status_code, 400)
+
+    async def test_list_detail_and_search_pages(self):
+        await self._login()
+        response = await self.async_client.get(reverse('core:product_list_async'), {'category': self.cat_a.id})
+        self.assertEqual([p.pk for p in response.context['products']], [self.p3.pk, self.p1.pk])
+        self.assertContains(response, 'Editar')  # user.is_staff resuelto para el template
+        response = await self.async_client.get(reverse('core:product_detail_async', args=[self.p2.pk]))
+        self.assertContains(response, 'Papas fritas')
+        missing = await self.async_client.get(reverse('core:product_detail_async', args=[999]))
+        self.assertEqual(missing.status_code, 404)
+        response = await self.async_client.get(reverse('core:search_async'), {'q': 'saborizada'})
+        self.assertEqual(list(response.context['products']), [self.p3])
+
+    async def test_list_shares_page_cache_with_sync_view(self):
+        await self._login()
+        params = {'category': self.cat_a.id}
+        await sync_to_async(self.client.get)(reverse('core:product_list'), params)
+        # Acierto de la página que guardó la vista síncrona
+        _, page = await async_views._product_page(RequestFactory().get('/', params), ProductListView.paginate_by)
+        self.assertEqual([p.pk for p in page.object_list], [self.p3.pk, self.p1.pk])
+        self.assertEqual(catalog_cache.stats.as_dict(), {'hits': 1, 'misses': 1})
+
+    async def test_conditional_get_matches_sync_views(self):
+        await self._login()
+        for name, args in (('product_list', []), ('product_detail', [self.p1.pk]), ('api_productos', [])):
+            sync_response = await sync_to_async(self.client.get)(reverse(f'core:{name}', args=args))
+            url = reverse(f'core:{name}_async', args=args)
+            response = await self.async_client.get(url)
+            self.assertEqual(response['ETag'], sync_response['ETag'])
+            self.assertEqual(response['Cache-Control'], 'private, no-cache')
+            revalidated = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+            self.assertEqual(revalidated.status_code, 304)
+
+    async def test_requires_login(self):
+        response = await self.async_client.get(reverse('core:product_list_async'))
+        self.assertEqual(response.status_code, 302)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 app_name = 'core'
 
@@ -7,6 +7,7 @@ urlpatterns = [
     # Products
     path('productos/', views.ProductListView.as_view(), name='product_list'),
     path('productos/create/', views.ProductCreateView.as_view(), name='product_create'),
+    path('productos/import/', views.ProductImportView.as_view(), name='product_import'),
     path('productos/<int:pk>/', views.ProductDetailView.as_view(), name='product_detail'),
     path('productos/<int:pk>/edit/', views.ProductUpdateView.as_view(), name='product_edit'),
     path('productos/<int:pk>/delete/', views.ProductDeleteView.as_view(), name='product_delete'),
@@ -26,7 +27,23 @@ urlpatterns = [
     path('search/', views.search_view, name='search'),
     path('export/csv/', views.export_products_csv, name='export_csv'),
     path('export/pdf/', views.export_products_pdf, name='export_pdf'),
+    path('export/pdf/<slug:job_id>/', views.export_products_pdf_status, name='export_pdf_status'),
+    path('export/pdf/<slug:job_id>/download/', views.export_products_pdf_download, name='export_pdf_download'),
     path('api/productos/', views.api_productos, name='api_productos'),
+    path('api/productos/masivo/', views.api_productos_masivo, name='api_productos_masivo'),
+    path('api/pedidos/', views.api_pedidos, name='api_pedidos'),
+    path('metrics/', views.metrics_view, name='metrics'),
+
+    # Reportes
+    path('reportes/ventas/', views.SalesReportView.as_view(), name='sales_report'),
+    path('reportes/reposicion/', views.ReorderSuggestionListView.as_view(), name='reorder_list'),
+    path('api/reportes/ventas/', views.api_reportes_ventas, name='api_reportes_ventas'),
+
+    # Lectura asíncrona (ASGI)
+    path('async/productos/', async_views.product_list_async, name='product_list_async'),
+    path('async/productos/<int:pk>/', async_views.product_detail_async, name='product_detail_async'),
+    path('async/search/', async_views.search_async, name='search_async'),
+    path('async/api/productos/', async_views.api_productos_async, name='api_productos_async'),
 
     # Home / Root
     path('', views.home_view, name='base'),
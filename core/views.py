@@ -1,24 +1,39 @@
 # core/views.py
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, FormView
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, FormView, TemplateView
 from django.urls import reverse_lazy, reverse
-from .models import Product, Order, Customer, Supplier, Category
-from .forms import ProductForm, OrderForm, RegisterForm
+from .models import Product, Order, ArchivedOrder, Customer, Supplier, Category, ReorderSuggestion
+from .forms import ProductForm, OrderForm, RegisterForm, ProductImportForm, BulkProductEditForm
+from .filters import product_filters, filter_products
+from .facets import product_facets
+from .pagination import keyset_page
+from .search import get_search_backend
+from . import cache as catalog_cache
+from .importer import import_products
+from . import pdf_export
+from . import reports
+from . import bulk
+from .restock import supplier_totals
+from .stock import InsufficientStock, UnknownProducts, place_order
+from .conditional import product_condition, product_set_condition, PRIVATE_CACHE
+from .metrics import registry as metrics_registry
 from django.contrib import messages
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, FileResponse, Http404
 import csv
-from reportlab.pdfgen import canvas
+import zlib
 from django.contrib.auth.models import Group
-from decimal import Decimal
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
 
 # ⭐️ Importaciones de Django REST Framework (NUEVO) ⭐️
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .serializers import ProductAPISerializer # Importamos el nuevo serializador
+from .serializers import ProductAPISerializer, ProductFastSerializer
 
 # ---------------------------------------------------------------------
 # StaffRequiredMixin mejorado
@@ -38,6 +53,7 @@ class StaffRequiredMixin(UserPassesTestMixin):
 # Product CBVs
 # (Vistas de productos existentes, sin cambios)
 # ---------------------------------------------------------------------
+@method_decorator([product_set_condition(['page']), cache_control(**PRIVATE_CACHE)], name='get')
 class ProductListView(LoginRequiredMixin, ListView):
     model = Product
     template_name = 'core/product_list.html'
@@ -46,29 +62,74 @@ class ProductListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         qs = super().get_queryset().select_related('category', 'supplier')
-        q = self.request.GET.get('q')
-        cat = self.request.GET.get('category')
-        supplier = self.request.GET.get('supplier')
-        pmin = self.request.GET.get('pmin')
-        pmax = self.request.GET.get('pmax')
-        if q:
-            qs = qs.filter(name__icontains=q)
-        if cat:
-            qs = qs.filter(category__id=cat)
-        if supplier:
-            qs = qs.filter(supplier__id=supplier)
-        if pmin:
-            try:
-                qs = qs.filter(price__gte=Decimal(pmin))
-            except Exception:
-                pass
-        if pmax:
-            try:
-                qs = qs.filter(price__lte=Decimal(pmax))
-            except Exception:
-                pass
+        qs = filter_products(qs, product_filters(self.request.GET))
         return qs.order_by('-updated_at')
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['facets'] = product_facets(product_filters(self.request.GET))
+        return context
+
+    def paginate_queryset(self, queryset, page_size):
+        # Si la página está en caché no se ejecuta ni el COUNT(*) del paginador ni la consulta de la página
+        page_cache = ProductPageCache(self.request.GET)
+        cached = page_cache.get()
+        if cached is not None:
+            queryset = CachedPageList(*cached)
+        paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+        if cached is None:
+            object_list = list(object_list)
+            page_cache.set((paginator.count, (page.number - 1) * paginator.per_page, object_list))
+        return paginator, page, object_list, is_paginated
+
+
+class ProductPageCache:
+    """
+    Páginas del listado en la caché del catálogo, por huella de filtros + número
+    de página y generación de stock: (conteo total, offset, filas). La usan ProductListView y
+    product_list_async; los métodos con prefijo "a" son los del event loop.
+    """
+    def __init__(self, query):
+        self.params = dict(product_filters(query), page=query.get('page') or '1')
+        self.key = None
+
+    @staticmethod
+    def _count(cached):
+        (catalog_cache.stats.miss if cached is None else catalog_cache.stats.hit)()
+        return cached
+
+    def get(self):
+        self.key = catalog_cache.catalog_key('product_list', dict(self.params, stock=catalog_cache.stock_generation()))
+        return self._count(catalog_cache.get_cache().get(self.key))
+
+    async def aget(self):
+        stock = await catalog_cache.astock_generation()
+        self.key = await catalog_cache.acatalog_key('product_list', dict(self.params, stock=stock))
+        return self._count(await catalog_cache.get_cache().aget(self.key))
+
+    def set(self, page):
+        catalog_cache.get_cache().set(self.key, page, catalog_cache.cache_timeout())
+
+    async def aset(self, page):
+        await catalog_cache.get_cache().aset(self.key, page, catalog_cache.cache_timeout())
+
+
+class CachedPageList:
+    """Sustituto de queryset para el Paginator a partir de una página cacheada."""
+    def __init__(self, count, offset, rows):
+        self._count, self._offset, self._rows = count, offset, rows
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, key):
+        start = (key.start or 0) - self._offset
+        return self._rows[start:start + (key.stop - key.start)]
+
+@method_decorator([product_condition(), cache_control(**PRIVATE_CACHE)], name='get')
 class ProductDetailView(LoginRequiredMixin, DetailView):
     model = Product
     template_name = 'core/product_detail.html'
@@ -103,25 +164,70 @@ class ProductDeleteView(LoginRequiredMixin, StaffRequiredMixin, DeleteView):
         messages.success(self.request, "Producto eliminado.")
         return super().delete(request, *args, **kwargs)
 
+class ProductImportView(LoginRequiredMixin, StaffRequiredMixin, FormView):
+    """Carga masiva de productos (CSV / JSON Lines) para staff."""
+    form_class = ProductImportForm
+    template_name = 'core/product_import.html'
+
+    def form_valid(self, form):
+        report = import_products(form.cleaned_data['file'].file, form.cleaned_data['format'],
+                                 form.cleaned_data['batch_size'])
+        if report.written:
+            messages.success(self.request, f"Importación terminada: {report}.")
+        else:
+            messages.warning(self.request, f"No se importó ningún producto: {report}.")
+        return self.render_to_response(self.get_context_data(form=form, report=report))
+
 # ---------------------------------------------------------------------
 # Order CBVs
-# (Vistas de pedidos existentes, sin cambios)
+# Los pedidos archivados (core.archive) se leen solo a pedido: ?archivados=1
+# en el listado, o el detalle de un id que ya no está en core_order.
 # ---------------------------------------------------------------------
 class OrderListView(LoginRequiredMixin, ListView):
     model = Order
     template_name = 'core/order_list.html'
     context_object_name = 'orders'
+    paginate_by = 25
+
+    def archived(self):
+        return self.request.GET.get('archivados') == '1'
 
     def get_queryset(self):
+        model = ArchivedOrder if self.archived() else Order
         if self.request.user.is_staff:
-            return Order.objects.all().select_related('customer__user')
-        return Order.objects.filter(customer__user=self.request.user).select_related('customer__user')
+            qs = model.objects.all()
+        else:
+            qs = model.objects.filter(customer__user=self.request.user)
+        if model is ArchivedOrder:
+            qs = qs.defer('items')   # las líneas solo se muestran en el detalle
+        return qs.select_related('customer__user').order_by('-created_at')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['archived'] = self.archived()
+        return context
 
 class OrderDetailView(LoginRequiredMixin, DetailView):
     model = Order
     template_name = 'core/order_detail.html'
     context_object_name = 'order'
 
+    def get_queryset(self):
+        # Cliente y líneas con su producto en consultas fijas (sin N+1 en el template)
+        return Order.objects.select_related('customer__user').prefetch_related('items__product')
+
+    def get_object(self, queryset=None):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            # Ya no está en core_order: se busca en el archivo (la consulta extra solo se paga en este caso)
+            return get_object_or_404(ArchivedOrder.objects.select_related('customer__user'), pk=self.kwargs['pk'])
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['items'] = self.object.lines() if isinstance(self.object, ArchivedOrder) else self.object.items.all()
+        return context
+
 class OrderCreateView(LoginRequiredMixin, CreateView):
     model = Order
     form_class = OrderForm
@@ -130,12 +236,11 @@ class OrderCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         if not self.request.user.is_staff:
-            try:
-                customer = Customer.objects.get(user=self.request.user)
-                form.instance.customer = customer
-            except Customer.DoesNotExist:
+            # Resuelto por CustomerMiddleware (una consulta por petición como máximo)
+            if not self.request.customer:
                 messages.error(self.request, "No se encontró el perfil de cliente. Contactá al administrador.")
                 return redirect('core:order_list')
+            form.instance.customer = self.request.customer
         messages.success(self.request, "Pedido creado.")
         return super().form_valid(form)
 
@@ -179,81 +284,366 @@ class CustomLogoutView(LogoutView):
 @login_required
 def search_view(request):
     q = request.GET.get('q', '').strip()
-    products = Product.objects.none()
+    products = []
     if q:
-        products = Product.objects.filter(name__icontains=q)[:20]
-    return render(request, 'core/search_results.html', {'products': products, 'query': q})
+        # Resultados ordenados por relevancia (BM25 en SQLite FTS5)
+        products = get_search_backend().search(q, limit=20)
+    return TemplateResponse(request, 'core/search_results.html', {'products': products, 'query': q})
 
 # ---------------------------------------------------------------------
 # Export CSV / PDF
-# (Funciones existentes, sin cambios)
 # ---------------------------------------------------------------------
+CSV_EXPORT_HEADER = ['id', 'sku', 'name', 'category', 'supplier', 'price', 'stock']
+CSV_EXPORT_FIELDS = ('id', 'sku', 'name', 'category__name', 'supplier__name', 'price', 'stock')
+CSV_EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en vez de acumularla."""
+    def write(self, value):
+        return value
+
+
+def iter_products_csv(qs, chunk_size=CSV_EXPORT_CHUNK_SIZE):
+    """
+    Genera el CSV línea a línea leyendo tuplas (values_list) en bloques del
+    servidor, sin instanciar modelos ni acumular el archivo en memoria.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_EXPORT_HEADER)
+    rows = qs.order_by('id').values_list(*CSV_EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    for pk, sku, name, category, supplier, price, stock in rows:
+        yield writer.writerow([pk, sku, name, category or '', supplier or '', str(price), stock])
+
+
+def iter_gzip(chunks, level=6, min_flush=64 * 1024):
+    """Comprime un iterable de strings como un único stream gzip."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    pending = []
+    size = 0
+    for chunk in chunks:
+        pending.append(chunk.encode('utf-8'))
+        size += len(pending[-1])
+        if size >= min_flush:
+            data = compressor.compress(b''.join(pending))
+            pending, size = [], 0
+            if data:
+                yield data
+    yield compressor.compress(b''.join(pending)) + compressor.flush()
+
+
 @login_required
 def export_products_csv(request):
+    """
+    Exporta el catálogo en CSV como StreamingHttpResponse.
+    Acepta los mismos filtros que ProductListView (q, category, supplier, pmin, pmax)
+    y ?gzip=1 para descargar el archivo comprimido.
+    """
     if not request.user.is_staff:
         messages.error(request, "Acceso denegado: permisos de staff requeridos para exportar.")
         return redirect('core:product_list')
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="productos.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['id', 'sku', 'name', 'category', 'supplier', 'price', 'stock'])
-    for p in Product.objects.select_related('category', 'supplier').all():
-        writer.writerow([
-            p.id,
-            p.sku,
-            p.name,
-            p.category.name if p.category else '',
-            p.supplier.name if p.supplier else '',
-            str(p.price),
-            p.stock
-        ])
+    qs = filter_products(Product.objects.all(), product_filters(request.GET))
+    rows = iter_products_csv(qs)
+    if request.GET.get('gzip') in ('1', 'true'):
+        response = StreamingHttpResponse(iter_gzip(rows), content_type='application/gzip')
+        response['Content-Disposition'] = 'attachment; filename="productos.csv.gz"'
+    else:
+        response = StreamingHttpResponse(rows, content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="productos.csv"'
     return response
 
 @login_required
 def export_products_pdf(request):
+    """
+    Encola la generación del PDF del catálogo y responde 202 con la URL de estado.
+    Si ya existe el PDF de la versión actual del catálogo se descarga directamente.
+    """
     if not request.user.is_staff:
         messages.error(request, "Acceso denegado: permisos de staff requeridos para exportar.")
         return redirect('core:product_list')
 
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="productos.pdf"'
-    pdf = canvas.Canvas(response)
-    y = 800
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawString(100, y, "Listado de productos")
-    y -= 30
-    pdf.setFont("Helvetica", 10)
-    for prod in Product.objects.all():
-        line = f"{prod.id} - {prod.name} - {prod.price} - Stock: {prod.stock}"
-        pdf.drawString(50, y, line)
-        y -= 15
-        if y < 50:
-            pdf.showPage()
-            y = 800
-            pdf.setFont("Helvetica", 10)
-    pdf.showPage()
-    pdf.save()
-    return response
+    job_id = pdf_export.catalog_version()
+    if pdf_export.artifact_path(job_id).exists():
+        return _pdf_file_response(job_id)
+    job = pdf_export.jobs.submit(job_id)
+    return JsonResponse(_pdf_job_payload(request, job_id, job), status=202)
+
+
+@login_required
+def export_products_pdf_status(request, job_id):
+    if not request.user.is_staff:
+        return JsonResponse({'detail': "Permisos de staff requeridos."}, status=403)
+    job = pdf_export.jobs.status(job_id)
+    if job is None:
+        raise Http404("Exportación inexistente.")
+    return JsonResponse(_pdf_job_payload(request, job_id, job))
+
+
+@login_required
+def export_products_pdf_download(request, job_id):
+    if not request.user.is_staff:
+        messages.error(request, "Acceso denegado: permisos de staff requeridos para exportar.")
+        return redirect('core:product_list')
+    if not pdf_export.artifact_path(job_id).exists():
+        raise Http404("El PDF todavía no está listo.")
+    return _pdf_file_response(job_id)
+
+
+def _pdf_job_payload(request, job_id, job):
+    payload = {
+        'job': job_id,
+        'status': job['status'],
+        'error': job['error'],
+        'status_url': request.build_absolute_uri(reverse('core:export_pdf_status', args=[job_id])),
+        'download_url': None,
+    }
+    if job['status'] == pdf_export.READY:
+        payload['download_url'] = request.build_absolute_uri(reverse('core:export_pdf_download', args=[job_id]))
+    return payload
+
+
+def _pdf_file_response(job_id):
+    return FileResponse(open(pdf_export.artifact_path(job_id), 'rb'), as_attachment=True,
+                        filename='productos.pdf', content_type='application/pdf')
 
 # ---------------------------------------------------------------------
 # ⭐️ API endpoint DRF (ACTUALIZADO) ⭐️
 # ---------------------------------------------------------------------
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+
+
+def api_productos_params(params):
+    """Valida fields y limit de /api/productos/; lanza ValueError con el mensaje para el cliente."""
+    allowed = ProductAPISerializer.Meta.fields
+    fields = None
+    if params.get('fields'):
+        fields = [f.strip() for f in params['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in allowed]
+        if unknown:
+            raise ValueError(f"Campos desconocidos: {', '.join(unknown)}")
+    try:
+        limit = min(max(int(params.get('limit', API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("El parámetro limit debe ser un entero.")
+    return fields, limit
+
+
+def api_productos_queryset(params, fields):
+    qs = filter_products(Product.objects.all(), product_filters(params))
+    # Filas .values() con solo las columnas pedidas (más las de la clave del cursor)
+    return ProductFastSerializer.values(qs, fields, extra=('id', 'updated_at'))
+
+
+def api_next_url(request, next_cursor):
+    if not next_cursor:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = next_cursor
+    return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+
 @api_view(['GET']) # 1. Usamos el decorador de DRF
 @login_required
+@cache_control(**PRIVATE_CACHE)
+@product_set_condition(['cursor', 'limit', 'fields'], html=False)
 def api_productos(request):
     """
-    Retorna una lista de todos los productos disponibles en la tienda.
+    Retorna los productos de la tienda paginados por cursor (updated_at, id).
     Requiere que el usuario esté autenticado.
+
+    Parámetros opcionales:
+      - q, category, supplier, pmin, pmax: mismos filtros que ProductListView.
+      - fields: lista separada por comas de campos a incluir (sparse fieldset).
+      - limit: tamaño de página (por defecto 50, máximo 200).
+      - cursor: valor de "next" devuelto por la página anterior.
+
+    Responde 304 a If-None-Match / If-Modified-Since si el conjunto filtrado no cambió.
     """
-    qs = Product.objects.select_related('category', 'supplier').all()
-    
-    # 2. Usamos el Serializador para transformar el QuerySet
-    serializer = ProductAPISerializer(qs, many=True)
-    
+    try:
+        fields, limit = api_productos_params(request.GET)
+        # 1. Página por clave: el costo no depende de la profundidad de la página
+        page, next_cursor = keyset_page(api_productos_queryset(request.GET, fields),
+                                        request.GET.get('cursor'), limit)
+    except ValueError as exc:  # incluye InvalidCursor
+        return Response({'detail': str(exc)}, status=400)
+
+    # 2. Serializador rápido: misma salida que ProductAPISerializer, sin instanciar modelos
+    serializer = ProductFastSerializer(page, fields=fields)
+
     # 3. Retornamos la respuesta usando Response de DRF, que maneja el JSON
-    return Response({'productos': serializer.data})
+    return Response({'productos': serializer.data, 'next': api_next_url(request, next_cursor)})
+
+
+@api_view(['POST'])
+@login_required
+def api_productos_masivo(request):
+    """
+    Edición masiva de productos por lotes (solo staff); ver core/bulk.py.
+
+    Cuerpo JSON:
+      - operation: price_percent, price_amount, category, supplier o stock.
+      - value: porcentaje, monto o unidades (price_*, stock); category / supplier: id de destino.
+      - ids: lista de ids de producto, o bien
+      - filters: mismos filtros que /api/productos/ (q, category, supplier, pmin, pmax; {} = todo el catálogo).
+    """
+    if not request.user.is_staff:
+        return Response({'detail': "Permisos de staff requeridos."}, status=403)
+    form = BulkProductEditForm(request.data)
+    if not form.is_valid():
+        return Response({'detail': {field: list(errors) for field, errors in form.errors.items()}}, status=400)
+    ids, filters = request.data.get('ids'), request.data.get('filters')
+    if isinstance(ids, list) and all(isinstance(pk, int) for pk in ids):
+        queryset = Product.objects.filter(pk__in=ids)
+    elif ids is None and isinstance(filters, dict):
+        queryset = filter_products(Product.objects.all(), product_filters({k: str(v) for k, v in filters.items()}))
+    else:
+        return Response({'detail': "Indicá ids (lista de enteros) o filters."}, status=400)
+    operation, value = form.operation_args()
+    try:
+        count, batches = bulk.update_products(queryset, operation, value, user=request.user)
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=400)
+    return Response({'operation': operation, 'updated': count, 'batches': batches})
+
+
+API_MAX_ORDER_LINES = 1000
+
+
+def api_pedidos_lines(data):
+    """Valida el carrito de POST /api/pedidos/ y lo devuelve como [(product_id, cantidad)]; ValueError si no."""
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        raise ValueError("items debe ser una lista no vacía de {product, quantity}.")
+    if len(items) > API_MAX_ORDER_LINES:
+        raise ValueError(f"Un pedido admite hasta {API_MAX_ORDER_LINES} líneas.")
+    lines = []
+    for item in items:
+        product, quantity = (item.get('product'), item.get('quantity', 1)) if isinstance(item, dict) else (None, None)
+        if type(product) is not int or type(quantity) is not int or quantity <= 0:
+            raise ValueError("Cada línea necesita product (id) y quantity (entero mayor que 0).")
+        lines.append((product, quantity))
+    return lines
+
+
+@api_view(['POST'])
+@login_required
+def api_pedidos(request):
+    """
+    Crea un pedido con el carrito completo en una sola petición (ver core/stock.py:place_order).
+
+    Cuerpo JSON:
+      - items: [{"product": id, "quantity": n}, ...] (hasta 1000 líneas).
+      - customer, status: solo staff (id del cliente y estado inicial P, C o X).
+        Un cliente crea pedidos propios y siempre pendientes.
+
+    Responde 201 con el pedido, 400 si el carrito es inválido y 409 si falta stock.
+    """
+    try:
+        lines = api_pedidos_lines(request.data)
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=400)
+    if request.user.is_staff:
+        customer_id, status = request.data.get('customer'), request.data.get('status', 'P')
+        customer = Customer.objects.filter(pk=customer_id).first() if type(customer_id) is int else None
+        if customer is None:
+            return Response({'detail': "customer debe ser el id de un cliente existente."}, status=400)
+        if status not in dict(Order.STATUS_CHOICES):
+            return Response({'detail': f"status inválido. Opciones: {', '.join(dict(Order.STATUS_CHOICES))}."},
+                            status=400)
+    else:
+        customer, status = request.customer, 'P'
+        if not customer:
+            return Response({'detail': "No se encontró el perfil de cliente."}, status=403)
+    try:
+        order = place_order(customer, lines, status=status)
+    except UnknownProducts as exc:
+        return Response({'detail': str(exc), 'products': exc.product_ids}, status=400)
+    except InsufficientStock as exc:
+        return Response({'detail': str(exc), 'products': exc.product_ids}, status=409)
+    items = order.items.order_by('pk').values('product', 'quantity', 'unit_price')
+    return Response({
+        'id': order.pk,
+        'customer': customer.pk,
+        'status': order.status,
+        'total': f"{order.total:.2f}",
+        'items': [dict(item, unit_price=f"{item['unit_price']:.2f}") for item in items],
+    }, status=201)
 
 @login_required
 def home_view(request):
-    return render(request, 'core/base.html')
\ No newline at end of file
+    return TemplateResponse(request, 'core/base.html')
+
+# ---------------------------------------------------------------------
+# Reportes de ventas (solo leen DailySalesRollup)
+# ---------------------------------------------------------------------
+class SalesReportView(LoginRequiredMixin, StaffRequiredMixin, TemplateView):
+    template_name = 'core/sales_report.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            start, end = reports.report_range(self.request.GET)
+        except ValueError as exc:
+            messages.error(self.request, str(exc))
+            start, end = reports.report_range({})
+        context.update({
+            'start': start,
+            'end': end,
+            'totals': reports.sales_totals(start, end),
+            'by_day': reports.sales_report(start, end, ['dia']),
+            'by_category': reports.sales_report(start, end, ['categoria']),
+            'by_supplier': reports.sales_report(start, end, ['proveedor']),
+        })
+        return context
+
+
+@api_view(['GET'])
+@login_required
+def api_reportes_ventas(request):
+    """
+    Ventas de pedidos completados entre dos fechas (solo staff).
+
+    Parámetros opcionales:
+      - desde, hasta: fechas AAAA-MM-DD (por defecto, los últimos 30 días).
+      - agrupar: combinación separada por comas de dia, categoria, proveedor (por defecto dia).
+    """
+    if not request.user.is_staff:
+        return Response({'detail': "Permisos de staff requeridos."}, status=403)
+    group_by = [g.strip() for g in request.GET.get('agrupar', 'dia').split(',') if g.strip()]
+    try:
+        start, end = reports.report_range(request.GET)
+        rows = reports.sales_report(start, end, group_by)
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=400)
+    totals = reports.sales_totals(start, end)
+    # Importes como texto, igual que el precio en /api/productos/ (el encoder de DRF los pasaría a float)
+    for row in rows + [totals]:
+        row['revenue'] = f"{row['revenue']:.2f}"
+    return Response({'desde': start, 'hasta': end, 'agrupar': group_by, 'filas': rows, 'totales': totals})
+
+class ReorderSuggestionListView(LoginRequiredMixin, StaffRequiredMixin, ListView):
+    """Última corrida de `low_stock_report`, agrupada por proveedor."""
+    template_name = 'core/reorder_list.html'
+    context_object_name = 'suggestions'
+
+    def get_queryset(self):
+        return (ReorderSuggestion.objects.select_related('product', 'supplier')
+                .order_by('supplier__name', 'supplier', 'days_of_cover'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['totals'] = supplier_totals()
+        context['computed_at'] = next((s.computed_at for s in context['suggestions']), None)
+        return context
+
+# ---------------------------------------------------------------------
+# Métricas de rendimiento (Prometheus)
+# ---------------------------------------------------------------------
+@login_required
+def metrics_view(request):
+    """Histogramas de PerformanceMiddleware en formato de texto de Prometheus (solo staff)."""
+    if not request.user.is_staff:
+        return HttpResponse("Permisos de staff requeridos.", status=403, content_type='text/plain')
+    return HttpResponse(metrics_registry.render_prometheus(), content_type='text/plain; version=0.0.4')
@@ -30,3 +30,31 @@ document.querySelectorAll(".alert").forEach(alert => {
         alert.style.display = "none";
     }, 3000);
 });
+
+// Exportaciones en segundo plano (PDF): encola, consulta el estado y descarga al terminar
+document.querySelectorAll("[data-export-job]").forEach(link => {
+    link.addEventListener("click", async function(event) {
+        event.preventDefault();
+        const label = link.textContent;
+        link.textContent = label + " (generando...)";
+        try {
+            let response = await fetch(link.href, { headers: { "Accept": "application/json" } });
+            if (response.ok && response.headers.get("Content-Type") === "application/pdf") {
+                window.location = link.href;
+                return;
+            }
+            let job = await response.json();
+            while (job.status === "pending" || job.status === "running") {
+                await new Promise(resolve => setTimeout(resolve, 1500));
+                job = await (await fetch(job.status_url)).json();
+            }
+            if (job.download_url) {
+                window.location = job.download_url;
+            } else {
+                alert("No se pudo generar el PDF: " + (job.error || job.status));
+            }
+        } finally {
+            link.textContent = label;
+        }
+    });
+});
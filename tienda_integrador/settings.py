@@ -1,5 +1,7 @@
+import os
 from pathlib import Path
 from django.contrib.messages import constants as messages
+from django.core.exceptions import ImproperlyConfigured
 
 # ---------------------------------------
 # BASE DIRECTORY
@@ -37,15 +39,40 @@ INSTALLED_APPS = [
 # ---------------------------------------
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', 
+    'core.middleware.WhiteNoiseMiddleware',  # WhiteNoise con soporte ASGI nativo
+    'core.middleware.PerformanceMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CustomerMiddleware',    # request.customer, resuelto una vez por petición
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# ---------------------------------------
+# SESIONES
+# ---------------------------------------
+# SESSION_MODE (variable de entorno):
+#   - db: una consulta a django_session por petición autenticada.
+#   - cached_db (por defecto): lee desde la caché 'default' y escribe en caché y base;
+#     la base solo se consulta si la sesión no está en caché.
+#   - signed_cookies: sin almacenamiento en el servidor; los datos viajan firmados
+#     (no cifrados) en la cookie y no se pueden invalidar desde el servidor.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_MODE = os.environ.get('SESSION_MODE', 'cached_db')
+if SESSION_MODE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(f"SESSION_MODE debe ser uno de: {', '.join(SESSION_ENGINES)}")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+
+# Peticiones más lentas que esto (segundos) se registran en el logger
+# 'core.performance' con sus consultas más costosas. None lo desactiva.
+SLOW_REQUEST_THRESHOLD = 1.0
+
 # ---------------------------------------
 # URL CONFIG
 # ---------------------------------------
@@ -60,6 +87,7 @@ TEMPLATES = [
         'DIRS': [
             BASE_DIR / 'templates' 
         ],
+        # Con APP_DIRS y sin 'loaders', Django usa el loader cacheado (también en DEBUG, desde 4.1)
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -67,6 +95,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.catalog_fragments',
             ],
         },
     },
@@ -78,14 +107,78 @@ TEMPLATES = [
 WSGI_APPLICATION = 'tienda_integrador.wsgi.application'
 
 # ---------------------------------------
-# DATABASE (SQLite)
+# DATABASE
+# ---------------------------------------
+# Perfil elegido con la variable de entorno DB_PROFILE:
+# - dev (por defecto): SQLite sin ajustes, una conexión por petición.
+# - sqlite: SQLite para producción. core.db aplica SQLITE_PRAGMAS al abrir cada
+#   conexión (WAL: las lecturas no esperan a las escrituras) y las transacciones
+#   arrancan como IMMEDIATE para que dos escrituras no choquen al pasar de
+#   lectura a escritura (el busy_timeout espera en vez de fallar con "database is locked").
+# - server: PostgreSQL/MySQL configurado con DB_ENGINE, DB_NAME, DB_USER, DB_PASSWORD,
+#   DB_HOST y DB_PORT; conexiones persistentes (DB_CONN_MAX_AGE segundos) con health checks.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'dev')
+SQLITE_PATH = os.environ.get('SQLITE_PATH') or BASE_DIR / 'db.sqlite3'
+SQLITE_PRAGMAS = {}
+
+if DB_PROFILE == 'dev':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': SQLITE_PATH,
+        }
+    }
+elif DB_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': SQLITE_PATH,
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        }
+    }
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',        # con WAL no se pierde consistencia, solo durabilidad ante un corte de luz
+        'busy_timeout': 5000,           # milisegundos
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,           # negativo = KiB (64 MB por conexión)
+        'temp_store': 'MEMORY',
+    }
+elif DB_PROFILE == 'server':
+    DATABASES = {
+        'default': {
+            'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.postgresql'),
+            'NAME': os.environ.get('DB_NAME', 'tienda'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    raise ImproperlyConfigured("DB_PROFILE debe ser uno de: dev, sqlite, server")
+
+# ---------------------------------------
+# CACHE
 # ---------------------------------------
-DATABASES = {
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tienda-integrador',
+    },
+    # Fragmentos de template ({% cache %}): filas del listado, menú y filtros de categorías
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tienda-integrador-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
 }
+# Segundos que vive una página cacheada del catálogo (ver core/cache.py)
+CATALOG_CACHE_TIMEOUT = 300
+# Segundos que vive un fragmento de template cacheado (las claves ya cambian con cada edición)
+TEMPLATE_FRAGMENT_TIMEOUT = 600
 
 # ---------------------------------------
 # PASSWORD VALIDATION
@@ -122,12 +215,47 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Perfil elegido con la variable de entorno STATIC_PROFILE:
+# - dev (por defecto): nombres sin hash, WhiteNoise sirve los archivos tal cual.
+# - production: collectstatic guarda cada archivo con el hash de su contenido en
+#   el nombre (styles.4f1c2a9e0b3d.css), reescribe las referencias entre archivos
+#   y genera variantes .gz (y .br si está instalado el paquete brotli). WhiteNoise
+#   sirve la variante comprimida que acepte el navegador y manda
+#   "Cache-Control: max-age=315360000, public, immutable" para los nombres con
+#   hash: el navegador no vuelve a pedirlos. Requiere correr collectstatic en cada
+#   deploy; `check --deploy` verifica que los templates solo usen nombres del manifiesto.
+STATIC_PROFILE = os.environ.get('STATIC_PROFILE', 'dev')
+if STATIC_PROFILE not in ('dev', 'production'):
+    raise ImproperlyConfigured("STATIC_PROFILE debe ser uno de: dev, production")
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': ('whitenoise.storage.CompressedManifestStaticFilesStorage' if STATIC_PROFILE == 'production'
+                    else 'django.contrib.staticfiles.storage.StaticFilesStorage'),
+    },
+}
+
 # ---------------------------------------
 # MEDIA FILES
 # ---------------------------------------
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# PDF del catálogo generados en segundo plano (ver core/pdf_export.py).
+# PDF_EXPORT_WORKERS = 0 genera el archivo dentro de la petición (útil en tests).
+EXPORT_ROOT = MEDIA_ROOT / 'exports'
+PDF_EXPORT_WORKERS = 1
+
+# ---------------------------------------
+# ARCHIVO DE PEDIDOS
+# ---------------------------------------
+# Edad (días) a partir de la cual `archive_orders` mueve los pedidos completados
+# o cancelados a ArchivedOrder (ver core/archive.py).
+ORDER_ARCHIVE_DAYS = int(os.environ.get('ORDER_ARCHIVE_DAYS', 365))
+
 # ---------------------------------------
 # DEFAULT AUTO FIELD
 # ---------------------------------------
@@ -171,4 +299,11 @@ SPECTACULAR_SETTINGS = {
         'deepLinking': True,
         'persistAuthorization': True, # Mantener la autorización al recargar
     },
-}
\ No newline at end of file
+}
+
+# ---------------------------------------
+# BÚSQUEDA DE PRODUCTOS
+# ---------------------------------------
+# Ruta a la clase del backend de búsqueda (ver core/search.py). Si es None se
+# usa SQLiteFTS5Backend en SQLite e IcontainsBackend en otros motores.
+PRODUCT_SEARCH_BACKEND = None